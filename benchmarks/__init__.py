@@ -0,0 +1 @@
+"""Benchmarks for Meat Monitor's data loading and emissions math."""
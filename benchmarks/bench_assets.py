@@ -0,0 +1,106 @@
+"""
+Measures the image cost of creating each window, before and after
+meatmonitor.assets.ImageCache.
+
+A session shows splash3.png at 600 x 300 on the splash page and at 300 x 150 on
+the input, results and final pages. Before, every window decoded the 1143 x 546
+original and resampled it; now a launch decodes the small copies saved on disk
+(or, on the very first launch, resamples once and saves them), and later windows
+reuse the copy already in memory. Making the Tk image is timed too when a display
+is available.
+
+A copy of the image in a temporary directory is used, so the cache next to
+assets/splash3.png is left alone.
+
+Run from the repository root:
+    python -m benchmarks.bench_assets [--repeat 20]
+"""
+from pathlib import Path
+import argparse
+import shutil
+import tempfile
+import time
+from PIL import Image
+from meatmonitor.assets import ImageCache, assets_dir
+
+name = 'splash3.png'
+windows = [('splash', (600, 300)), ('inputs', (300, 150)), ('write', (300, 150)),
+           ('final', (300, 150))]
+# the size each window shows the logo at, in the order a session opens them
+
+
+def best(function, repeat: int) -> float:
+    """ Returns the fastest of repeat calls to function, in milliseconds. """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        from tkinter import Tk, TclError
+        from PIL import ImageTk
+        tk_root = Tk()
+        tk_root.withdraw()
+    except (ImportError, TclError):
+        tk_root = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copyfile(assets_dir / name, Path(directory) / name)
+
+        def before(size):
+            with Image.open(Path(directory) / name) as png:
+                resized = png.resize(size, Image.Resampling.LANCZOS)
+            if tk_root is not None:
+                ImageTk.PhotoImage(resized, master=tk_root)
+
+        def after(session: ImageCache, size):
+            if tk_root is None:
+                session.image(name, size)
+            else:
+                session.photo(name, size, tk_root)
+
+        def first_launch(size):
+            shutil.rmtree(Path(directory) / 'images.cache', ignore_errors=True)
+            after(ImageCache(directory), size)
+
+        rows = []
+        for window, size in windows:
+            rows.append((window, size, best(lambda: before(size), args.repeat)))
+        for x, (window, size) in enumerate(windows):
+            first = best(lambda: first_launch(size), args.repeat)
+            # a launch that finds the resized copy on disk
+            launch = best(lambda: after(ImageCache(directory), size), args.repeat)
+            # a later window of the same session, which already holds the image
+            session = ImageCache(directory)
+            after(session, size)
+
+            def later_window():
+                # every window has its own Tk root in the app, so its Tk image is new
+                session.photo_root = None
+                after(session, size)
+            warm = best(later_window, args.repeat)
+            rows[x] += (first, launch, warm)
+
+    print('Tk images included' if tk_root is not None else 'no display: PIL work only')
+    print(f'{"window":8} {"size":>9} {"before":>9} {"1st run":>9} {"launch":>9} '
+          f'{"in memory":>9}  (ms)')
+    for window, size, before_ms, first, launch, warm in rows:
+        print(f'{window:8} {size[0]:>4}x{size[1]:<4} {before_ms:9.3f} {first:9.3f} '
+              f'{launch:9.3f} {warm:9.3f}')
+    total_before = sum(row[2] for row in rows)
+    # a session decodes once per size from disk, then reuses it in memory
+    total_after = rows[0][4] + rows[1][4] + rows[2][5] + rows[3][5]
+    print(f'per session: {total_before:.2f} ms before, {total_after:.2f} ms after '
+          f'({total_before / total_after:.1f}x less)')
+
+
+if __name__ == '__main__':
+    main()
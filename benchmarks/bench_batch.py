@@ -0,0 +1,107 @@
+"""
+Times meatmonitor.batch.score_batch on random cohorts of 10^6 and 10^7 diet
+profiles scored against the shipped country table, and compares its rate with
+building a User per profile (timed on a smaller sample).
+
+Country emissions are worked out once, when the table is loaded (model.country_baseline
+and each Country's average_emissions). To show what that saves, the User loop is also
+timed recomputing them for every profile as Animal and User used to, and score_batch
+on small batches (as Cohort and HistoryStore score them) is timed with the shared
+baseline and with one built for every batch.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch [--sizes 1000000 10000000] [--repeat 3] [--user-sample 10000]
+                                     [--small-batch 1000]
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+from meatmonitor.batch import CountryBaseline, score_batch
+from meatmonitor.emissions import animal_types
+from meatmonitor.loader import load_country_table
+from meatmonitor.model import User, load_countries
+
+csv_path = Path(__file__).resolve().parent.parent / 'assets' / 'percapita.csv'
+
+
+def random_cohort(size: int, countries: int, seed: int = 0):
+    """ Returns random integer servings (0 to 15 per meat) and country rows for size users. """
+    rng = np.random.default_rng(seed)
+    servings = rng.integers(0, 16, (size, len(animal_types)), dtype=np.int8)
+    return servings, rng.integers(0, countries, size)
+
+
+def user_rate(servings: np.ndarray, rows: np.ndarray, entities, recompute: bool = False) -> float:
+    """ Returns how many profiles per second User.find_stats scores, one User at a time.
+    With recompute, every profile also works out its country's emissions from its factors
+    and consumption, as Animal.__init__ and User.find_stats did before they were read from
+    the loaded baseline.
+    """
+    load_countries(csv_path)
+    start = time.perf_counter()
+    for x in range(len(servings)):
+        user = User('', entities[rows[x]])
+        user.create_animal_classes([float(value) for value in servings[x]])
+        if recompute:
+            for animal in user.animal_list.values():
+                animal.country_emissions = user.location.emission_factors[animal.name] * \
+                                           user.location.average_consumption[animal.name]
+        user.find_stats()
+        if recompute:
+            user.total_country_emissions = sum([user.animal_list[animal].country_emissions
+                                                for animal in user.animal_list])
+    return len(servings) / (time.perf_counter() - start)
+
+
+def small_batch_times(servings: np.ndarray, rows: np.ndarray, table, baseline: CountryBaseline,
+                      batch: int, repeat: int):
+    """ Returns the best time to score servings batch profiles at a time against baseline,
+    and against a CountryBaseline built for every batch.
+    """
+    best_shared = best_built = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for first in range(0, len(servings), batch):
+            score_batch(servings[first:first + batch], rows[first:first + batch], baseline)
+        best_shared = min(best_shared, time.perf_counter() - start)
+        start = time.perf_counter()
+        for first in range(0, len(servings), batch):
+            score_batch(servings[first:first + batch], rows[first:first + batch],
+                        CountryBaseline(table.consumption, table.entities))
+        best_built = min(best_built, time.perf_counter() - start)
+    return best_shared, best_built
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 6, 10 ** 7])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--user-sample', type=int, default=10 ** 4)
+    parser.add_argument('--small-batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    table = load_country_table(csv_path)
+    baseline = CountryBaseline(table.consumption, table.entities)
+    sample = random_cohort(args.user_sample, len(table))
+    per_user = user_rate(*sample, table.entities)
+    recomputing = user_rate(*sample, table.entities, recompute=True)
+    print(f'{"User loop":>19}: {per_user / 1e6:23.3f} M profiles/s')
+    print(f'{"recomputing":>19}: {recomputing / 1e6:23.3f} M profiles/s '
+          f'({per_user / recomputing:.2f}x slower)')
+    shared, built = small_batch_times(*sample, table, baseline, args.small_batch, args.repeat)
+    print(f'{args.small_batch:>10} a batch: {shared * 1000:9.1f} ms with the loaded baseline, '
+          f'{built * 1000:.1f} ms building one per batch ({built / shared:.2f}x)')
+    for size in args.sizes:
+        servings, rows = random_cohort(size, len(table))
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            score_batch(servings, rows, baseline)
+            best = min(best, time.perf_counter() - start)
+        print(f'{size:>10} profiles: {best * 1000:9.1f} ms, '
+              f'{size / best / 1e6:6.1f} M profiles/s, {size / best / per_user:6.0f}x User loop')
+
+
+if __name__ == '__main__':
+    main()
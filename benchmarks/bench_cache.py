@@ -0,0 +1,57 @@
+"""
+Measures startup cost of loading the country table with a cold cache (CSV parsed
+with pandas, cache written) and a warm cache (cached arrays memory mapped).
+
+Each measurement is a fresh interpreter, so import time is included, as it is
+for a real launch. A copy of the CSV in a temporary directory is used, so the
+cache next to assets/percapita.csv is left alone.
+
+Run from the repository root:
+    python -m benchmarks.bench_cache [--repeat 5]
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from meatmonitor.loader import cache_dir_for
+
+root = Path(__file__).resolve().parent.parent
+csv_path = root / 'assets' / 'percapita.csv'
+
+startup = ('import sys\n'
+           'from meatmonitor.loader import load_country_table\n'
+           'load_country_table(sys.argv[1])\n')
+
+
+def launch(path: Path) -> float:
+    """ Returns the wall time, in seconds, of a fresh interpreter loading the table at path. """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', startup, str(path)], cwd=root, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / csv_path.name
+        shutil.copyfile(csv_path, path)
+
+        cold = []
+        for _ in range(args.repeat):
+            shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+            cold.append(launch(path))
+        warm = [launch(path) for _ in range(args.repeat)]
+
+    print(f'cold start (parse CSV, write cache): {min(cold) * 1000:8.1f} ms')
+    print(f'warm start (mmap cache):             {min(warm) * 1000:8.1f} ms')
+    print(f'{min(cold) / min(warm):.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Measures click-to-chart latency of "View Graphical Analysis", cold and warm,
+before and after meatmonitor.charts.
+
+Before, every click built a new pyplot figure (importing matplotlib on the first
+one) and drew it. Now the chart is drawn on a background thread onto one reused
+Agg figure: matplotlib is imported while the results page is shown, a chart
+already drawn comes straight from the cache, and after an Adjust only the
+updated bars change. Cold cases are timed in a fresh interpreter, as for a real
+first click. Times are from the click until the chart image is ready; making the
+Tk image from it is not included, as that needs a display.
+
+Run from the repository root:
+    python -m benchmarks.bench_charts [--repeat 20]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, List
+from meatmonitor.charts import ChartRenderer
+
+current = [16.0, 3.2, 7.5, 35.4, 0.0]
+country = [20.1, 4.0, 6.2, 11.3, 0.4]
+updated = [0.0, 3.2, 7.5, 35.4, 0.0]
+# kg of CO2 per week from each meat for a sample user
+
+old_click = '''
+def click(current, country, updated):
+    import numpy as np
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    w = 0.2
+    bar1 = np.arange(len(current))
+    bar2 = [x + w for x in bar1]
+    bar3 = [x + w for x in bar2]
+    plt.bar(bar1, current, w, label='Your Current Emissions')
+    plt.bar(bar2, updated, w, label='Your Updated Emissions')
+    plt.bar(bar3, country, w, label='Average Emissions per Capita for Your Country')
+    plt.xlabel('Types of Meat')
+    plt.ylabel('Kg of CO2 Emissions per Week')
+    plt.title('Weekly Kg of CO2 Emissions from Eating Meat')
+    plt.xticks(bar1 + w, ['Beef', 'Poultry', 'Pork', 'Lamb', 'Other'])
+    plt.legend()
+    plt.gcf().canvas.draw()
+    plt.close()
+'''
+# the old graph(), drawing with Agg where it used to call plt.show()
+
+new_click = '''
+from meatmonitor.charts import ChartRenderer
+renderer = ChartRenderer()
+
+def click(current, country, updated):
+    renderer.submit(current, country, updated).result()
+'''
+
+cold = '''
+import sys, time
+{setup}
+{prepare}
+start = time.perf_counter()
+click({current}, {country}, {updated})
+print(time.perf_counter() - start)
+'''
+
+
+def fresh(setup: str, prepare: str = '') -> float:
+    """ Returns the milliseconds of a first click in a new interpreter. """
+    code = cold.format(setup=setup, prepare=prepare, current=current, country=country,
+                       updated=updated)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                            text=True).stdout
+    return float(output) * 1000
+
+
+def median_ms(clicks: List[Callable[[], None]]) -> float:
+    """ Returns the median milliseconds of the given clicks. """
+    times = []
+    for click in clicks:
+        start = time.perf_counter()
+        click()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    old_cold = min(fresh(old_click) for _ in range(3))
+    new_cold = min(fresh(new_click) for _ in range(3))
+    # the results page prepares the renderer; reading it takes a few seconds
+    new_prepared = min(fresh(new_click, 'renderer.prepare(); time.sleep(3)') for _ in range(3))
+
+    namespace = {}
+    exec(old_click, namespace)
+    old_click_function = namespace['click']
+    old_click_function(current, country, updated)
+    old_warm = median_ms([lambda: old_click_function(current, country, updated)] * args.repeat)
+
+    renderer = ChartRenderer()
+    renderer.submit(current, country, updated).result()
+    cached = median_ms([lambda: renderer.submit(current, country, updated).result()]
+                       * args.repeat)
+    # every Adjust changes the updated bars only
+    adjusted = median_ms([lambda x=x: renderer.submit(current, country, [x, 3.2, 7.5, 35.4, 0.0])
+                         .result() for x in range(1, args.repeat + 1)])
+    # a new user changes every bar
+    new_user = median_ms([lambda x=x: renderer.submit([x, 3.2, 7.5, 35.4, 0.0], country, updated)
+                         .result() for x in range(1, args.repeat + 1)])
+
+    print(f'{"":28} {"before":>9} {"after":>9}  (ms)')
+    print(f'{"first click":28} {old_cold:9.1f} {new_cold:9.1f}')
+    print(f'{"first click, page read":28} {old_cold:9.1f} {new_prepared:9.1f}')
+    print(f'{"same chart again":28} {old_warm:9.1f} {cached:9.3f}')
+    print(f'{"after Adjust":28} {old_warm:9.1f} {adjusted:9.1f}')
+    print(f'{"another user":28} {old_warm:9.1f} {new_user:9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares meatmonitor.goals.solve_goals with a brute force search over all 16^n
+slider positions (n meats), for random cohorts, and checks that both find goals at the
+same distance from every diet.
+
+Run from the repository root:
+    python -m benchmarks.bench_goals [--sizes 100 10000 1000000] [--brute-sample 50]
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+from meatmonitor.emissions import animal_types
+from meatmonitor.goals import max_servings, reduction_percentage, solve_goals, target_reduction
+
+slider_grid = np.array(list(itertools.product(range(max_servings + 1),
+                                              repeat=len(animal_types))))
+
+
+def brute_force_distance(current: np.ndarray, target: float = target_reduction) -> float:
+    """ Returns the distance to the closest goal for current by scoring every slider position,
+    or inf if none reaches the target.
+    """
+    met = reduction_percentage(current[None, :], slider_grid) >= target
+    distance = np.abs(slider_grid - current).sum(axis=1)
+    return float(np.where(met, distance, np.inf).min())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10 ** 4, 10 ** 6])
+    parser.add_argument('--brute-sample', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sample = rng.integers(0, max_servings + 1, (args.brute_sample, len(animal_types)))
+    start = time.perf_counter()
+    expected = [brute_force_distance(current) for current in sample]
+    brute_per_user = (time.perf_counter() - start) / len(sample)
+
+    goals, feasible = solve_goals(sample)
+    found = np.where(feasible, np.abs(goals - sample).sum(axis=1), np.inf)
+    mismatches = int((found != np.array(expected)).sum())
+    print(f'brute force: {brute_per_user * 1e3:.3f} ms per diet, '
+          f'{mismatches} of {len(sample)} sampled goals differ from the solver')
+
+    for size in args.sizes:
+        cohort = rng.integers(0, max_servings + 1, (size, len(animal_types)))
+        start = time.perf_counter()
+        solve_goals(cohort)
+        seconds = time.perf_counter() - start
+        # Brute force gets the same benefit of solving each distinct diet once
+        brute = brute_per_user * len(np.unique(cohort, axis=0))
+        print(f'{size:>9} diets: solver {seconds * 1000:10.1f} ms, '
+              f'brute force ~{brute * 1000:12.1f} ms (extrapolated), {brute / seconds:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
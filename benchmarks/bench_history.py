@@ -0,0 +1,122 @@
+"""
+Times meatmonitor.history.HistoryStore writing 10 million weeks, a batch at a time,
+and reading back a user's summary and trend once they are stored, from a freshly
+opened store, against working the summary out from the user's stored weeks.
+
+The weeks are those of --users users recording every week, each with random
+servings and goals, one week of every user after another. The database is made
+in a temporary directory.
+
+Run from the repository root:
+    python -m benchmarks.bench_history [--weeks 10000000] [--users 100000] [--batch 10000]
+"""
+from datetime import date
+from pathlib import Path
+import argparse
+import tempfile
+import time
+import numpy as np
+from meatmonitor import model
+from meatmonitor.emissions import animal_types
+from meatmonitor.history import HistoryStore, long_window, week_of
+
+
+def percentiles(seconds: list) -> str:
+    """ Returns the median and 99th percentile of seconds, in microseconds. """
+    median, tail = np.percentile(seconds, [50, 99]) * 10 ** 6
+    return f'median {median:.0f} us, p99 {tail:.0f} us'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--weeks', type=int, default=10 ** 7)
+    parser.add_argument('--users', type=int, default=10 ** 5)
+    parser.add_argument('--batch', type=int, default=10 ** 4)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    model.load_countries()
+    rng = np.random.default_rng(0)
+    names = [f'user {x}' for x in range(args.users)]
+    countries = [model.country_table.entities[row] for row in
+                 rng.choice(np.flatnonzero(model.country_table.consumption.sum(axis=1) > 0),
+                            args.users)]
+    first = week_of(date.today()) - args.weeks // args.users
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'history.sqlite3'
+        store = HistoryStore(path, batch_size=args.weeks + 1)
+        adding = 0.0
+        flushes = []
+        for start in range(0, args.weeks, args.batch):
+            count = min(args.batch, args.weeks - start)
+            servings = rng.integers(0, 16, (count, len(animal_types))).astype(np.float64)
+            goals = np.maximum(servings - rng.integers(0, 4, servings.shape), 0)
+            began = time.perf_counter()
+            for x in range(count):
+                user = (start + x) % args.users
+                store.add(names[user], countries[user], first + (start + x) // args.users,
+                          servings[x], goals[x])
+            adding += time.perf_counter() - began
+            began = time.perf_counter()
+            store.flush()
+            flushes.append(time.perf_counter() - began)
+        total = adding + sum(flushes)
+        print(f'{args.weeks:,} weeks of {args.users:,} users in batches of {args.batch:,}: '
+              f'{total:.1f} s ({args.weeks / total:,.0f} weeks/s); adding {adding:.1f} s, '
+              f'writing {sum(flushes):.1f} s, {percentiles(flushes)} a batch')
+        store.close()
+        print(f'database: {path.stat().st_size / 2 ** 20:,.0f} MiB')
+
+        store = HistoryStore(path)
+        # Reopened, so every summary is read from the database rather than memory
+
+        asked = [names[user] for user in rng.integers(0, args.users, args.queries)]
+        timings = {'summary': [], 'trend (52 weeks)': [], 'summary from stored weeks': []}
+        for name in asked:
+            began = time.perf_counter()
+            store.summary(name)
+            timings['summary'].append(time.perf_counter() - began)
+            began = time.perf_counter()
+            store.trend(name, long_window)
+            timings['trend (52 weeks)'].append(time.perf_counter() - began)
+            began = time.perf_counter()
+            scanned(store, name, first)
+            timings['summary from stored weeks'].append(time.perf_counter() - began)
+
+        store.batch_size = 1
+        latest = first + (args.weeks - 1) // args.users
+        servings = rng.integers(0, 16, (args.queries, len(animal_types))).astype(np.float64)
+        timings['one week written alone'] = []
+        for x, user in enumerate(rng.permutation(args.users)[:args.queries]):
+            began = time.perf_counter()
+            store.add(names[user], countries[user], latest + 1, servings[x])
+            timings['one week written alone'].append(time.perf_counter() - began)
+        for label, seconds in timings.items():
+            print(f'{label:>26}: {percentiles(seconds)}')
+        store.close()
+
+
+def scanned(store: HistoryStore, name: str, first: int) -> tuple:
+    """ Returns name's 4 and 52 week averages and streaks, read from all their stored weeks
+    since first, as the store would have to without its summaries.
+    """
+    user = store.connection.execute('SELECT id FROM users WHERE name = ?', (name,)).fetchone()[0]
+    weeks = list(range(first, store.running[user].latest + 1))
+    rows = store.connection.execute(
+        f'SELECT week, total, country_total FROM weeks WHERE user = ? AND week IN '
+        f'({", ".join("?" * len(weeks))}) ORDER BY week', [user, *weeks]).fetchall()
+    latest = rows[-1][0]
+    recent = [total for week, total, _ in rows if week > latest - 4]
+    year = [total for week, total, _ in rows if week > latest - long_window]
+    streak = best = 0
+    previous = None
+    for week, total, country_total in rows:
+        streak = streak + 1 if total < country_total and previous == week - 1 else \
+            int(total < country_total)
+        best = max(best, streak)
+        previous = week
+    return sum(recent) / len(recent), sum(year) / len(year), streak, best
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Measures how long a fresh interpreter takes to import the headless core
+(meatmonitor.model), compared with an empty interpreter and with the numpy
+based modules, and fails if the core goes over its budget.
+
+Run from the repository root:
+    python -m benchmarks.bench_import [--repeat 10] [--budget-ms 50]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+
+statements = {'python only': 'pass',
+              'meatmonitor.model': 'import meatmonitor.model',
+              'meatmonitor.batch': 'import meatmonitor.batch',
+              'meatmonitor.loader': 'import meatmonitor.loader'}
+
+
+def best_launch(statement: str, repeat: int) -> float:
+    """ Returns the fastest of repeat fresh interpreters running statement, in seconds. """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=root, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=50.0,
+                        help='maximum time meatmonitor.model may add to interpreter startup')
+    args = parser.parse_args()
+
+    times = {label: best_launch(statement, args.repeat) for label, statement in statements.items()}
+    for label, seconds in times.items():
+        extra = (seconds - times['python only']) * 1000
+        print(f'{label:>20}: {seconds * 1000:7.1f} ms ({extra:+7.1f} ms over bare python)')
+
+    core = (times['meatmonitor.model'] - times['python only']) * 1000
+    if core > args.budget_ms:
+        sys.exit(f'meatmonitor.model adds {core:.1f} ms, over the {args.budget_ms} ms budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Times the calls marked as stages by meatmonitor.instrument with timing off and on,
+to check that the instrumentation costs nothing while it is off.
+
+With timing off, a function marked timed is the function itself, and stage()
+returns a shared no-op context manager. With timing on, every call is recorded.
+
+Run from the repository root:
+    python -m benchmarks.bench_instrument [--calls 200000]
+"""
+import argparse
+import time
+from meatmonitor import instrument
+from meatmonitor.model import User, load_countries
+
+
+def per_call(function, calls: int) -> float:
+    """ Returns the best seconds per call of function over 3 runs of calls calls. """
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def empty_stage() -> None:
+    """ Enters and leaves a stage doing nothing. """
+    with instrument.stage('empty'):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=2 * 10 ** 5)
+    args = parser.parse_args()
+
+    if instrument.enabled:
+        parser.error('run without MEATMONITOR_PROFILE, MEATMONITOR_TRACE or MEATMONITOR_CPROFILE')
+    load_countries()
+    user = User('', 'Canada')
+    user.create_animal_classes([2, 3, 5, 7, 0])
+    off = per_call(user.find_stats, args.calls)
+    stage_off = per_call(empty_stage, args.calls)
+    unwrapped = not hasattr(User.find_stats, '__wrapped__')
+    instrument.enable(summary=False)
+    on = per_call(user.find_stats, args.calls)
+    stage_on = per_call(empty_stage, args.calls)
+    instrument.disable()
+
+    print(f'{"find_stats, timing off":>24}: {off * 1e6:7.3f} us '
+          f'({"the unmarked function" if unwrapped else "wrapped"})')
+    print(f'{"find_stats, timing on":>24}: {on * 1e6:7.3f} us ({(on - off) * 1e9:+.0f} ns)')
+    print(f'{"empty stage, timing off":>24}: {stage_off * 1e9:7.0f} ns')
+    print(f'{"empty stage, timing on":>24}: {stage_on * 1e9:7.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
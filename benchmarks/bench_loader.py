@@ -0,0 +1,62 @@
+"""
+Compares the original per-row .loc scan that built proper_country_data against
+the single vectorized pass in meatmonitor.loader.latest_by_entity, on the shipped
+CSV and on a synthetic copy that repeats every entity 100 times.
+
+Run from the repository root:
+    python -m benchmarks.bench_loader [--scale 100] [--repeat 3]
+"""
+import argparse
+import time
+from pathlib import Path
+import pandas as pd
+from meatmonitor.loader import latest_by_entity, meat_columns
+
+csv_path = Path(__file__).resolve().parent.parent / 'assets' / 'percapita.csv'
+
+
+def legacy_scan(country_data: pd.DataFrame) -> dict:
+    """ The original scan from main.py, with the hardcoded bounds replaced by the frame length. """
+    columns = list(meat_columns.values())
+    return {country_data.loc[x, 'Entity']: [country_data.loc[x, column] for column in columns]
+            for x in range(2, len(country_data) - 1)
+            if country_data.loc[x, 'Year'] > country_data.loc[x + 1, 'Year']}
+
+
+def synthetic_copy(frame: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """ Returns frame repeated scale times, with every copy of an entity given a new name. """
+    copies = []
+    for k in range(scale):
+        copy = frame.copy()
+        copy['Entity'] = copy['Entity'] + f' #{k}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def best_of(repeat: int, function, *args) -> float:
+    """ Returns the fastest of repeat runs of function(*args), in seconds. """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    shipped = pd.read_csv(csv_path)
+    for label, frame in [('shipped', shipped),
+                         (f'{args.scale}x', synthetic_copy(shipped, args.scale))]:
+        legacy = best_of(1 if len(frame) > len(shipped) else args.repeat, legacy_scan, frame)
+        vectorized = best_of(args.repeat, latest_by_entity, frame)
+        print(f'{label:>8} ({len(frame):>9} rows): .loc scan {legacy * 1000:10.1f} ms, '
+              f'vectorized {vectorized * 1000:8.2f} ms, {legacy / vectorized:7.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares the cost of one slider move answered from benchmarks.slider_table.SliderTable
+with User.create_goals followed by User.goal_stats, and reports the table's build
+time and memory.
+
+It then moves one slider at a time, as dragging a slider does, and compares the
+same two with User.change_goal, which only works out the meat that moved. After
+the run, change_goal's figures are checked against a full recomputation.
+
+Run from the repository root:
+    python -m benchmarks.bench_lookup [--moves 100000]
+"""
+import argparse
+import time
+import numpy as np
+from meatmonitor.emissions import animal_types
+from meatmonitor.goals import max_servings
+from meatmonitor.model import User, load_countries
+from benchmarks.slider_table import SliderTable
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--moves', type=int, default=10 ** 5)
+    args = parser.parse_args()
+
+    load_countries()
+    user = User('Benchmark', 'Canada')
+    user.create_animal_classes([2.0, 3.0, 5.0, 7.0, 0.0])
+    user.find_stats()
+    moves = np.random.default_rng(0).integers(0, max_servings + 1, (args.moves, len(animal_types)))
+    moves = moves.astype(float).tolist()
+
+    start = time.perf_counter()
+    table = SliderTable()
+    build = time.perf_counter() - start
+    table.country_table(user.location.name, user.total_country_emissions)
+    print(f'table build: {build * 1000:.2f} ms, memory with one country: '
+          f'{table.nbytes / 2 ** 20:.1f} MiB (budget for country tables: '
+          f'{table.memory_budget / 2 ** 20:.0f} MiB)')
+
+    start = time.perf_counter()
+    for servings in moves:
+        user.create_goals(servings)
+        user.goal_stats()
+    recompute = (time.perf_counter() - start) / len(moves)
+
+    start = time.perf_counter()
+    for servings in moves:
+        table.goal(user.total_emissions, servings)
+    lookup = (time.perf_counter() - start) / len(moves)
+
+    print(f'create_goals + goal_stats: {recompute * 1e6:6.2f} us per move')
+    print(f'SliderTable lookup:        {lookup * 1e6:6.2f} us per move '
+          f'({recompute / lookup:.1f}x faster)')
+
+    rng = np.random.default_rng(1)
+    singles = list(zip(rng.integers(0, len(animal_types), args.moves).tolist(),
+                       rng.integers(0, max_servings + 1, args.moves).astype(float).tolist()))
+    first = [0.0] * len(animal_types)
+
+    servings = list(first)
+    start = time.perf_counter()
+    for meat, value in singles:
+        servings[meat] = value
+        user.create_goals(servings)
+        user.goal_stats()
+    recompute = (time.perf_counter() - start) / len(singles)
+
+    servings = list(first)
+    start = time.perf_counter()
+    for meat, value in singles:
+        servings[meat] = value
+        table.goal(user.total_emissions, servings)
+    lookup = (time.perf_counter() - start) / len(singles)
+
+    user.create_goals(first)
+    user.goal_stats()
+    start = time.perf_counter()
+    for meat, value in singles:
+        user.change_goal(animal_types[meat], value)
+    incremental = (time.perf_counter() - start) / len(singles)
+    changed = (user.new_total_emissions, user.emission_reduction_percentage)
+    user.create_goals(servings)
+    user.goal_stats()
+    exact = changed == (user.new_total_emissions, user.emission_reduction_percentage)
+
+    print(f'one slider at a time, {len(singles):,} moves:')
+    print(f'create_goals + goal_stats: {recompute * 1e6:6.2f} us per move')
+    print(f'SliderTable lookup:        {lookup * 1e6:6.2f} us per move')
+    print(f'change_goal:               {incremental * 1e6:6.2f} us per move '
+          f'({recompute / incremental:.1f}x faster than recomputing), '
+          f'same figures as recomputing after the run: {exact}')
+
+
+if __name__ == '__main__':
+    main()
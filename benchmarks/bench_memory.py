@@ -0,0 +1,100 @@
+"""
+Measures the memory per user of holding a large cohort of scored users, in bytes per
+user: as User/Animal objects with a __dict__ each (the layout before __slots__), as
+the __slots__ classes, and as a meatmonitor.cohort.Cohort of arrays.
+
+Memory is what tracemalloc sees allocated while the users are built, find_stats
+and goal_stats are run and the results are kept, with a name string per user in
+every case. Objects are measured on --object-users users (they take gigabytes at a
+million) and the totals scaled up to --users.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory [--users 1000000] [--object-users 100000]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+import numpy as np
+from meatmonitor import model
+from meatmonitor.cohort import Cohort
+
+
+def without_slots(cls: type) -> type:
+    """ Returns a copy of cls whose instances keep their attributes in a __dict__ again. """
+    namespace = {key: value for key, value in vars(cls).items()
+                 if key not in cls.__slots__ and key not in ('__slots__', '__weakref__')}
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+DictAnimal = without_slots(model.Animal)
+DictUser = without_slots(model.User)
+
+
+def _create_dict_animals(self, servings) -> None:
+    for x, animal in enumerate(model.animal_types):
+        self.animal_list[animal] = DictAnimal(animal, self.location, servings[x])
+
+
+DictUser.create_animal_classes = _create_dict_animals
+
+
+def measure(build: Callable[[], object]) -> Tuple[int, float]:
+    """ Returns the bytes allocated by build while its result is alive, and its seconds. """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return allocated, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10 ** 6)
+    parser.add_argument('--object-users', type=int, default=10 ** 5)
+    args = parser.parse_args()
+
+    model.load_countries()
+    # User.find_stats divides by the country average, so countries without data are left out
+    countries = [name for name in model.countries if sum(model.country_table.row(name).values())]
+    rng = np.random.default_rng(0)
+    locations = [countries[x] for x in rng.integers(0, len(countries), args.users)]
+    servings = rng.integers(0, 16, (args.users, len(model.animal_types))).astype(np.float64)
+    goals = rng.integers(0, 16, (args.users, len(model.animal_types))).astype(np.float64)
+
+    def objects(user_class: type) -> Callable[[], list]:
+        def build() -> list:
+            users = []
+            for x in range(args.object_users):
+                user = user_class(f'user {x}', locations[x])
+                user.create_animal_classes(servings[x].tolist())
+                user.find_stats()
+                user.create_goals(goals[x].tolist())
+                user.goal_stats()
+                users.append(user)
+            return users
+        return build
+
+    def cohort() -> Cohort:
+        users = Cohort([f'user {x}' for x in range(args.users)], locations, servings.copy())
+        users.find_stats()
+        users.create_goals(goals.copy())
+        users.goal_stats()
+        return users
+
+    print(f'{"":24} {"bytes/user":>10} {"for " + format(args.users, ","):>14} '
+          f'{"build s/1M":>10}')
+    for label, build, count in [('objects with __dict__', objects(DictUser), args.object_users),
+                                ('__slots__ objects', objects(model.User), args.object_users),
+                                ('Cohort arrays', cohort, args.users)]:
+        allocated, seconds = measure(build)
+        per_user = allocated / count
+        print(f'{label:24} {per_user:10.0f} {per_user * args.users / 2 ** 20:10.0f} MiB '
+              f'{seconds * 10 ** 6 / count:10.2f}')
+
+
+if __name__ == '__main__':
+    main()
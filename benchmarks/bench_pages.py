@@ -0,0 +1,100 @@
+"""
+Measures how long the app takes to move between pages and to restart, now that
+every page is a frame in one Tk root (main.App).
+
+The app is driven in this process: the input page is filled in and its buttons
+invoked, and each step is timed until Tk has finished drawing the new page. For
+comparison it also times what every transition used to add, destroying one Tk
+root and creating the next, and what a restart used to cost, relaunching main.py
+until it is interactive (see benchmarks/bench_startup.py), which also waited for
+the splash page. A display is needed; on a headless machine run this under
+xvfb-run.
+
+Run from the repository root:
+    python -m benchmarks.bench_pages [--repeat 20]
+"""
+from tkinter import Button, Entry, Scale, Tk
+from typing import Callable, List, Optional
+import argparse
+import statistics
+import time
+import main as app_main
+from benchmarks.bench_startup import launch
+from meatmonitor.model import load_countries
+
+
+def find(kind: type, text: Optional[str] = None) -> List:
+    """ Returns the widgets of the given kind on the page shown, in the order they were made,
+    keeping only those labelled text if it is given.
+    """
+    return [widget for widget in app_main.app.page.winfo_children()
+            if isinstance(widget, kind) and (text is None or widget.cget('text') == text)]
+
+
+def timed(step: Callable[[], None]) -> float:
+    """ Runs step and returns the milliseconds until Tk has drawn its result. """
+    start = time.perf_counter()
+    step()
+    app_main.app.root.update()
+    return (time.perf_counter() - start) * 1000
+
+
+def fill_inputs() -> None:
+    """ Answers the input page with a diet that is not 25% below Canada's average. """
+    for scale, servings in zip(find(Scale), [2, 3, 5, 7, 0]):
+        scale.set(servings)
+    find(Entry)[0].insert(0, 'Benchmark')
+    find(app_main.CountryEntry)[0].insert(0, 'Canada')
+
+
+def swap_root() -> float:
+    """ Returns the milliseconds every transition used to add: a new Tk root replacing
+    the last.
+    """
+    old = Tk()
+    old.update()
+    start = time.perf_counter()
+    old.destroy()
+    new = Tk()
+    new.title('Meat Monitor')
+    new.geometry('800x600')
+    new.configure(background='lavender')
+    new.update()
+    elapsed = (time.perf_counter() - start) * 1000
+    new.destroy()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--relaunches', type=int, default=3,
+                        help='launches of main.py timed for the old restart')
+    args = parser.parse_args()
+
+    load_countries()
+    app_main.app = app_main.App()
+    app_main.inputs()
+    app_main.app.root.update()
+
+    steps = {'input -> results': [], 'results -> summary': [], 'restart': []}
+    for _ in range(args.repeat):
+        fill_inputs()
+        steps['input -> results'].append(timed(find(Button, 'Submit')[0].invoke))
+        steps['results -> summary'].append(timed(find(Button, 'Next')[0].invoke))
+        steps['restart'].append(timed(find(Button, 'Restart')[0].invoke))
+    app_main.app.root.destroy()
+
+    swaps = [swap_root() for _ in range(args.repeat)]
+    relaunch = min(launch()['interactive'] for _ in range(args.relaunches)) * 1000
+
+    for step, times in steps.items():
+        print(f'{step:>20}: median {statistics.median(times):7.1f} ms, '
+              f'max {max(times):7.1f} ms')
+    print(f'{"old Tk root swap":>20}: median {statistics.median(swaps):7.1f} ms '
+          f'(added to every transition before)')
+    print(f'{"old restart":>20}: best {relaunch:9.1f} ms (relaunching main.py)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures meatmonitor.regions: the one-off build of the region table at load, and
+ranking a user in their country, regions and the world from it, against working
+the same ranks out per query by walking every country of each region.
+
+Run from the repository root:
+    python -m benchmarks.bench_regions [--users 1000000]
+"""
+import argparse
+import time
+from typing import List
+import numpy as np
+from meatmonitor import model
+from meatmonitor.regions import build_region_table
+from meatmonitor.timeseries import year_baseline
+
+
+def ranks_per_query(total_emissions: float, entity: str, year: int) -> List[float]:
+    """ Returns the percentile of total_emissions in every region of entity in year, the
+    way it would be found without the table: every country of every region is visited.
+    """
+    table = model.region_table
+    ranks = []
+    for region in table.regions_of(entity):
+        members = [name for name in model.countries
+                   if table.region_of[table.index[name]] >= 0
+                   and region in table.regions_of(name)]
+        emissions = []
+        for name in members:
+            try:
+                consumption = model.countries[name].consumption_in(year)
+            except KeyError:
+                continue
+            factors = model.countries[name].emission_factors
+            emissions.append(sum([factors[animal] * consumption[animal]
+                                  for animal in consumption]))
+        ranks.append(100 * sum(value < total_emissions for value in emissions) / len(emissions))
+    return ranks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10 ** 6)
+    args = parser.parse_args()
+
+    model.load_countries()
+    baseline = year_baseline(model.fao_table)
+    start = time.perf_counter()
+    table = build_region_table(model.fao_table, baseline)
+    print(f'region table build: {(time.perf_counter() - start) * 1000:.1f} ms for '
+          f'{len(table.regions)} regions x {table.emissions.shape[1]} years')
+
+    user = model.User('Benchmark', 'Canada')
+    user.create_animal_classes([2.0, 3.0, 5.0, 7.0, 0.0])
+    user.find_stats()
+    expected = [standing.percentile for standing in user.standings(2013)[1:]]
+    assert ranks_per_query(user.total_emissions, 'Canada', 2013) == expected
+
+    repeat = 1000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        user.standings(2013)
+    table_us = (time.perf_counter() - start) / repeat * 10 ** 6
+    start = time.perf_counter()
+    for _ in range(repeat // 100):
+        ranks_per_query(user.total_emissions, 'Canada', 2013)
+    loop_us = (time.perf_counter() - start) / (repeat // 100) * 10 ** 6
+    print(f'one user, country + 3 regions: {table_us:8.1f} us from the table, '
+          f'{loop_us:8.1f} us per query ({loop_us / table_us:.0f}x)')
+
+    emissions = np.random.default_rng(0).uniform(0, 10 ** 6, args.users)
+    world = table.regions.index('World')
+    start = time.perf_counter()
+    table.percentile_rank(emissions, world, 2013)
+    seconds = time.perf_counter() - start
+    print(f'{args.users:,} users ranked worldwide: {seconds * 1000:.1f} ms '
+          f'({args.users / seconds / 10 ** 6:.1f} M users/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Times meatmonitor.scenarios.simulate_shifts on a sweep over a grid of diet shifts,
+each applied to every entity and year of the FAO table, against applying one shift
+at a time to one entity and year as a per-country loop would.
+
+The grid swaps 0 to 100% of beef for poultry in steps of --step percent, cuts all
+other meat by the same fractions, and caps lamb at 0 to 15 servings a week.
+
+Run from the repository root:
+    python -m benchmarks.bench_scenarios [--step 5]
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+from meatmonitor import model
+from meatmonitor.emissions import animal_types
+from meatmonitor.scenarios import DietShift, simulate_shifts
+from meatmonitor.timeseries import year_baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--step', type=int, default=5)
+    args = parser.parse_args()
+
+    model.load_countries()
+    fao = model.fao_table
+    baseline = year_baseline(fao)
+    fractions = np.arange(0, 101, args.step) / 100
+    grid = list(itertools.product(fractions, fractions, range(16)))
+    shifts = [DietShift(cut={'Other': cut}, swap={('Beef', 'Poultry'): swap},
+                        cap_servings={'Lamb': lamb}) for swap, cut, lamb in grid]
+    cells = fao.consumption.shape[0] * fao.consumption.shape[1]
+
+    start = time.perf_counter()
+    result = simulate_shifts(fao, shifts, baseline)
+    seconds = time.perf_counter() - start
+    print(f'{len(shifts):,} shifts x {fao.consumption.shape[0]} entities x '
+          f'{fao.consumption.shape[1]} years: {seconds:.2f} s '
+          f'({len(shifts) * cells / seconds / 10 ** 6:.1f} M entity-years/s)')
+
+    present = np.argwhere(~np.isnan(baseline.total_country_emissions))
+    sample = present[np.random.default_rng(0).integers(0, len(present), 2000)]
+    factors = baseline.emissions_per_gram
+    start = time.perf_counter()
+    for row, offset in sample:
+        consumption = fao.consumption_in(fao.entities[row], fao.first_year + int(offset))
+        shifted = shifts[-1].apply(np.array([consumption[animal] for animal in animal_types]))
+        sum((factors[row] if factors.ndim == 2 else factors) * shifted)
+    loop = (time.perf_counter() - start) / len(sample)
+    print(f'one shift, one entity-year at a time: {loop * 10 ** 6:.1f} us each, '
+          f'{loop * len(shifts) * cells:.0f} s for the sweep (extrapolated)')
+
+    world = fao.index['World']
+    best = np.nanargmin(result.delta[:, world, fao.latest[world]])
+    swap, cut, lamb = grid[best]
+    print(f'largest World cut: {result.latest("World", best)[2]:.1f}% with {swap:.0%} of beef '
+          f'to poultry, {cut:.0%} less other meat and lamb capped at {lamb} servings')
+
+
+if __name__ == '__main__':
+    main()
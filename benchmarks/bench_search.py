@@ -0,0 +1,90 @@
+"""
+Measures meatmonitor.search.CountryIndex: its build time, the cost of one type-ahead
+lookup next to scanning every name with difflib, and how fast a survey's free-text
+country column is resolved.
+
+Keystrokes are every prefix of every entity name, and misspellings are names
+with two neighbouring letters swapped. The country column mixes names, ISO codes
+in lower case and misspellings; it is resolved as survey.score_chunk does it,
+factorizing the column and resolving each distinct spelling once, and for
+comparison by exact name only, as the survey scorer used to.
+
+Run from the repository root:
+    python -m benchmarks.bench_search [--rows 1000000]
+"""
+import argparse
+import difflib
+import time
+from typing import Callable, List
+import numpy as np
+import pandas as pd
+from meatmonitor import model
+from meatmonitor.model import load_countries
+from meatmonitor.search import CountryIndex
+
+
+def swap_letters(name: str, x: int) -> str:
+    """ Returns name with its letters at x and x + 1 swapped. """
+    return name[:x] + name[x + 1] + name[x] + name[x + 2:]
+
+
+def per_call_us(function: Callable[[str], object], texts: List[str]) -> float:
+    """ Returns the mean microseconds of calling function on each of texts. """
+    start = time.perf_counter()
+    for text in texts:
+        function(text)
+    return (time.perf_counter() - start) / len(texts) * 10 ** 6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10 ** 6)
+    args = parser.parse_args()
+
+    load_countries()
+    table = model.country_table
+
+    start = time.perf_counter()
+    index = CountryIndex(table.entities, table.codes)
+    print(f'index build: {(time.perf_counter() - start) * 1000:.2f} ms for '
+          f'{len(table.entities)} entities, {sum(index.is_country)} of them countries')
+
+    keystrokes = [name[:x] for name in table.entities for x in range(1, len(name) + 1)]
+    misspelled = [swap_letters(name, len(name) // 2) for name in table.entities
+                  if len(name) > 4]
+
+    def scan(text: str) -> List[str]:
+        return difflib.get_close_matches(text, table.entities, 6)
+
+    print(f'{"":34} {"index":>9} {"difflib":>9}  (us per call)')
+    print(f'{"type-ahead, every prefix":34} {per_call_us(index.search, keystrokes):9.1f} '
+          f'{per_call_us(scan, keystrokes[::20]):9.1f}')
+    print(f'{"type-ahead, misspelled names":34} {per_call_us(index.search, misspelled):9.1f} '
+          f'{per_call_us(scan, misspelled):9.1f}')
+    print(f'{"resolve, misspelled names":34} {per_call_us(index.resolve, misspelled):9.1f}')
+    resolved = sum(table.entities[index.resolve(text)] == name for text, name in
+                   zip(misspelled, [name for name in table.entities if len(name) > 4])
+                   if index.resolve(text) is not None)
+    print(f'misspelled names resolved to the right entity: {resolved} of {len(misspelled)}')
+
+    spellings = table.entities + [code.lower() for code in table.codes if code] + misspelled
+    rng = np.random.default_rng(0)
+    column = pd.Series(np.array(spellings, dtype=object)[rng.integers(0, len(spellings),
+                                                                      args.rows)])
+
+    start = time.perf_counter()
+    codes, distinct = pd.factorize(column)
+    rows = np.array(index.resolve_many(distinct) + [-1], dtype=np.intp)[codes]
+    seconds = time.perf_counter() - start
+    print(f'{args.rows:,} free-text countries, index: {seconds * 1000:.1f} ms, '
+          f'{args.rows / seconds / 10 ** 6:.1f} M rows/s, {np.mean(rows >= 0):.1%} resolved')
+
+    start = time.perf_counter()
+    exact = column.map(table.index)
+    seconds = time.perf_counter() - start
+    print(f'{args.rows:,} free-text countries, exact names only: {seconds * 1000:.1f} ms, '
+          f'{exact.notna().mean():.1%} resolved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Load tests the scoring service (meatmonitor.server) and reports latency percentiles
+and throughput.
+
+By default a server is started in a separate process on a free port, so the clients
+here do not compete with it for the GIL; pass --url to test one that is already
+running. Every client thread keeps one connection open and sends POST /score
+requests of --batch diets each, back to back, for --seconds.
+
+Run from the repository root:
+    python -m benchmarks.bench_server [--clients 8] [--batch 1] [--workers N]
+"""
+from typing import List
+from urllib.parse import urlsplit
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from meatmonitor.emissions import animal_types
+
+
+def make_body(countries: List[str], batch: int, seed: int) -> bytes:
+    """ Returns a POST /score body of batch random diets, or of one diet if batch is 1. """
+    rng = np.random.default_rng(seed)
+    diets = [{'name': f'user {x}',
+              'country': countries[rng.integers(len(countries))],
+              'servings': rng.integers(0, 16, len(animal_types)).tolist(),
+              'goals': rng.integers(0, 16, len(animal_types)).tolist()}
+             for x in range(batch)]
+    return json.dumps(diets[0] if batch == 1 else {'diets': diets}).encode()
+
+
+def client(host: str, port: int, bodies: List[bytes], stop_at: float,
+           latencies: List[float]) -> None:
+    """ Sends the bodies in turn over one connection until stop_at, recording each latency. """
+    connection = http.client.HTTPConnection(host, port)
+    headers = {'Content-Type': 'application/json'}
+    sent = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        connection.request('POST', '/score', bodies[sent % len(bodies)], headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f'server answered {response.status}')
+        latencies.append(time.perf_counter() - start)
+        sent += 1
+    connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='test a running server instead of starting one')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes of the server started here')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=1, help='diets per request')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = None
+    if args.url is None:
+        server = subprocess.Popen([sys.executable, '-m', 'meatmonitor.server', '--port', '0',
+                                   '--workers', str(args.workers), '--quiet'],
+                                  stdout=subprocess.PIPE, text=True)
+        # the server's first line is 'scoring on http://host:port with ...'
+        args.url = server.stdout.readline().split()[2]
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+
+    connection = http.client.HTTPConnection(host, port)
+    connection.request('GET', '/countries')
+    countries = json.loads(connection.getresponse().read())
+    connection.close()
+
+    bodies = [[make_body(countries, args.batch, x * 100 + y) for y in range(16)]
+              for x in range(args.clients)]
+    latencies = [[] for _ in range(args.clients)]
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(host, port, bodies[x],
+                                                     start + args.seconds, latencies[x]))
+               for x in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.terminate()
+        server.wait()
+
+    every = np.array([t for client_latencies in latencies for t in client_latencies]) * 1000
+    print(f'{len(every)} requests of {args.batch} diet(s) from {args.clients} clients '
+          f'in {elapsed:.1f} s')
+    print(f'throughput: {len(every) / elapsed:8.0f} requests/s, '
+          f'{len(every) * args.batch / elapsed:8.0f} diets/s')
+    print(f'latency:    p50 {np.percentile(every, 50):.2f} ms, '
+          f'p99 {np.percentile(every, 99):.2f} ms, max {every.max():.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
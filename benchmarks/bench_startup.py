@@ -0,0 +1,82 @@
+"""
+Reports how long main.py takes to show its first window (the splash page) and to
+become interactive (the input page is built and waiting for the user).
+
+main.py is launched through a small driver (startup_driver) that wraps its first
+page, data loader and input page to print the time each stage is reached, and
+closes the app once it is interactive, so main.py itself carries no benchmark
+hooks. A display is needed; on a headless machine run this under xvfb-run.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+root = Path(__file__).resolve().parent.parent
+
+startup_driver = """
+import sys
+import time
+sys.argv = ['main.py']
+import main
+
+def report(stage):
+    print(f'{stage} {time.time()}', flush=True)
+
+new_page, load_data, inputs = main.App.new_page, main.load_data, main.inputs
+
+def first_page(self, width, height):
+    if self.page is None:
+        self.root.after_idle(report, 'first_window')
+    return new_page(self, width, height)
+
+def reported_load_data():
+    load_data()
+    report('data_ready')
+
+def reported_inputs():
+    inputs()
+    report('interactive')
+    main.app.root.after_idle(main.app.root.destroy)
+
+main.App.new_page = first_page
+main.load_data = reported_load_data
+main.inputs = reported_inputs
+main.main()
+"""
+# runs main.py's main(), printing the time each startup stage is reached
+
+
+def launch() -> Dict[str, float]:
+    """ Runs main.py once and returns the seconds from launch to each startup stage. """
+    start = time.time()
+    output = subprocess.run([sys.executable, '-c', startup_driver], cwd=root,
+                            check=True, capture_output=True, text=True).stdout
+    stages = {}
+    for line in output.splitlines():
+        stage, _, at = line.partition(' ')
+        stages[stage] = float(at) - start
+    return stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [launch() for _ in range(args.repeat)]
+    for stage, label in [('first_window', 'time to first window'),
+                         ('data_ready', 'data loaded'),
+                         ('interactive', 'time to interactive')]:
+        times = sorted(run[stage] for run in runs)
+        print(f'{label:>22}: best {times[0] * 1000:8.1f} ms, '
+              f'median {times[len(times) // 2] * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
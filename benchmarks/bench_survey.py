@@ -0,0 +1,74 @@
+"""
+Measures the throughput and peak memory of the streaming survey scorer
+(meatmonitor.survey) on synthetic surveys of growing size.
+
+Each survey is written to a temporary directory and scored by a separate process,
+whose peak resident memory is read from the operating system; it should stay flat
+as the survey grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_survey [--rows 2000000] [--workers 0]
+"""
+from pathlib import Path
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from meatmonitor.emissions import animal_types
+from meatmonitor.loader import load_country_table
+from meatmonitor.model import default_csv_path
+from meatmonitor.survey import goal_columns
+
+
+def write_survey(path: Path, rows: int, countries, block: int = 100000) -> None:
+    """ Writes a survey of rows random diets, with goals, to the CSV at path. """
+    rng = np.random.default_rng(0)
+    with open(path, 'w') as file:
+        file.write(','.join(['name', 'country', *animal_types, *goal_columns]) + '\n')
+        for start in range(0, rows, block):
+            count = min(block, rows - start)
+            chosen = rng.integers(0, len(countries), count)
+            servings = rng.integers(0, 16, (count, 2 * len(animal_types)))
+            file.writelines(f'user {start + x},{countries[chosen[x]]},'
+                            f'{",".join(map(str, servings[x]))}\n' for x in range(count))
+
+
+def run(args) -> tuple:
+    """ Runs the scorer with the given arguments, returning seconds and peak memory in MiB. """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'meatmonitor.survey', *args])
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f'survey scorer exited with {process.returncode}')
+    # ru_maxrss is in KiB on Linux
+    return time.perf_counter() - start, usage.ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2 * 10 ** 6,
+                        help='rows in the largest survey; smaller ones are 1/16 and 1/4 of it')
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    # quoted names such as 'Bonaire Sint Eustatius and Saba' are fine, but commas are not
+    countries = [name for name in load_country_table(default_csv_path).entities if ',' not in name]
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in (args.rows // 16, args.rows // 4, args.rows):
+            survey = Path(directory) / 'survey.csv'
+            write_survey(survey, rows, countries)
+            seconds, peak = run([str(survey), '-o', str(Path(directory) / 'results.csv'),
+                                 '--chunk-size', str(args.chunk_size),
+                                 '--workers', str(args.workers)])
+            print(f'{rows:>10} rows ({survey.stat().st_size / 2 ** 20:7.1f} MiB): '
+                  f'{seconds:6.2f} s, {rows / seconds:9.0f} rows/s, '
+                  f'peak memory {peak:6.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
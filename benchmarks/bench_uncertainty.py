@@ -0,0 +1,56 @@
+"""
+Times meatmonitor.uncertainty.simulate on 10,000 samples of the emission factors and
+serving sizes over 100,000 users with goals, and the peak memory it holds, against
+the 37 GiB a samples x users x meats float64 array would take.
+
+Run from the repository root:
+    python -m benchmarks.bench_uncertainty [--samples 10000] [--users 100000]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from meatmonitor.batch import CountryBaseline
+from meatmonitor.emissions import animal_types
+from meatmonitor.loader import load_country_table
+from meatmonitor.model import default_csv_path
+from meatmonitor.uncertainty import FactorSamples, simulate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=10 ** 4)
+    parser.add_argument('--users', type=int, default=10 ** 5)
+    args = parser.parse_args()
+
+    table = load_country_table(default_csv_path)
+    baseline = CountryBaseline(table.consumption, table.entities)
+    # Countries without data would only add NaN figures
+    countries = np.flatnonzero(baseline.total_country_emissions > 0)
+    rng = np.random.default_rng(0)
+    rows = rng.choice(countries, args.users)
+    servings = rng.integers(0, 16, (args.users, len(animal_types))).astype(np.float64)
+    goals = np.maximum(servings - rng.integers(0, 4, servings.shape), 0)
+
+    start = time.perf_counter()
+    samples = FactorSamples(args.samples)
+    print(f'{args.samples:,} draws of {len(animal_types)} factors and serving sizes: '
+          f'{(time.perf_counter() - start) * 1000:.1f} ms')
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    stats = simulate(servings, rows, baseline, goals, samples)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    full = args.samples * args.users * len(animal_types) * 8
+    print(f'{args.users:,} users x {args.samples:,} samples: {seconds:.2f} s '
+          f'({args.users * args.samples / seconds / 10 ** 6:.0f} M user-samples/s), '
+          f'peak {peak / 2 ** 20:.0f} MiB against {full / 2 ** 30:.1f} GiB unchunked')
+    width = stats.total_emissions.high - stats.total_emissions.low
+    print(f'median {stats.total_emissions.level:g}% interval of total emissions: '
+          f'{np.median(width / stats.total_emissions.mean):.0%} of the mean')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Times meatmonitor.whatif: one diet against every country, against building a User
+per country as before, and a sweep of many diets against every country, in this
+process and on pools of threads and of processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_whatif [--diets 100000] [--workers 4]
+"""
+import argparse
+import time
+import numpy as np
+from meatmonitor import model
+from meatmonitor.batch import CountryBaseline
+from meatmonitor.emissions import animal_types
+from meatmonitor.whatif import compare_everywhere, sweep_diets
+
+diet = [2, 3, 5, 7, 0]
+
+
+def per_user(names) -> list:
+    """ Returns total_emissions_percentage of diet in every country, a User at a time. """
+    figures = []
+    for name in names:
+        user = model.User('Benchmark', name)
+        user.create_animal_classes(diet)
+        user.find_stats()
+        figures.append(user.total_emissions_percentage)
+    return sorted(figures)
+
+
+def best(function, repeat: int = 5) -> float:
+    """ Returns the fastest of repeat calls to function, in seconds. """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--diets', type=int, default=10 ** 5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    model.load_countries()
+    table = model.country_table
+    names = [name for name, total in zip(table.entities, CountryBaseline(
+        table.consumption, table.entities).total_country_emissions) if total > 0]
+    loop = best(lambda: per_user(names))
+    swept = best(lambda: compare_everywhere(diet))
+    print(f'one diet, {len(names)} entities: a User each {loop * 1000:.2f} ms, '
+          f'compare_everywhere {swept * 1000:.2f} ms ({loop / swept:.0f}x)')
+    every = compare_everywhere(diet, every_year=True)
+    print(f'one diet, every entity and year ({len(every):,} comparisons): '
+          f'{best(lambda: compare_everywhere(diet, every_year=True)) * 1000:.2f} ms')
+
+    servings = np.random.default_rng(0).integers(0, 16, (args.diets, len(animal_types)))
+    baseline = CountryBaseline(table.consumption, table.entities)
+    cells = args.diets * len(table.entities)
+    serial = sweep_diets(servings, baseline)
+    for label, options in [('this process', {}),
+                           (f'{args.workers} threads', {'workers': args.workers}),
+                           (f'{args.workers} processes',
+                            {'workers': args.workers, 'processes': True})]:
+        seconds = best(lambda: sweep_diets(servings, baseline, **options), 3)
+        same = np.array_equal(sweep_diets(servings, baseline, **options), serial, equal_nan=True)
+        print(f'{args.diets:,} diets x {len(table.entities)} entities, {label}: '
+              f'{seconds * 1000:.0f} ms ({cells / seconds / 10 ** 6:.0f} M comparisons/s)'
+              f'{"" if same else " DIFFERENT RESULTS"}')
+    print(f'(estimated a User each: {loop / len(names) * cells:.0f} s)')
+
+
+if __name__ == '__main__':
+    main()
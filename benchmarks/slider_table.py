@@ -0,0 +1,147 @@
+"""
+Precomputed emissions for every position of the 0 to 15 servings sliders, one
+slider per meat.
+
+Only the benchmarks use it: the app's sliders call User.change_goal, which works
+out only the meat that moved and needs no table. It is kept here as the comparison
+the slider benchmarks (bench_lookup.py and the suite) time change_goal against.
+
+A user's own emissions only depend on their servings and their country's emission
+factors, which are the shared ones unless the factor file overrides them, so one
+table of 16^n totals (n meats) serves every user of those factors: a slider
+position becomes an index into it rather than a call to User.create_goals and
+User.goal_stats. The totals are added up in the same order as User.goal_stats, so
+they are identical to it.
+
+Comparisons against a country are per country, so those tables are built the
+first time a country is asked for and kept in a cache bounded by a memory
+budget.
+
+Memory: a table is 16^n float64 totals (8 MiB for five meats) plus a 16 x n table
+of per-meat emissions; each cached country table is another 16^n float64.
+"""
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from meatmonitor.batch import emissions_per_serving_vector
+from meatmonitor.emissions import animal_types
+from meatmonitor.goals import max_servings
+
+default_memory_budget = 32 * 2 ** 20
+# bytes of country comparison tables kept before the least recently used is dropped
+
+
+class SliderTable:
+    """
+    The weekly CO2 emissions of every combination of slider positions, given the
+    emissions of a serving of each meat (the shared factors by default).
+
+    Attributes:
+        - per_meat: the emissions of 0 to max_servings servings of each meat, shape
+        (max_servings + 1, len(animal_types))
+        - totals: the total emissions of every combination, indexed by index_of(servings)
+        - scalar_totals: a memoryview of totals, which returns plain floats when indexed
+        and so avoids numpy's per-element overhead on the single lookups a slider makes
+        - memory_budget: the most bytes of country tables kept in the cache
+        - country_tables: the cached country comparison tables, least recently used first
+
+    Representation Invariants:
+        - len(self.totals) == (max_servings + 1) ** len(animal_types)
+    """
+    per_meat: np.ndarray
+    totals: np.ndarray
+    scalar_totals: memoryview
+    memory_budget: int
+    country_tables: OrderedDict
+
+    def __init__(self, memory_budget: int = default_memory_budget,
+                 per_serving: Optional[np.ndarray] = None) -> None:
+        if per_serving is None:
+            per_serving = emissions_per_serving_vector
+        steps = np.arange(max_servings + 1, dtype=np.float64)
+        self.per_meat = steps[:, None] * per_serving
+        totals = self.per_meat[:, 0]
+        for x in range(1, len(animal_types)):
+            totals = totals[..., None] + self.per_meat[:, x]
+        self.totals = totals.reshape(-1)
+        # Adding one meat at a time over an outer grid keeps sum_columns' left to right
+        # order without materializing every combination of servings first
+        self.scalar_totals = memoryview(self.totals)
+        self.memory_budget = memory_budget
+        self.country_tables = OrderedDict()
+
+    @property
+    def nbytes(self) -> int:
+        """ The memory held by this table, including the cached country tables. """
+        return self.per_meat.nbytes + self.totals.nbytes + \
+            sum(table.nbytes for table in self.country_tables.values())
+
+    @staticmethod
+    def index_of(servings: List[float]) -> int:
+        """ Returns the position of the given slider values in totals.
+
+        Preconditions:
+            - len(servings) == len(animal_types)
+            - all servings are whole numbers from 0 to max_servings
+
+        >>> SliderTable.index_of([0, 0, 0, 1, 2])
+        18
+        """
+        position = 0
+        for value in servings:
+            position = position * (max_servings + 1) + int(value)
+        return position
+
+    def total(self, servings: List[float]) -> float:
+        """ Returns the weekly emissions of the given servings, equal to the
+        new_total_emissions User.goal_stats would compute for them.
+
+        >>> SliderTable().total([2, 3, 5, 7, 0])
+        50955.75
+        """
+        return self.scalar_totals[self.index_of(servings)]
+
+    def breakdown(self, servings: List[float]) -> List[float]:
+        """ Returns the weekly emissions of each meat for the given servings. """
+        return [float(self.per_meat[int(value), x]) for x, value in enumerate(servings)]
+
+    def reduction_percentage(self, baseline_total: float, servings: List[float]) -> float:
+        """ Returns the emission_reduction_percentage User.goal_stats would compute for the
+        given servings, for a user whose total_emissions is baseline_total.
+
+        >>> SliderTable().reduction_percentage(50955.75, [0, 3, 5, 7, 0])
+        33.288883001427706
+        """
+        return self.goal(baseline_total, servings)[1]
+
+    def goal(self, baseline_total: float, servings: List[float]) -> Tuple[float, float]:
+        """ Returns the new_total_emissions and emission_reduction_percentage
+        User.goal_stats would compute for the given servings, with a single lookup.
+        """
+        new_total = self.scalar_totals[self.index_of(servings)]
+        if baseline_total == 0:
+            return new_total, 0
+        return new_total, 100 * (baseline_total - new_total) / baseline_total
+
+    def country_table(self, name: str, total_country_emissions: float) -> np.ndarray:
+        """ Returns the total_emissions_percentage of every combination against a country
+        whose average person emits total_country_emissions, building it on first use.
+        """
+        if name in self.country_tables:
+            self.country_tables.move_to_end(name)
+            return self.country_tables[name]
+
+        table = 100 * (self.totals - total_country_emissions) / total_country_emissions
+        self.country_tables[name] = table
+        cached = sum(table.nbytes for table in self.country_tables.values())
+        while len(self.country_tables) > 1 and cached > self.memory_budget:
+            cached -= self.country_tables.popitem(last=False)[1].nbytes
+        return table
+
+    def country_percentage(self, name: str, total_country_emissions: float,
+                           servings: List[float]) -> float:
+        """ Returns the total_emissions_percentage User.find_stats would compute for the
+        given servings in the named country.
+        """
+        return float(self.country_table(name, total_country_emissions)[self.index_of(servings)])
+
@@ -0,0 +1,400 @@
+"""
+Times every hot path of Meat Monitor and checks the timings against a saved baseline,
+failing if any of them got slower by more than a threshold.
+
+Each case sets up its inputs once and then times one call of the path: loading the
+FAO CSV (cold, with no cache, and from the cache) and filling model.countries, a
+User's stats and goals (all at once and one slider at a time), loading the logo,
+drawing the chart, and the batch paths (score_batch, Scorer, Cohort, the survey,
+the slider table, the goal solver, the scenario simulator and the uncertainty
+mode). After one warm-up call, a call is repeated until it has run for at least
+0.2 s, and the fastest of --repeat such runs is kept, as timeit does.
+
+The results are written as JSON (--output). Given a baseline from an earlier run
+(--baseline, benchmarks/baseline.json by default), every case is compared with it
+and the exit status is 1 if any case is more than --threshold percent slower.
+Timings are only comparable on the same machine, so the baseline is not part of
+the repository: save one with --save-baseline before making a change, then run
+the suite again after it.
+
+Everything runs headless: the chart is drawn with matplotlib's Agg backend onto
+an image, the logo is loaded as a PIL image, and Tk is never imported. The FAO
+CSV and the logo are copied to a temporary directory, so the caches next to them
+in assets/ are left alone.
+
+Run from the repository root:
+    python -m benchmarks.suite [--save-baseline] [--baseline PATH] [--output PATH]
+        [--threshold 25] [--repeat 5] [--only CASE ...] [--list]
+"""
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import itertools
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+import pandas as pd
+from meatmonitor import model
+from meatmonitor.assets import ImageCache, assets_dir
+from meatmonitor.batch import CountryBaseline, score_batch
+from meatmonitor.charts import EmissionChart
+from meatmonitor.cohort import Cohort
+from meatmonitor.emissions import animal_types, emissions_per_serving_for
+from meatmonitor.goals import solve_goal, solve_goals
+from meatmonitor.loader import load_fao_table
+from meatmonitor.scenarios import DietShift, simulate_shifts
+from meatmonitor.scoring import Scorer
+from meatmonitor.uncertainty import FactorSamples, simulate
+from benchmarks.slider_table import SliderTable
+
+root = Path(__file__).resolve().parent.parent
+default_baseline = root / 'benchmarks' / 'baseline.json'
+# where --save-baseline writes and comparisons read, unless --baseline is given
+
+default_threshold = 25.0
+# percent slower than the baseline a case may get before the suite fails
+
+minimum_run = 0.2
+# seconds each timed run lasts at least; fast calls are repeated to fill it
+
+users = 10 ** 5
+# diets in the batch cases
+
+servings = [2, 3, 5, 7, 0]
+goals = [0, 3, 5, 7, 0]
+# the diet of the single-user cases, as the input and results pages would send it
+
+cases = {}
+# case name -> function that sets it up and returns the call to time
+
+
+def case(function: Callable[[Path], Callable[[], object]]) -> Callable:
+    """ Registers function, which is given the temporary directory holding the copied
+    assets, as the case named after it.
+    """
+    cases[function.__name__] = function
+    return function
+
+
+def random_diets(count: int, table) -> tuple:
+    """ Returns count random servings, goals no higher than them and countries with data. """
+    rng = np.random.default_rng(0)
+    present = np.flatnonzero(CountryBaseline(table.consumption, table.entities)
+                             .total_country_emissions > 0)
+    diets = rng.integers(0, 16, (count, len(animal_types))).astype(np.float64)
+    cut = np.maximum(diets - rng.integers(0, 4, diets.shape), 0)
+    return diets, cut, rng.choice(present, count)
+
+
+@case
+def load_csv(directory: Path) -> Callable[[], object]:
+    """ Parses the FAO CSV with pandas, as the first launch does. """
+    return lambda: load_fao_table(directory / 'percapita.csv', use_cache=False)
+
+
+@case
+def load_cached(directory: Path) -> Callable[[], object]:
+    """ Maps the cached arrays of the FAO table, as every later launch does. """
+    load_fao_table(directory / 'percapita.csv')
+    return lambda: load_fao_table(directory / 'percapita.csv')
+
+
+@case
+def load_countries(directory: Path) -> Callable[[], object]:
+    """ Fills model.countries, trends and region table included, from the cache. """
+    load_fao_table(directory / 'percapita.csv')
+    return lambda: model.load_countries(directory / 'percapita.csv')
+
+
+@case
+def user_stats(directory: Path) -> Callable[[], object]:
+    """ What pressing Next on the input page computes. """
+    def run() -> None:
+        user = model.User('Benchmark', 'Canada')
+        user.create_animal_classes(servings)
+        user.find_stats()
+    return run
+
+
+@case
+def user_goal_stats(directory: Path) -> Callable[[], object]:
+    """ What pressing Adjust on the results page computes. """
+    user = model.User('Benchmark', 'Canada')
+    user.create_animal_classes(servings)
+    user.find_stats()
+
+    def run() -> None:
+        user.create_goals(goals)
+        user.goal_stats()
+    return run
+
+
+@case
+def user_goal_change(directory: Path) -> Callable[[], object]:
+    """ What moving one slider on the results page computes. """
+    user = model.User('Benchmark', 'Canada')
+    user.create_animal_classes(servings)
+    user.find_stats()
+    user.create_goals(goals)
+    user.goal_stats()
+    positions = itertools.cycle(range(16))
+    return lambda: user.change_goal('Beef', next(positions))
+
+
+@case
+def logo_resize(directory: Path) -> Callable[[], object]:
+    """ Decodes and resamples the original logo, as the very first launch does. """
+    return lambda: ImageCache(directory, use_disk_cache=False).image('splash3.png', (300, 150))
+
+
+@case
+def logo_cached(directory: Path) -> Callable[[], object]:
+    """ Loads the logo from its resized copy on disk, as a launch does. """
+    ImageCache(directory).image('splash3.png', (300, 150))
+    return lambda: ImageCache(directory).image('splash3.png', (300, 150))
+
+
+@case
+def chart_draw(directory: Path) -> Callable[[], object]:
+    """ Draws the chart from scratch, alternating between two diets so none is reused. """
+    chart = EmissionChart()
+    diets = [[2.0, 3.0, 5.0, 7.0, 0.0], [3.0, 2.0, 5.0, 7.0, 0.0]]
+    calls = iter(range(10 ** 9))
+    return lambda: chart.render(diets[next(calls) % 2], [1.0] * len(animal_types))
+
+
+@case
+def chart_adjust(directory: Path) -> Callable[[], object]:
+    """ Redraws the chart after Adjust, when only the updated bars change. """
+    chart = EmissionChart()
+    diets = [[2.0, 3.0, 5.0, 7.0, 0.0], [0.0, 3.0, 5.0, 7.0, 0.0]]
+    calls = iter(range(10 ** 9))
+    return lambda: chart.render(servings, [1.0] * len(animal_types), diets[next(calls) % 2])
+
+
+@case
+def batch_score(directory: Path) -> Callable[[], object]:
+    """ Scores the batch of diets with score_batch. """
+    table = model.country_table
+    baseline = CountryBaseline(table.consumption, table.entities)
+    diets, _, rows = random_diets(users, table)
+    return lambda: score_batch(diets, rows, baseline).total_emissions_percentage
+
+
+@case
+def scorer(directory: Path) -> Callable[[], object]:
+    """ Scores 1,000 JSON diets with goals, as a request to the scoring server would. """
+    table = model.country_table
+    diets, cut, rows = random_diets(1000, table)
+    requests = [{'country': table.entities[row], 'servings': diet.tolist(),
+                 'goals': goal.tolist()} for diet, goal, row in zip(diets, cut, rows)]
+    scoring = Scorer(table)
+    return lambda: scoring.score(requests)
+
+
+@case
+def cohort(directory: Path) -> Callable[[], object]:
+    """ Finds the stats and goal stats of a cohort of the batch of diets. """
+    table = model.country_table
+    diets, cut, rows = random_diets(users, table)
+    locations = [table.entities[row] for row in rows]
+    names = [f'user {x}' for x in range(users)]
+    baseline = CountryBaseline(table.consumption, table.entities)
+
+    def run() -> None:
+        group = Cohort(names, locations, diets, baseline)
+        group.find_stats()
+        group.create_goals(cut)
+        group.goal_stats()
+    return run
+
+
+@case
+def survey_chunk(directory: Path) -> Callable[[], object]:
+    """ Scores a chunk of the batch of diets read from a survey file. """
+    from meatmonitor import survey
+    table = model.country_table
+    diets, cut, rows = random_diets(users, table)
+    frame = pd.DataFrame({'name': 'user', 'country': np.array(table.entities)[rows]})
+    for x, animal in enumerate(animal_types):
+        frame[animal] = diets[:, x]
+        frame[f'goal_{animal}'] = cut[:, x]
+    survey.load_table(directory / 'percapita.csv')
+    return lambda: survey.score_chunk(frame)
+
+
+def canada_per_serving() -> np.ndarray:
+    """ Returns the emissions of a serving of each meat in Canada, in animal_types order. """
+    per_serving = emissions_per_serving_for('Canada')
+    return np.array([per_serving[animal] for animal in animal_types])
+
+
+@case
+def slider_table(directory: Path) -> Callable[[], object]:
+    """ Builds the slider table of one country's factors. """
+    per_serving = canada_per_serving()
+    return lambda: SliderTable(per_serving=per_serving)
+
+
+@case
+def slider_lookup(directory: Path) -> Callable[[], object]:
+    """ Looks up a slider position in the table. """
+    table = SliderTable(per_serving=canada_per_serving())
+    total = table.total(servings)
+    return lambda: table.goal(total, goals)
+
+
+@case
+def goal_solve(directory: Path) -> Callable[[], object]:
+    """ Suggests the goal of one user, as the results page does. """
+    per_serving = canada_per_serving()
+    return lambda: solve_goal(servings, per_serving=per_serving)
+
+
+@case
+def goal_solve_batch(directory: Path) -> Callable[[], object]:
+    """ Suggests the goals of 10,000 diets at once. """
+    diets, _, _ = random_diets(10 ** 4, model.country_table)
+    return lambda: solve_goals(diets)
+
+
+@case
+def scenarios(directory: Path) -> Callable[[], object]:
+    """ Applies 256 diet shifts to every entity and year of the FAO table. """
+    fractions = np.linspace(0, 1, 16)
+    shifts = [DietShift(cut={'Other': cut}, swap={('Beef', 'Poultry'): swap})
+              for swap in fractions for cut in fractions]
+    return lambda: simulate_shifts(model.fao_table, shifts)
+
+
+@case
+def uncertainty(directory: Path) -> Callable[[], object]:
+    """ Puts 1,000 sample intervals around the figures of 10,000 diets with goals. """
+    table = model.country_table
+    baseline = CountryBaseline(table.consumption, table.entities)
+    diets, cut, rows = random_diets(10 ** 4, table)
+    samples = FactorSamples(1000)
+    return lambda: simulate(diets, rows, baseline, cut, samples)
+
+
+def measure(call: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """ Returns the fastest and median time of one call, in seconds, over repeat runs of at
+    least minimum_run seconds each.
+
+    call is run once before the number of loops is worked out, so a slow first call (a
+    cache being filled, a module imported) does not leave a fast path timed one call at
+    a time.
+    """
+    call()
+    timer = timeit.Timer(call)
+    loops = 1
+    while True:
+        if timer.timeit(loops) >= minimum_run:
+            break
+        loops *= 2 if loops < 1000 else 10
+    times = [run / loops for run in timer.repeat(repeat, loops)]
+    return {'best': min(times), 'median': float(np.median(times)), 'loops': loops}
+
+
+def run_cases(names: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """ Times the named cases and returns their timings, printing each as it finishes. """
+    results = {}
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = Path(temporary)
+        shutil.copy(assets_dir / 'percapita.csv', directory)
+        shutil.copy(assets_dir / 'splash3.png', directory)
+        model.load_countries(directory / 'percapita.csv')
+        for name in names:
+            results[name] = measure(cases[name](directory), repeat)
+            print(f'{name:>18}: {format_time(results[name]["best"]):>10} '
+                  f'(median {format_time(results[name]["median"])}, '
+                  f'{results[name]["loops"]} loops)', flush=True)
+    return results
+
+
+def format_time(seconds: float) -> str:
+    """ Returns seconds in the unit that suits it best. """
+    for unit, scale in [('s', 1), ('ms', 10 ** -3), ('us', 10 ** -6)]:
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 10 ** -9:.0f} ns'
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """ Prints every case against its baseline and returns the names of those more than
+    threshold percent slower.
+
+    >>> compare({'a': {'best': 0.013}, 'b': {'best': 0.002}, 'c': {'best': 1.0}},
+    ...         {'a': {'best': 0.010}, 'b': {'best': 0.004}}, 25.0)
+                     a:   10.00 ms ->   13.00 ms    +30.0%  REGRESSED
+                     b:    4.00 ms ->    2.00 ms    -50.0%
+                     c:  (no baseline)  1.00 s
+    ['a']
+    """
+    regressed = []
+    for name, timing in results.items():
+        if name not in baseline:
+            print(f'{name:>18}:  (no baseline)  {format_time(timing["best"])}')
+            continue
+        before = baseline[name]['best']
+        change = 100 * (timing['best'] - before) / before
+        flag = '  REGRESSED' if change > threshold else ''
+        print(f'{name:>18}: {format_time(before):>10} -> {format_time(timing["best"]):>10} '
+              f'{change:+8.1f}%{flag}')
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--baseline', type=Path, default=default_baseline)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results to --baseline instead of comparing with it')
+    parser.add_argument('--output', type=Path, help='also write the results to this file')
+    parser.add_argument('--threshold', type=float, default=default_threshold,
+                        help='percent slower than the baseline that fails a case')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=sorted(cases), metavar='CASE')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, function in cases.items():
+            print(f'{name:>18}: {function.__doc__.strip()}')
+        return
+
+    names = args.only or list(cases)
+    results = {'python': platform.python_version(), 'machine': platform.machine(),
+               'processor': platform.processor(), 'numpy': np.__version__,
+               'pandas': pd.__version__, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'repeat': args.repeat, 'cases': run_cases(names, args.repeat)}
+    for path in [args.output, args.baseline if args.save_baseline else None]:
+        if path is not None:
+            path.write_text(json.dumps(results, indent=2) + '\n')
+            print(f'results written to {path}')
+    if args.save_baseline:
+        return
+    if not args.baseline.exists():
+        print(f'no baseline at {args.baseline}; save one with --save-baseline')
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    print(f'\nagainst {args.baseline} (Python {baseline["python"]}, {baseline["created"]}), '
+          f'threshold {args.threshold:g}%:')
+    regressed = compare(results['cases'], baseline['cases'], args.threshold)
+    if regressed:
+        print(f'{len(regressed)} of {len(results["cases"])} cases regressed: '
+              f'{", ".join(regressed)}')
+        sys.exit(1)
+    print(f'no regressions in {len(results["cases"])} cases')
+
+
+if __name__ == '__main__':
+    main()
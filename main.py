@@ -1,342 +1,230 @@
-# ImageTk and Image allow us to use custom images in tkinter windows
-from typing import Dict, List
+from concurrent.futures import Future
+from typing import List, Optional
 from tkinter import *
-import sys
-import os
-from PIL import ImageTk, Image
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+from tkinter import messagebox
+import argparse
+import threading
+import time
 from pathlib import Path
+from meatmonitor.assets import image_cache
+from meatmonitor.charts import chart_renderer
+from meatmonitor import instrument, model
+from meatmonitor.emissions import animal_types, meat_labels, serving_size_per_animal
+from meatmonitor.instrument import timed
+from meatmonitor.model import User
+from meatmonitor.search import country_index
+
+# numpy, pandas and matplotlib are slow to import, so they are only imported
+# once they are needed: the data loader runs on a background thread while the
+# splash page is up, and matplotlib is imported on the chart thread once the
+# results page is shown
+launch_time = time.time()
 
 cwd = Path.cwd()
 
-weeks_in_a_year = 52
-grams_in_a_kilo = 1000
-kg_per_year_to_g_per_week = grams_in_a_kilo / weeks_in_a_year
+splash_min_seconds = 2.0
+# the splash page stays up at least this long, even if the data loads sooner
 
-animal_types = ['Beef', 'Poultry', 'Pork', 'Lamb']
+load_errors = []
 
-emissions_per_animal = {'Beef': 498.9,
-                        'Poultry': 57.0,
-                        'Pork': 76.1,
-                        'Lamb': 198.5,
-                        }
-# grams of CO2 emissions per gram of protein
 
-serving_size_per_animal = {'Beef': 85,
-                           'Poultry': 85,
-                           'Pork': 100,
-                           'Lamb': 100,
-                           }
-# average meal is 3 to 3.5 ounces,
-# which equates to these values in grams per meat
-
-emissions_per_serving_of_animal = {x: emissions_per_animal[x] * serving_size_per_animal[x]
-                                   for x in emissions_per_animal}
-
-
-class Country:
+def load_data() -> None:
+    """ Reads the FAO table and fills countries. Runs on a background thread during the splash,
+    so it must not touch any Tk widgets.
     """
-    The country the user is located in.
+    try:
+        model.load_countries(f'{cwd}/assets/percapita.csv')
+    except Exception as error:
+        load_errors.append(error)
+        return
 
-    Attributes:
-        - name: name of the country
-        - average_consumption: the average meat consumption per year per person
-        by meat type in this country
+    from meatmonitor.goals import prepare_goals
 
-    Representation Invariants:
-        - name in proper_country_data
+    prepare_goals()
+    # Suggest's first goal would otherwise wait most of a second for the changes to try
 
-    Sample Usage:
-    >>> Canada = Country('Canada', {'Beef' :18, 'Pork':24, 'Lamb': 1, 'Poultry': 39})
-    """
-    name: str
-    average_consumption: Dict[str, int]
-
-    def __init__(self, name, average_consumption) -> None:
-        self.name = name
-        self.average_consumption = average_consumption
-    # The following is generic class init, as seen in lecture
-
-
-country_data = pd.read_csv(
-    f'{cwd}/assets/percapita.csv')
-proper_country_data = {
-    country_data.loc[x, 'Entity']: [country_data.loc
-                                    [x, 'Bovine meat food supply quantity '
-                                        '(kg/capita/yr) (FAO, 2020)'],
-                                    country_data.loc
-                                    [x, 'Poultry meat food supply quantity '
-                                        '(kg/capita/yr) (FAO, 2020)'],
-                                    country_data.loc
-                                    [x, 'Pigmeat food supply quantity '
-                                        '(kg/capita/yr) (FAO, 2020)'],
-                                    country_data.loc
-                                    [x, 'Mutton & Goat meat food supply quantity '
-                                        '(kg/capita/yr) (FAO, 2020)']]
-    for x in range(2, 11025) if country_data.loc
-                                [x, 'Year'] > country_data.loc[x + 1, 'Year']}
-
-countries = {}
-for country in proper_country_data:
-    countries[country] = Country(country, {'Beef': proper_country_data[country][0] *
-                                                   kg_per_year_to_g_per_week,
-                                           'Pork': proper_country_data[country][2] *
-                                                   kg_per_year_to_g_per_week,
-                                           'Lamb': proper_country_data[country][3] *
-                                                   kg_per_year_to_g_per_week,
-                                           'Poultry': proper_country_data[country][1] *
-                                                      kg_per_year_to_g_per_week})
-
-
-# countries is in grams of animal eaten per week, once adjusted
-
-
-class Animal:
+
+class App:
     """
-    A type of meat the user eats weekly.
+    The app's only window. Each page is a frame shown in it in turn, so moving to another
+    page, or restarting, swaps a frame instead of destroying the window and creating a new
+    Tk root, and the loaded data stays in memory the whole time.
 
     Attributes:
-        - name: the name of the type of meat
-        - location: the country the user resides in
-        - weekly_consumption: servings of this meat user consumes per week
-        - country_emissions: Average C02 emissions produced from consumption of
-        this animal in this country in grams per week
-        - consumption_difference: the difference between the user's meat consumption and the
-        average person's meat consumption in the user's country in this particular meat type
-        - consumption_comparison: the percentage difference between the user's meat
-        consumption and the average person's meat consumption in the user's country in
-        this particular meat type
-        - weekly_emissions: the user's weekly emissions from consuming this particular meat type
-        - new_consumption: the consumer's new weekly consumption of this meat type
-        - new_emissions: the CO2 emissions of the consumer's new weekly consumption of this
-        meat type
-        - emission_reduction: the amount of CO2 emissions reduced between the original and new
-        consumer's weekly consumption of this meat type
-        - emission_reduction_percentage: the percentage of CO2 emissions reduced between the
-        orginal and new consumer's weekly consumption of this meat type
-
-    Sample Usage:
-    >>> Beef = Animal('Beef', 'Canada', 15.0)
-    >>> Beef.find_stats
-    >>> Beef.weekly_emissions
-    7483.5
-    >>> Beef.consumption_difference
-    3.0
+        - root: the Tk root of the whole app
+        - page: the frame of the page being shown, or None before the first one
+        - user: the user whose results are shown, or None until the input page is submitted
     """
-    name: str
-    location: Country
-    weekly_consumption: float
-    country_emissions: float
-
-    consumption_difference: float
-    consumption_comparison: float
-    weekly_emissions: float
-
-    new_consumption: float
-    new_emissions: float
-    emission_reduction: float
-    emission_reduction_percentage: float
-
-    def __init__(self, name, location, weekly_consumption) -> None:
+    root: Tk
+    page: Optional[Frame]
+    user: Optional[User]
+
+    @timed('tk setup')
+    def __init__(self) -> None:
+        self.root = Tk()
+        self.root.title('Meat Monitor')
+        root_x = int((self.root.winfo_screenwidth() / 2) - (800 / 2))
+        root_y = int((self.root.winfo_screenheight() / 2) - (600 / 2))
+        self.root.geometry(f'{800}x{600}+{root_x}+{root_y}')
+        self.root.configure(background='lavender')
+        # Sets up a window that exists at the center of the user's screen regardless of resolution
+        self.page = None
+        self.user = None
+
+    def new_page(self, width: int, height: int) -> Frame:
+        """ Replaces the page being shown with a new, empty frame of the given size. """
+        if self.page is not None:
+            self.page.destroy()
+        self.page = Frame(master=self.root, width=width, height=height, background='lavender')
+        self.page.pack()
+        return self.page
+
+    def restart(self) -> None:
+        """ Takes the user back to the input page. Only the user's answers are forgotten;
+        the country data is not loaded again.
         """
-        Initialize a new meat type that the user consumes with a given name, the user's country,
-        and its yearly consumption of that meat.
+        self.user = None
+        inputs()
 
-        Preconditions:
-            - name in emissions_per_animal
-        """
-        self.name = name
-        self.location = location
-        self.weekly_consumption = weekly_consumption
-        self.country_emissions = emissions_per_animal[self.name] * \
-                                 self.location.average_consumption[self.name]
 
-    def find_stats(self) -> None:
-        """
-        Computes the weekly_emissions, consumption_difference, and consumption_comparison
-        of the given Animal Object.
-        """
-        self.weekly_emissions = self.weekly_consumption * \
-                                emissions_per_serving_of_animal[self.name]
-        self.consumption_difference = self.weekly_consumption - \
-                                      self.location.average_consumption[self.name]
-        self.consumption_comparison = 100 * self.consumption_difference / \
-                                      self.location.average_consumption[self.name]
-
-    def consumption_goals(self, new_consumption) -> None:
-        """
-        Computes the new_emissions, emission_reduction, and emission_reduction_percentage
-        of the given Animal Object.
-        """
-        self.new_consumption = new_consumption
-        self.new_emissions = new_consumption * emissions_per_serving_of_animal[self.name]
-        self.emission_reduction = self.weekly_emissions - self.new_emissions
-        if self.weekly_emissions != 0:
-            self.emission_reduction_percentage = 100 * self.emission_reduction / \
-                                                 self.weekly_emissions
-        else:
-            self.emission_reduction_percentage = 0
+suggestions_shown = 6
+# the most countries suggested under the country box at once
 
 
-class User:
+class CountryEntry(Entry):
     """
-    A consumer of Meat Monitor.
+    A text box for the user's country that suggests countries as they type, in a list
+    over the page just above it. Clicking a suggestion, or picking one with the Up and
+    Down keys and Return, fills it in. A name, ISO code or close misspelling can also
+    just be typed out.
 
     Attributes:
-        - name: name of the user
-        - location: the country the user is located in
-        - animal_list: the type of meats that the user eats on a weekly basis
-        - total_emissions: the total CO2 emissions emitted to produce the user's meat consumption
-        - total_country_emissions: the total CO2 emissions emitted to produce the average
-        person's meat consumption in the user's country
-        - total_emissions_comparison: the difference between the user's CO2 emissions from
-        meat consumption and the average person's CO2 emissions from meat consumption in the
-        user's country
-        - total_emissions_percentage: the percentage difference between the user's CO2 emissions
-        from meat consumption and the average person's CO2 emissions from meat consumption in
-        the user's country
-        - new_total_emissions: the total CO2 emissions in the user's goal meat consumption
-        - emission_reduction: the CO2 emissions reduced in the user's goal meat consumption
-        compared to his or her original meat consumption.
-        - emission_reduction_percentage: the percentage of total CO2 emissions reduced in the
-        user's goal meat consumption compared to his or her original meat consumption.
-
-    Sample Usage:
-    >>> Jeremy = User('Jeremy', 'Canada')
-    >>> Jeremy.create_animal_classes([2, 3, 5, 7])
-    >>> Jeremy.find_stats()
-    >>> Jeremy.total_emissions
-    240808.0
-
+        - suggestions: the list of suggested countries, only shown while there are any
     """
-    name: str
-    location: Country
-    animal_list: Dict[str, Animal]
-    total_emissions: float
-    total_country_emissions: float
-    total_emissions_comparison: float
-    total_emissions_percentage: float
-    total_emissions_list: List[float]
-    total_country_emissions_list: List[float]
-
-    new_total_emissions: float
-    new_total_emissions_list: List[float]
-    emission_reduction: float
-    emission_reduction_percentage: float
-
-    def __init__(self, name, location) -> None:
+    suggestions: Listbox
+
+    def __init__(self, master: Widget, **options) -> None:
+        super().__init__(master, **options)
+        self.suggestions = Listbox(master, height=suggestions_shown, width=30, fg='purple',
+                                   exportselection=False)
+        self.bind('<KeyRelease>', self.suggest)
+        self.bind('<Down>', self.move_selection)
+        self.bind('<Up>', self.move_selection)
+        self.bind('<Return>', self.choose)
+        self.bind('<Escape>', lambda event: self.suggestions.place_forget())
+        self.suggestions.bind('<ButtonRelease-1>', self.choose)
+
+    def suggest(self, event: Optional[Event] = None) -> None:
+        """ Lists the countries matching what has been typed so far, countries before
+        regions, or hides the list if none do.
         """
-        Initialize a new user with a given name and country.
+        if event is not None and event.keysym in ('Up', 'Down', 'Return', 'Escape'):
+            return
+        self.configure(fg='purple')
+        names = country_index().search(self.get(), suggestions_shown)
+        self.suggestions.delete(0, END)
+        self.suggestions.insert(END, *names)
+        if names and names != [self.get()]:
+            self.suggestions.configure(height=len(names))
+            self.suggestions.place(in_=self, x=0, y=0, anchor='sw')
+            self.suggestions.lift()
+        else:
+            self.suggestions.place_forget()
+
+    def move_selection(self, event: Event) -> None:
+        """ Selects the suggestion above or below the one selected. """
+        if not self.suggestions.size():
+            return
+        selection = self.suggestions.curselection()
+        step = 1 if event.keysym == 'Down' else -1
+        x = (selection[0] + step) % self.suggestions.size() if selection else 0
+        self.suggestions.selection_clear(0, END)
+        self.suggestions.selection_set(x)
+        self.suggestions.see(x)
+
+    def choose(self, event: Optional[Event] = None) -> None:
+        """ Fills in the selected suggestion and hides the list. """
+        selection = self.suggestions.curselection()
+        if selection:
+            self.delete(0, END)
+            self.insert(0, self.suggestions.get(selection[0]))
+        self.suggestions.place_forget()
+        self.focus_set()
+        self.icursor(END)
+
+    def country(self) -> Optional[str]:
+        """ Returns the name of the country typed in, or None if it names none clearly. """
+        return country_index().entity(country_index().resolve(self.get()))
 
-        Preconditions:
-            - location in countries
-        """
-        self.name = name
-        self.location = countries[location]
-        self.animal_list = {}
 
-    def create_animal_classes(self, servings: [float]) -> None:
-        """
-        Fills animal_list with meat consumption values for each animal key.
-        """
-        for x in range(0, len(animal_types)):
-            self.animal_list[animal_types[x]] = Animal(animal_types[x], self.location, servings[x])
+# This is the function that is triggered after the loading screen/slash page expires
+# It creates a new window where the user inputs their information
 
-    def create_goals(self, servings: [float]) -> None:
-        """
-        Creates second list with new meat consumption goals for each animal.
-        """
-        for x in range(0, len(self.animal_list)):
-            self.animal_list[animal_types[x]].consumption_goals(servings[x])
 
-    def find_stats(self) -> None:
-        """
-        Computes total_emissions, total_country_emissions, total_emissions_comparison,
-        and total_emissions_percentage.
-        """
-        for animal in self.animal_list:
-            self.animal_list[animal].find_stats()
+def listed(items: List[str]) -> str:
+    """ Returns items as a sentence would list them, e.g. 'a, b and c'. """
+    if not items:
+        return 'no meat'
+    if len(items) == 1:
+        return items[0]
+    return ', '.join(items[:-1]) + ' and ' + items[-1]
 
-        self.total_emissions = sum([self.animal_list[animal].weekly_emissions \
-                                    for animal in self.animal_list])
-        self.total_country_emissions = sum([self.animal_list[animal].country_emissions \
-                                            for animal in self.animal_list])
 
-        self.total_emissions_comparison = self.total_emissions - \
-                                          self.total_country_emissions
-        self.total_emissions_percentage = 100 * self.total_emissions_comparison / \
-                                          self.total_country_emissions
+def world_impact(user: User) -> str:
+    """ Returns what the world's meat emissions would do if its average person changed
+    their diet in the same proportions as the user's goals (see meatmonitor.scenarios).
+    Meats the user does not eat now are left as they are.
+    """
+    from meatmonitor.scenarios import DietShift, simulate_shifts
 
-    def goal_stats(self) -> None:
-        """
-        Computes new_total_emissions, emission_reduction, and emission_reduction_percentage.
-        """
-        self.new_total_emissions = sum([self.animal_list[animal].new_emissions \
-                                        for animal in self.animal_list])
-        self.emission_reduction = self.total_emissions - self.new_total_emissions
-        if self.total_emissions != 0:
-            self.emission_reduction_percentage = 100 * self.emission_reduction / \
-                                                 self.total_emissions
-        else:
-            self.emission_reduction_percentage = 0
+    cut = {animal: 1 - x.new_consumption / x.weekly_consumption
+           for animal, x in user.animal_list.items() if x.weekly_consumption}
+    result = simulate_shifts(model.fao_table, [DietShift(cut=cut)])
+    year, _, percentage = result.latest('World')
+    return f'If everyone in the world made this change: {percentage:+.0f}% CO2 ({year} diets)'
 
 
-# This is the function that is triggered after the loading screen/slash page expires
-# It creates a new window where the user inputs their information
+def week_tracked(user: User) -> str:
+    """ Records the user's diet and goals as this week's in their history (see
+    meatmonitor.history), replacing any recorded for this week under the same name, and
+    returns how their weeks add up, or why they could not be recorded.
+    """
+    import sqlite3
+    from meatmonitor.history import default_history_path, history_store
 
+    try:
+        store = history_store()
+        store.add_user(user)
+        summary = store.summary(user.name)
+    except (OSError, sqlite3.Error, ValueError) as error:
+        return f'Your week could not be saved to {default_history_path}: {error}'
+    return (f'Week {summary.weeks} tracked: {summary.average_4 / 1000:.0f} kg of CO2 a week '
+            f'over the last 4, {summary.streak} in a row below your country\'s average')
 
+
+@timed('input page')
 def inputs() -> None:
     """ Creates and initializes the page where user inputs their information.
     Preconditions:
                 - len(e_name.get()) < 11
                 - (e_name.get()) != ''
-                - (e_country.get()) != ''
     """
-    global root
-    splash_root.destroy()
-    # Creates a new global window whose information can subsequently be accessed by other windows
-    # Destroys the opening page window
-
-    root = Tk()
-    root.title('Meat Monitor')
-    root_x = int((root.winfo_screenwidth() / 2) - (800 / 2))
-    root_y = int((root.winfo_screenheight() / 2) - (600 / 2))
-    root.geometry(f'{800}x{600}+{root_x}+{root_y}')
-    root.configure(background='lavender')
-    # Sets up a new window that exists at the center of the user's screen regardless of resolution
-
-    frame = Frame(master=root, width=750, height=550, background='lavender')
-    frame.pack()
-    # Creates a frame in which we can add elements like buttons and input boxes
-
-    global graphic
-    png2 = Image.open(
-        f'{cwd}/assets/splash3.png')
-    resized_png2 = png2.resize((300, 150), Image.ANTIALIAS)
-    graphic = ImageTk.PhotoImage(resized_png2)
-    graphic_label1 = Label(frame, image=graphic, background='lavender')
-    # Added logo to top of the frame by importing,
-    # resizing it and assigning it to a label to be shown
-
-    e_beef = Scale(frame, from_=0, to=15, orient=HORIZONTAL,
-                   background='lavender', fg='purple', length=150)
-    e_poultry = Scale(frame, from_=0, to=15, orient=HORIZONTAL,
-                      background='lavender', fg='purple', length=150)
-    e_pork = Scale(frame, from_=0, to=15, orient=HORIZONTAL,
-                   background='lavender', fg='purple', length=150)
-    e_lamb = Scale(frame, from_=0, to=15, orient=HORIZONTAL,
-                   background='lavender', fg='purple', length=150)
-    e_name = Entry(frame, width=15, fg='purple')
-    # e_country = Entry(frame, width=15, fg='purple')
-    options = [x for x in countries]
+    frame = app.new_page(750, 550)
+    # Replaces the splash page (or the last page, after a restart) with a frame
+    # in which we can add elements like buttons and input boxes
 
-    e_country = StringVar()
-    e_country.set('Country')
+    graphic = image_cache().photo('splash3.png', (300, 150), app.root)
+    graphic_label1 = Label(frame, image=graphic, background='lavender')
+    # Added logo to top of the frame; the resized logo is decoded once and cached,
+    # so later windows reuse it
 
-    drop = OptionMenu(frame, e_country, *options)
-    # Created 5 sliders for users to input their information and 2 input boxes
+    e_meats = [Scale(frame, from_=0, to=15, orient=HORIZONTAL,
+                     background='lavender', fg='purple', length=150) for _ in animal_types]
+    e_name = Entry(frame, width=15, fg='purple')
+    e_country = CountryEntry(frame, width=15, fg='purple')
+    # Created a slider per meat for users to input their information and 2 input boxes; the
+    # country box suggests countries as the user types, which is much quicker to draw and use
+    # than a menu of every entity in the table
 
     question = Label(frame,
                      text="How many servings of each type of meat would you say you have per week?",
@@ -344,117 +232,107 @@ def inputs() -> None:
     question2 = Label(frame, text="Input the following information to "
                                   "calculate your diet's carbon footprint:",
                       fg='purple', background='lavender', font=('Helvetica', 18))
-    q_beef = Label(frame, text='Beef: ', fg='purple', background='lavender', font=('Helvetica', 15))
-    q_poultry = Label(frame, text='Chicken: ', fg='purple',
-                      background='lavender', font=('Helvetica', 15))
-    q_pork = Label(frame, text='Pork: ', fg='purple', background='lavender', font=('Helvetica', 15))
-    q_lamb = Label(frame, text='Lamb: ', fg='purple', background='lavender', font=('Helvetica', 15))
+    q_meats = [Label(frame, text=f'{meat_labels[animal]}: ', fg='purple',
+                     background='lavender', font=('Helvetica', 15)) for animal in animal_types]
     q_name = Label(frame, text='Name: ', fg='purple', background='lavender', font=('Helvetica', 15))
     q_country = Label(frame, text='Country: ', fg='purple',
                       background='lavender', font=('Helvetica', 15))
 
-    # Created 7 text labels explaining to the user what information to provide
+    # Created text labels explaining to the user what information to provide
 
     # Nested function that allows a button to pull and store user inputted data
     # Also creates a new page with all the results
 
+    @timed('results page')
     def write() -> None:
         """ Gets values from input boxes to be later manipulated by backend functions. """
 
-        global user1
-        user1 = User(e_name.get(), e_country.get())
-        user1.create_animal_classes([float(e_beef.get()), float(e_poultry.get()),
-                                     float(e_pork.get()), float(e_lamb.get())])
+        country = e_country.country()
+        if country is None:
+            e_country.configure(fg='red')
+            return
+        # The country box turns red until the user types a country we know
+
+        user1 = app.user = User(e_name.get(), country)
+        user1.create_animal_classes([float(slider.get()) for slider in e_meats])
         user1.find_stats()
         # Built in functions to get the user's data
 
         # *output is the user's final carbon footprint basically
         output = int(user1.total_emissions / 1000)
 
-        root.destroy()
-
-        # Destroys the input
+        chart_widgets = []
+        # Holds the chart and its close button once a chart has been shown
 
         def graph() -> None:
-            """Creates graphs of info using matplotlib
+            """Shows a chart of the user's weekly emissions from each meat over the page.
+            The chart is drawn by matplotlib on a background thread, so the window keeps
+            responding, and charts already drawn are shown at once
             Preconditions:
-                - user1.total_emissions_list != []
-                - user1.total_country_emissions_list != []
-                - user1.new_total_emissions_list != []
-                - Adjust button in front end must be pressed
+                - user1.find_stats() has been called
             """
+            user1.total_emissions_list = [user1.animal_list[animal].weekly_emissions / 1000
+                                          for animal in user1.animal_list]
+            user1.total_country_emissions_list = [user1.animal_list[animal].country_emissions
+                                                  / 1000 for animal in user1.animal_list]
             if user1.total_emissions_percentage <= -25:
-                user1.total_emissions_list = [user1.animal_list[animal].weekly_emissions / 1000
-                                              for animal in user1.animal_list]
-                user1.total_country_emissions_list = [user1.animal_list[animal].country_emissions
-                                                      / 1000 for animal in user1.animal_list]
-                w = 0.2
-
-                bar1 = np.arange(len(animal_types))
-                bar2 = [x + w for x in bar1]
-
-                plt.bar(bar1, user1.total_emissions_list, w, label='Your Current Emissions')
-                plt.bar(bar2, user1.total_country_emissions_list, w,
-                        label='Average Emissions per Capita for Your Country')
-
-                plt.xlabel('Types of Meat')
-                plt.ylabel('Kg of CO2 Emissions per Week')
-                plt.title('Weekly Kg of CO2 Emissions from Eating Meat')
-                plt.xticks(bar1 + w / 2, animal_types)
-                plt.legend()
-                plt.show()
+                updated = None
             else:
-                user1.total_emissions_list = [user1.animal_list[animal].weekly_emissions / 1000
-                                              for animal in user1.animal_list]
-                user1.total_country_emissions_list = [user1.animal_list[animal].country_emissions
-                                                      / 1000 for animal in user1.animal_list]
+                user1.create_goals(slider_servings())
+                user1.goal_stats()
+                # The sliders update the figures live, so Adjust may never have been pressed
                 user1.new_total_emissions_list = [user1.animal_list[animal].new_emissions
                                                   / 1000 for animal in user1.animal_list]
-
-                w = 0.2
-
-                bar1 = np.arange(len(animal_types))
-                bar2 = [x + w for x in bar1]
-                bar3 = [x + w for x in bar2]
-
-                plt.bar(bar1, user1.total_emissions_list, w, label='Your Current Emissions')
-                plt.bar(bar2, user1.new_total_emissions_list, w, label='Your Updated Emissions')
-                plt.bar(bar3, user1.total_country_emissions_list, w,
-                        label='Average Emissions per Capita for Your Country')
-
-                plt.xlabel('Types of Meat')
-                plt.ylabel('Kg of CO2 Emissions per Week')
-                plt.title('Weekly Kg of CO2 Emissions from Eating Meat')
-                plt.xticks(bar1 + w, animal_types)
-                plt.legend()
-                plt.show()
-
-        root1 = Tk()
-        root1.title('Meat Monitor')
-        root1_x = int((root1.winfo_screenwidth() / 2) - (800 / 2))
-        root1_y = int((root1.winfo_screenheight() / 2) - (600 / 2))
-        root1.geometry(f'{800}x{600}+{root1_x}+{root1_y}')
-        root1.configure(background='lavender')
-        # Sets up a new window identical to the previous one
-
-        frame1 = Frame(master=root1, width=750, height=600, background='lavender')
-        frame1.pack()
-        # Sets up a new frame similar to the previous one
-
-        global graphic2
-        png3 = Image.open(
-            f'{cwd}/assets/splash3.png')
-        resized_png3 = png3.resize((300, 150), Image.ANTIALIAS)
-        graphic2 = ImageTk.PhotoImage(resized_png3)
+                updated = user1.new_total_emissions_list
+
+            show_chart(chart_renderer().submit(user1.total_emissions_list,
+                                               user1.total_country_emissions_list, updated))
+
+        def show_chart(chart: Future) -> None:
+            """Lays the chart over the page once it has been drawn, checking every 20 ms"""
+            from PIL import ImageTk
+
+            if app.page is not frame1:
+                return
+            # The user has moved on to another page, so the chart is no longer wanted
+            if not chart.done():
+                frame1.after(20, show_chart, chart)
+                return
+
+            if not chart_widgets:
+                chart_widgets.append(Label(frame1, background='lavender'))
+                chart_widgets.append(Button(frame1, text='Close', padx=30, pady=10,
+                                            command=hide_chart, background='lavender',
+                                            font=('Helvetica', 15)))
+            image = ImageTk.PhotoImage(chart.result(), master=app.root)
+            chart_widgets[0].configure(image=image)
+            chart_widgets[0].image = image
+            # Tk does not keep the image alive by itself
+            chart_widgets[0].place(x=55, y=40)
+            chart_widgets[1].place(x=320, y=530)
+            for widget in chart_widgets:
+                widget.lift()
+
+        def hide_chart() -> None:
+            """Takes the chart off the page"""
+            for widget in chart_widgets:
+                widget.place_forget()
+
+        frame1 = app.new_page(750, 600)
+        # Replaces the input page with a new frame similar to the previous one
+
+        graphic2 = image_cache().photo('splash3.png', (300, 150), app.root)
         graphic_label2 = Label(frame1, image=graphic2, background='lavender')
         graphic_label2.place(x=225, y=0)
+        chart_renderer().prepare()
+        # matplotlib is loaded in the background while the user reads their results,
+        # so the first chart does not wait for it
 
         # Sets up the same graphic on previous window
 
         def restart() -> None:
-            """Ends the program and takes the user back to the splash page. """
-            python = sys.executable
-            os.execl(python, python, *sys.argv)
+            """Takes the user back to the input page, keeping the loaded data. """
+            app.restart()
 
             # If the user's carbon footprint is less than X value,
             # show a screen that says they do not need to make changes
@@ -495,14 +373,9 @@ def inputs() -> None:
                 result = Label(frame1, text=f'{output} →', fg='red',
                                background='lavender', font=('Helvetica', 60))
 
-            beef_slider = Scale(frame1, from_=0, to=15, orient=HORIZONTAL,
-                                background='lavender', fg='purple', length=325)
-            poultry_slider = Scale(frame1, from_=0, to=15, orient=HORIZONTAL,
-                                   background='lavender', fg='purple', length=325)
-            pork_slider = Scale(frame1, from_=0, to=15, orient=HORIZONTAL,
-                                background='lavender', fg='purple', length=325)
-            lamb_slider = Scale(frame1, from_=0, to=15, orient=HORIZONTAL,
-                                background='lavender', fg='purple', length=325)
+            meat_sliders = [Scale(frame1, from_=0, to=15, orient=HORIZONTAL,
+                                  background='lavender', fg='purple', length=325)
+                            for _ in animal_types]
             question_text = Label(frame1, text='Try to get your consumption down by '
                                                '25% by adjusting the '
                                                'sliders', fg='purple',
@@ -510,14 +383,9 @@ def inputs() -> None:
             question_text2 = Label(frame1, text='and clicking adjust. Make the number on the '
                                                 'right green!', fg='purple', background='lavender',
                                    font=('Helvetica', 18))
-            beef_text = Label(frame1, text='Beef: ', fg='purple',
-                              background='lavender', font=('Helvetica', 15))
-            poultry_text = Label(frame1, text='Chicken: ', fg='purple',
-                                 background='lavender', font=('Helvetica', 15))
-            pork_text = Label(frame1, text='Pork: ', fg='purple',
-                              background='lavender', font=('Helvetica', 15))
-            lamb_text = Label(frame1, text='Lamb: ', fg='purple',
-                              background='lavender', font=('Helvetica', 15))
+            meat_texts = [Label(frame1, text=f'{meat_labels[animal]}: ', fg='purple',
+                                background='lavender', font=('Helvetica', 15))
+                          for animal in animal_types]
 
             # Sets up various labels and organizes them in the frame
             # similar to earlier blocks of code
@@ -532,45 +400,33 @@ def inputs() -> None:
             global output3
             output3 = ''
 
+            @timed('final page')
             def final() -> None:
                 """Shows the user a summation of their results"""
 
-                global root2
-                root1.destroy()
-                # Creates a new global window whose information
-                # can subsequently be accessed by other windows
-                # Destroys the change page window
-
-                root2 = Tk()
-                root2.title('Meat Monitor')
-                root2_x = int((root2.winfo_screenwidth() / 2) - (800 / 2))
-                root2_y = int((root2.winfo_screenheight() / 2) - (600 / 2))
-                root2.geometry(f'{800}x{600}+{root2_x}+{root2_y}')
-                root2.configure(background='lavender')
-                # Sets up a new window that exists at the center of the
-                # user's screen regardless of resolution
-
-                frame2 = Frame(master=root2, width=750, height=550, background='lavender')
-                frame2.pack()
-
-                global graphic3
-                png4 = Image.open(
-                    f'{cwd}/assets/splash3.png')
-                resized_png4 = png4.resize((300, 150), Image.ANTIALIAS)
-                graphic3 = ImageTk.PhotoImage(resized_png4)
+                user1.create_goals(slider_servings())
+                user1.goal_stats()
+                # The sliders update the figures live, so Adjust may never have been pressed
+
+                frame2 = app.new_page(750, 550)
+                # Replaces the change page with the summary page
+
+                graphic3 = image_cache().photo('splash3.png', (300, 150), app.root)
                 graphic_label3 = Label(frame2, image=graphic3, background='lavender')
                 graphic_label3.place(x=225, y=0)
 
-                a = [x.weekly_consumption for x in user1.animal_list.values()]
+                a = [f'{meat_labels[animal].lower()} {x.weekly_consumption} times'
+                     for animal, x in user1.animal_list.items() if x.weekly_consumption]
                 x = int(user1.total_emissions / 1000)
 
-                b = [x.new_consumption for x in user1.animal_list.values()]
+                b = [f'{meat_labels[animal].lower()} to {x.new_consumption} times'
+                     for animal, x in user1.animal_list.items()
+                     if x.weekly_consumption or x.new_consumption]
                 y1 = int(user1.new_total_emissions / 1000)
                 y2 = int(user1.emission_reduction / 1000)
+                # Meats the user does not eat are left out of the summary
 
-                sum1 = Label(frame2, text=f'In a week, you consume beef {a[0]} '
-                                          f'times, chicken {a[1]} times, '
-                                          f'pork {a[2]} times, and lamb {a[3]} times,',
+                sum1 = Label(frame2, text=f'In a week, you consume {listed(a)},',
                              fg='purple',
                              background='lavender', font=('Helvetica', 15))
 
@@ -578,14 +434,13 @@ def inputs() -> None:
                                           f'kg of CO2 per week.', fg='purple',
                              background='lavender', font=('Helvetica', 20))
                 sum3 = Label(frame2,
-                             text=f'But, if you change your diet '
-                                  f'of beef to {b[0]} times, '
-                                  f'chicken to {b[1]} times, pork to {b[2]} times,'
-                                  f' and lamb to {b[3]} times,',
+                             text=f'But, if you change your diet of {listed(b)},',
                              fg='purple', background='lavender', font=('Helvetica', 15))
                 sum4 = Label(frame2, text=f'This saves {y2} Kg of CO2 per week, '
                                           f'producing only {y1} Kg of CO2 per week',
                              fg='purple', background='lavender', font=('Helvetica', 20))
+                impact = Label(frame2, text=world_impact(user1), fg='purple',
+                               background='lavender', font=('Helvetica', 15))
                 sum5 = Label(frame2, text='In conclusion, by changing your diet based '
                                           'on all this info,',
                              fg='purple', background='lavender', font=('Helvetica', 20))
@@ -601,8 +456,25 @@ def inputs() -> None:
                 restart1 = Button(frame2, text='Restart', padx=30, pady=10, command=restart,
                                   fg='purple', background='lavender', font=('Helvetica', 15))
 
+                from meatmonitor.history import default_history_path
+
+                track_note = Label(frame2, text=f'Track this week to save your diet under the '
+                                                f'name {user1.name} in {default_history_path}',
+                                   fg='purple', background='lavender', font=('Helvetica', 15))
+
+                def track() -> None:
+                    """Records this week in the user's history, once per visit to this page"""
+                    track_button.configure(state=DISABLED)
+                    track_note.configure(text=week_tracked(user1))
+
+                track_button = Button(frame2, text='Track this week', padx=30, pady=10,
+                                      command=track, fg='purple', background='lavender',
+                                      font=('Helvetica', 15))
+                # Nothing is saved unless the user asks; the note says where it would go
+
                 restart1.place(x=600, y=500)
                 sum4.place(x=0, y=275)
+                impact.place(x=0, y=315)
                 sum3.place(x=0, y=225)
                 sum2.place(x=0, y=175)
                 sum1.place(x=0, y=125)
@@ -611,39 +483,78 @@ def inputs() -> None:
                 sum6.place(x=0, y=380)
                 sum7.place(x=0, y=410)
                 sum8.place(x=0, y=440)
+                track_note.place(x=0, y=470)
+                track_button.place(x=380, y=500)
+
+            goal_label = []
+            # Holds the label showing the user's new emissions once it has been created,
+            # so moving a slider updates it instead of stacking a new label on top
+
+            def show_goal(output2: int, reduction_percentage: float) -> None:
+                """Shows the user's new CO2 emissions, coloured by how much they were reduced"""
+                if reduction_percentage > 25:
+                    colour = 'green'
+                elif reduction_percentage > 12.5:
+                    colour = 'yellow'
+                else:
+                    colour = 'red'
+                # If the user's carbon footprint is X, or between Y and X,
+                # change the colour of the label and show the new value
+
+                if not goal_label:
+                    goal_label.append(Label(frame1, width=5, background='lavender',
+                                            font=('Helvetica', 60)))
+                    goal_label[0].place(x=450, y=165)
+                goal_label[0].configure(text=output2, fg=colour)
 
+            def slider_servings() -> List[float]:
+                """Returns the servings the sliders are set to"""
+                return [float(slider.get()) for slider in meat_sliders]
+
+            @timed('slider change')
             def change() -> None:
                 """Changes the label text for the user's new CO2 emissions"""
-                user1.create_goals([float(beef_slider.get()), float(poultry_slider.get()),
-                                    float(pork_slider.get()), float(lamb_slider.get())])
-
+                user1.create_goals(slider_servings())
                 user1.goal_stats()
-                output2 = int(user1.new_total_emissions / 1000)
-
-                global new_result
-                new_result = Label(frame1)
-                new_result.destroy()
-                # The label we are replacing is set up, and is a global var
-                # so we can change its position later
-                # We then destroy the label and replace it depending on the elif tree below
-                # Pulls values, just like before
-
                 # this is the new carbon footprint the user creates
                 # based on the change in their diet
-
-                if user1.emission_reduction_percentage > 25:
-                    new_result = Label(frame1, text=output2, fg='green', width=5,
-                                       background='lavender', font=('Helvetica', 60))
-                elif user1.emission_reduction_percentage > 12.5:
-                    new_result = Label(frame1, text=output2, fg='yellow', width=5,
-                                       background='lavender', font=('Helvetica', 60))
-                else:
-                    new_result = Label(frame1, text=output2, fg='red', width=5,
-                                       background='lavender', font=('Helvetica', 60))
-
-                new_result.place(x=450, y=165)
-                # If the user's carbon footprint is X, or between Y and X,
-                # change the colour of the label and show the new value
+                show_goal(int(user1.new_total_emissions / 1000),
+                          user1.emission_reduction_percentage)
+
+            def moved(animal: str, servings: str) -> None:
+                """Updates the user's new CO2 emissions as soon as the slider of animal
+                moves, working out only what that one meat changes
+                """
+                user1.change_goal(animal, float(servings))
+                show_goal(int(user1.new_total_emissions / 1000),
+                          user1.emission_reduction_percentage)
+
+            def suggest() -> None:
+                """Finds the smallest diet change that turns the number green, on the goal
+                thread so the page keeps responding, and moves the sliders to it"""
+                from meatmonitor.goals import goal_solver, solve_goal
+
+                # The label only turns green above 25%, so the goal must beat it, not just meet it
+                per_serving = [user1.location.emissions_per_serving[animal]
+                               for animal in animal_types]
+                show_suggestion(goal_solver().submit(
+                    solve_goal, [user1.animal_list[animal].weekly_consumption
+                                 for animal in animal_types],
+                    target=25 + 1e-9, per_serving=per_serving))
+
+            def show_suggestion(goal: Future, adjust=change) -> None:
+                """Moves the sliders to the goal once it has been found, checking every 20 ms"""
+                if app.page is not frame1:
+                    return
+                # The user has moved on to another page, so the goal is no longer wanted
+                if not goal.done():
+                    frame1.after(20, show_suggestion, goal)
+                    return
+
+                if goal.result() is not None:
+                    for slider, servings in zip(meat_sliders, goal.result()):
+                        slider.set(servings)
+                    adjust()
 
             def info() -> None:
                 """Creates an info page for the User to display relevant
@@ -652,24 +563,23 @@ def inputs() -> None:
                     - len(new_result) != 0
                  """
 
-                root3 = Tk()
+                root3 = Toplevel(app.root)
                 root3.title('Meat Monitor')
                 root3_x = int((root3.winfo_screenwidth() / 2) - (500 / 2))
                 root3_y = int((root3.winfo_screenheight() / 2) - (500 / 2))
                 root3.geometry(f'{500}x{500}+{root3_x}+{root3_y}')
                 root3.configure(background='lavender')
-                # Sets up a new window identical to the previous one
+                # Opens the info page in a second window of the app, next to the results
 
                 frame3 = Frame(master=root3, width=450, height=450, background='lavender')
                 frame3.pack()
 
                 text1 = Label(frame3, text='With an average of:', fg='purple',
                               background='lavender', font=('Helvetica', 15))
-                text2 = Label(frame3,
-                              text=f'{(user1.animal_list["Beef"].weekly_consumption * serving_size_per_animal["Beef"] / 1000)} kg of beef, '
-                                   f'{(user1.animal_list["Pork"].weekly_consumption * serving_size_per_animal["Pork"] / 1000)} kg of pork, '
-                                   f'{(user1.animal_list["Poultry"].weekly_consumption * serving_size_per_animal["Poultry"] / 1000)} kg of poultry and '
-                                   f'{(user1.animal_list["Lamb"].weekly_consumption * serving_size_per_animal["Lamb"] / 1000)} kg of lamb per week',
+                eaten = [f'{x.weekly_consumption * serving_size_per_animal[animal] / 1000} kg '
+                         f'of {meat_labels[animal].lower()}'
+                         for animal, x in user1.animal_list.items() if x.weekly_consumption]
+                text2 = Label(frame3, text=f'{listed(eaten)} per week',
                               fg='purple',
                               background='lavender', font=('Helvetica', 12))
                 text3 = Label(frame3,
@@ -684,6 +594,20 @@ def inputs() -> None:
                 text5 = Label(frame3, text='Even though you are consuming less than the average'
                                            ' person in your country,',
                               fg='purple', background='lavender', font=('Helvetica', 12))
+                world = [standing for standing in user1.standings() if standing.area == 'World']
+                ranking = Label(frame3, text=f'You emit more than the average person in '
+                                             f'{int(world[0].percentile)}% of countries'
+                                if world else '',
+                                fg='purple', background='lavender', font=('Helvetica', 12))
+                # Ranks the user among every country's average person (see meatmonitor.regions)
+                estimate = user1.uncertainty().total_emissions
+                interval = Label(frame3, text=f'Allowing for uncertain emission factors: '
+                                              f'{int(estimate.low[0] / 1000)} to '
+                                              f'{int(estimate.high[0] / 1000)} kg/week '
+                                              f'({estimate.level:g}% interval)',
+                                 fg='purple', background='lavender', font=('Helvetica', 12))
+                # Emission factors and serving sizes are only known to within a range
+                # (see meatmonitor.uncertainty)
 
                 if user1.total_emissions_percentage > 25:
                     text6 = Label(frame3, text='This is a warning that you could be '
@@ -738,8 +662,48 @@ def inputs() -> None:
                 text8.place(x=0, y=200)
                 text9.place(x=0, y=225)
                 text10.place(x=0, y=250)
+                ranking.place(x=0, y=275)
                 text11.place(x=0, y=300)
                 text12.place(x=0, y=325)
+                interval.place(x=0, y=350)
+
+            def elsewhere() -> None:
+                """Ranks the user's diet against the average person of every country, in a
+                second window, as if the user lived there (see meatmonitor.whatif)"""
+                from meatmonitor.whatif import compare_everywhere
+
+                comparison = compare_everywhere([user1.animal_list[animal].weekly_consumption
+                                                 for animal in animal_types],
+                                                countries_only=True)
+
+                root4 = Toplevel(app.root)
+                root4.title('Meat Monitor')
+                root4.geometry('450x500')
+                root4.configure(background='lavender')
+
+                heading = Label(root4, text='Your diet against the average person in',
+                                fg='purple', background='lavender', font=('Helvetica', 15))
+                heading2 = Label(root4, text='every country, lowest emissions first',
+                                 fg='purple', background='lavender', font=('Helvetica', 15))
+                frame4 = Frame(root4, background='lavender')
+                scrollbar = Scrollbar(frame4)
+                ranked = Listbox(frame4, width=45, height=20, yscrollcommand=scrollbar.set,
+                                 fg='purple', background='lavender', font=('Helvetica', 12))
+                scrollbar.configure(command=ranked.yview)
+                for x, (country, percentage) in enumerate(
+                        zip(comparison.entities, comparison.total_emissions_percentage)):
+                    ranked.insert(END, f'{x + 1}. {country}: {percentage:+.0f}%')
+                if user1.location.name in comparison.entities:
+                    row = comparison.entities.index(user1.location.name)
+                    ranked.selection_set(row)
+                    ranked.see(row)
+                # The user's own country is picked out, scrolled into view
+
+                heading.pack()
+                heading2.pack()
+                frame4.pack()
+                ranked.pack(side=LEFT)
+                scrollbar.pack(side=RIGHT, fill=Y)
 
             new_result = Label(frame1, text=output3, fg='purple',
                                background='lavender', font=('Helvetica', 60))
@@ -751,6 +715,10 @@ def inputs() -> None:
                            background='lavender', font=('Helvetica', 15))
             info = Button(frame1, text='Info', padx=30, pady=10, command=info,
                           background='lavender', font=('Helvetica', 15))
+            suggest = Button(frame1, text='Suggest', padx=30, pady=10, command=suggest,
+                             background='lavender', font=('Helvetica', 15))
+            elsewhere = Button(frame1, text='Elsewhere', padx=30, pady=10, command=elsewhere,
+                               background='lavender', font=('Helvetica', 15))
             # Sets up the label that the user sees on upon the start of the window,
             # it will always be 0.0 in purple
             # This gets overwritten every time the function change is called,
@@ -759,70 +727,101 @@ def inputs() -> None:
 
             text.place(x=120, y=125)
             result.place(x=175, y=165)
-            beef_slider.place(x=250, y=330)
-            poultry_slider.place(x=250, y=380)
-            pork_slider.place(x=250, y=430)
-            lamb_slider.place(x=250, y=480)
+            for x, slider in enumerate(meat_sliders):
+                slider.place(x=250, y=318 + 44 * x)
 
             question_text.place(x=100, y=265)
             question_text2.place(x=120, y=290)
-            beef_text.place(x=170, y=350)
-            poultry_text.place(x=170, y=400)
-            pork_text.place(x=170, y=450)
-            lamb_text.place(x=170, y=500)
+            for x, label in enumerate(meat_texts):
+                label.place(x=170, y=338 + 44 * x)
 
             new_result.place(x=450, y=200)
             change.place(x=150, y=540)
             graph.place(x=250, y=540)
             next1.place(x=460, y=540)
             info.place(x=550, y=540)
+            suggest.place(x=600, y=400)
+            elsewhere.place(x=600, y=460)
+            user1.create_goals(slider_servings())
+            user1.goal_stats()
+            for animal, slider in zip(animal_types, meat_sliders):
+                slider.configure(command=lambda servings, animal=animal: moved(animal, servings))
+            # The new emissions follow the sliders as they move, not only when Adjust is pressed
             # Organizes the location of each element in the frame
 
-    start = Button(root, text='Submit', padx=30, pady=10, command=write,
+    start = Button(frame, text='Submit', padx=30, pady=10, command=write,
                    background='lavender', font=('Helvetica', 15))
     # Creates a button to start the calculation and produce results on a new window
     graphic_label1.place(x=225, y=0)
-    e_beef.place(x=350, y=205)
-    e_poultry.place(x=350, y=255)
-    e_pork.place(x=350, y=305)
-    e_lamb.place(x=350, y=355)
+    for x, slider in enumerate(e_meats):
+        slider.place(x=350, y=200 + 42 * x)
     e_name.place(x=350, y=425)
-    drop.place(x=350, y=475)
+    e_country.place(x=350, y=475)
 
     question.place(x=75, y=135)
     question2.place(x=90, y=165)
-    q_beef.place(x=200, y=225)
-    q_poultry.place(x=200, y=275)
-    q_pork.place(x=200, y=325)
-    q_lamb.place(x=200, y=375)
+    for x, label in enumerate(q_meats):
+        label.place(x=200, y=220 + 42 * x)
     q_name.place(x=200, y=425)
     q_country.place(x=200, y=475)
 
-    start.place(x=330, y=525)
+    start.place(x=305, y=525)
     # Organizes the location of each element in the frame
 
 
-# All elements in the splash page/home page are here
-# Not in a definition because it needs to execute as
-# soon as the file is run, without any user input
-# Rest of this code is standard window set up, as seen in the code above
+def wait_for_data() -> None:
+    """ Opens the input page once the data has loaded and the splash
+    has been shown for splash_min_seconds, checking again every 50 ms until then.
+    If the data could not be loaded, says why and closes the app.
+    """
+    if loader_thread.is_alive() or time.time() - launch_time < splash_min_seconds:
+        app.root.after(50, wait_for_data)
+    elif load_errors:
+        messagebox.showerror('Meat Monitor', f'The country data could not be loaded:\n'
+                                             f'{load_errors[0]}', master=app.root)
+        app.root.destroy()
+    else:
+        inputs()
+
+
+def main() -> None:
+    """ Shows the splash page, loads the data in the background and runs the app.
+
+    --profile, --trace and --cprofile time each stage of the run and report it on exit,
+    as the MEATMONITOR_PROFILE, MEATMONITOR_TRACE and MEATMONITOR_CPROFILE environment
+    variables do (see meatmonitor/instrument.py for how to read the results).
+    """
+    global app, loader_thread
+    parser = argparse.ArgumentParser(description='Meat Monitor')
+    parser.add_argument('--profile', action='store_true',
+                        help='print the time spent in each stage on exit')
+    parser.add_argument('--trace', metavar='FILE', help='write a Chrome trace of each stage')
+    parser.add_argument('--cprofile', metavar='FILE', help='write a cProfile of the main thread')
+    args = parser.parse_args()
+    if args.profile or args.trace or args.cprofile:
+        instrument.enable(args.profile, args.trace, args.cprofile)
+    # All elements in the splash page/home page are here
+    # Every later page replaces it in the same window
+
+    app = App()
+    splash = app.new_page(800, 600)
+
+    splash_logo = image_cache().photo('splash3.png', (600, 300), app.root)
+
+    logo_label1 = Label(splash, image=splash_logo, background='lavender')
+    logo_label1.pack(pady=100)
 
-splash_root = Tk()
-splash_root.title('Meat Monitor')
-splash_x = int((splash_root.winfo_screenwidth() / 2) - (800 / 2))
-splash_y = int((splash_root.winfo_screenheight() / 2) - (600 / 2))
-splash_root.geometry(f'{800}x{600}+{splash_x}+{splash_y}')
-splash_root.configure(background='lavender')
-splash_root.after(6000, inputs)
+    loader_thread = threading.Thread(target=load_data, daemon=True)
+    loader_thread.start()
+    app.root.after(50, wait_for_data)
+    # The data loads in the background while the splash page is shown,
+    # and the input page opens as soon as it is ready
 
-png1 = Image.open(f'{cwd}/assets/splash3.png')
-resized_png1 = png1.resize((600, 300), Image.ANTIALIAS)
-splash_logo = ImageTk.PhotoImage(resized_png1)
+    app.root.mainloop()
 
-logo_label1 = Label(image=splash_logo, background='lavender')
-logo_label1.pack(pady=100)
 
-mainloop()
+if __name__ == '__main__':
+    main()
 
 # if __name__ == '__main__':
 #     import python_ta
@@ -0,0 +1,12 @@
+"""
+Data loading and emissions math for Meat Monitor.
+
+Only the pure Python parts (the emission constants and the Country/Animal/User
+model) are imported here. The numpy based modules are imported explicitly where
+needed (meatmonitor.loader, meatmonitor.batch), so importing the package itself
+stays cheap and never needs a display.
+"""
+from meatmonitor.emissions import (animal_types, emissions_per_animal,
+                                   emissions_per_serving_of_animal, meat_labels,
+                                   serving_size_per_animal)
+from meatmonitor.model import Animal, Country, User, countries, load_countries
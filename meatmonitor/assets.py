@@ -0,0 +1,125 @@
+"""
+Decodes and resizes the app's images once, instead of once per window.
+
+Every window used to open assets/splash3.png and resample it from 1143 x 546 to
+the size it shows. ImageCache keeps each resized variant in memory, keyed by
+file and size, and also saves it next to the original (in <assets>/images.cache)
+so later launches only decode a small, already resized PNG.
+
+Tk images belong to one Tk root, so the PhotoImages made from the cached
+variants are reused for as long as the root they were made for is the one
+asked for.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+import os
+from PIL import Image
+from meatmonitor.instrument import timed
+
+if TYPE_CHECKING:
+    import tkinter
+    from PIL import ImageTk
+
+assets_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'assets'
+# the directory holding the images shipped with the app
+
+
+class ImageCache:
+    """
+    Resized copies of the images in one directory, in memory and on disk.
+
+    Attributes:
+        - directory: the directory holding the original images
+        - cache_dir: the directory the resized copies are saved in, or None to keep
+        them in memory only
+        - images: the resized copies already loaded, keyed by (file name, size)
+        - photos: Tk images of the resized copies, for photo_root
+        - photo_root: the Tk root the entries of photos belong to
+    """
+    directory: Path
+    cache_dir: Optional[Path]
+    images: Dict[Tuple[str, Tuple[int, int]], Image.Image]
+    photos: Dict[Tuple[str, Tuple[int, int]], 'ImageTk.PhotoImage']
+    photo_root: Optional['tkinter.Misc']
+
+    def __init__(self, directory=assets_dir, use_disk_cache: bool = True) -> None:
+        self.directory = Path(directory)
+        self.cache_dir = self.directory / 'images.cache' if use_disk_cache else None
+        self.images = {}
+        self.photos = {}
+        self.photo_root = None
+
+    def cached_path(self, name: str, size: Tuple[int, int]) -> Optional[Path]:
+        """ Returns where the resized copy of name is saved, which changes whenever the
+        original file does, or None without a disk cache.
+        """
+        if self.cache_dir is None:
+            return None
+        stat = (self.directory / name).stat()
+        return self.cache_dir / \
+            f'{Path(name).stem}-{size[0]}x{size[1]}-{stat.st_size}-{stat.st_mtime_ns}.png'
+
+    @timed('resize image')
+    def image(self, name: str, size: Tuple[int, int]) -> Image.Image:
+        """ Returns the image file name in directory, resized to size with Lanczos
+        resampling (what Image.ANTIALIAS used to name).
+        """
+        key = (name, size)
+        if key in self.images:
+            return self.images[key]
+
+        cached = self.cached_path(name, size)
+        if cached is not None and cached.exists():
+            with Image.open(cached) as file:
+                image = file.copy()
+        else:
+            with Image.open(self.directory / name) as file:
+                image = file.resize(size, Image.Resampling.LANCZOS)
+            if cached is not None:
+                self._save(image, cached)
+        self.images[key] = image
+        return image
+
+    def _save(self, image: Image.Image, cached: Path) -> None:
+        """ Saves image at cached, removing copies of the same size made from older versions
+        of the original, and ignoring read only locations.
+        """
+        stem_and_size = cached.name.rsplit('-', 2)[0]
+        try:
+            cached.parent.mkdir(exist_ok=True)
+            for old in cached.parent.glob(f'{stem_and_size}-*.png'):
+                old.unlink()
+            # a fast, light compression: these files are read far more often than written
+            image.save(cached.with_suffix('.tmp'), format='PNG', compress_level=1)
+            os.replace(cached.with_suffix('.tmp'), cached)
+        except OSError:
+            pass
+
+    @timed('photo image')
+    def photo(self, name: str, size: Tuple[int, int],
+              master: 'tkinter.Misc') -> 'ImageTk.PhotoImage':
+        """ Returns a Tk image of image(name, size) for the Tk root of master.
+
+        The cache holds a reference to it, so Tk does not drop it while it is shown.
+        """
+        from PIL import ImageTk
+
+        root = master.winfo_toplevel()
+        if root is not self.photo_root:
+            self.photos = {}
+            self.photo_root = root
+        key = (name, size)
+        if key not in self.photos:
+            self.photos[key] = ImageTk.PhotoImage(self.image(name, size), master=root)
+        return self.photos[key]
+
+
+_shared_cache = None
+
+
+def image_cache() -> ImageCache:
+    """ Returns the ImageCache of the app's assets directory, creating it on first use. """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ImageCache()
+    return _shared_cache
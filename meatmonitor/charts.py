@@ -0,0 +1,174 @@
+"""
+Draws the "View Graphical Analysis" bar chart off the UI thread.
+
+The chart is drawn with matplotlib's Agg backend onto a Figure of its own
+(pyplot and its global state are never used), and handed back as a PIL image
+for the window to show. All drawing happens on one worker thread, so the window
+stays responsive while matplotlib is imported and the chart is drawn.
+
+Finished charts are cached by the emission values they show, so asking for the
+same chart again costs nothing. When only the updated emissions change (the user
+pressed Adjust), the existing figure is kept and just the heights of the "Your
+Updated Emissions" bars are changed before it is redrawn.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import threading
+from PIL import Image
+from meatmonitor.emissions import animal_types
+from meatmonitor.instrument import timed
+
+bar_width = 0.2
+# the width of each bar, as a fraction of the space between meat types
+
+chart_size = (640, 480)
+# the size of the chart image in pixels, matplotlib's default figure size
+
+cached_charts = 16
+# finished chart images kept, the least recently shown dropped first
+
+
+class EmissionChart:
+    """
+    A bar chart of a user's weekly emissions from each meat, next to their country's.
+
+    Must only be used from one thread at a time. Creating it imports matplotlib.
+
+    Attributes:
+        - figure: the matplotlib figure the chart is drawn on
+        - canvas: the Agg canvas of figure
+        - axes: the axes of figure the bars are drawn in
+        - layout: the current and country emissions drawn, and whether updated
+        emissions are drawn too, or None before the first chart
+        - updated_bars: the "Your Updated Emissions" bars, if they are drawn
+    """
+    layout: Optional[Tuple[tuple, tuple, bool]]
+    updated_bars: list
+
+    def __init__(self, size: Tuple[int, int] = chart_size, dpi: int = 100) -> None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.layout = None
+        self.updated_bars = []
+
+    @timed('draw chart')
+    def draw(self, current: Sequence[float], country: Sequence[float],
+             updated: Optional[Sequence[float]] = None) -> None:
+        """ Draws the chart of the given kg per week of each meat. Without updated, only
+        the current and country emissions are shown.
+        """
+        layout = (tuple(current), tuple(country), updated is not None)
+        if layout == self.layout:
+            # At most the updated emissions changed, so only their bars are changed
+            if updated is not None:
+                for bar, height in zip(self.updated_bars, updated):
+                    bar.set_height(height)
+                self.axes.relim()
+                self.axes.autoscale_view()
+            return
+
+        self.layout = layout
+        self.axes.clear()
+        series = [(current, 'Your Current Emissions')]
+        if updated is not None:
+            series.append((updated, 'Your Updated Emissions'))
+        series.append((country, 'Average Emissions per Capita for Your Country'))
+
+        for x, (heights, label) in enumerate(series):
+            bars = self.axes.bar([position + x * bar_width for position in
+                                  range(len(animal_types))], heights, bar_width,
+                                 label=label, color=f'C{x}')
+            if label == 'Your Updated Emissions':
+                self.updated_bars = list(bars)
+        self.axes.set_xlabel('Types of Meat')
+        self.axes.set_ylabel('Kg of CO2 Emissions per Week')
+        self.axes.set_title('Weekly Kg of CO2 Emissions from Eating Meat')
+        self.axes.set_xticks([position + (len(series) - 1) * bar_width / 2
+                              for position in range(len(animal_types))], animal_types)
+        self.axes.legend()
+
+    @timed('render chart')
+    def render(self, current: Sequence[float], country: Sequence[float],
+               updated: Optional[Sequence[float]] = None) -> Image.Image:
+        """ Draws the chart (see draw) and returns it as an RGBA image. """
+        self.draw(current, country, updated)
+        self.canvas.draw()
+        width, height = self.canvas.get_width_height()
+        return Image.frombuffer('RGBA', (width, height), self.canvas.buffer_rgba(),
+                                'raw', 'RGBA', 0, 1).copy()
+
+
+class ChartRenderer:
+    """
+    Draws EmissionCharts on a background thread and caches the finished images.
+
+    Attributes:
+        - executor: the single thread every chart is drawn on
+        - images: finished charts keyed by the emissions they show, least recently
+        used first
+        - lock: guards images, which both the UI thread and the worker use
+    """
+    executor: ThreadPoolExecutor
+    images: OrderedDict
+    lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+        self._chart = None
+
+    def _get_chart(self) -> EmissionChart:
+        """ Returns the chart, creating it (and importing matplotlib) on first use.
+        Only called on the worker thread.
+        """
+        if self._chart is None:
+            self._chart = EmissionChart()
+        return self._chart
+
+    def prepare(self) -> None:
+        """ Imports matplotlib and sets up the chart in the background, ahead of the
+        first request, so that one is not slowed down by it.
+        """
+        self.executor.submit(self._get_chart)
+
+    def submit(self, current: List[float], country: List[float],
+               updated: Optional[List[float]] = None) -> 'Future[Image.Image]':
+        """ Returns a future of the chart image (see EmissionChart.draw). A chart already
+        drawn is returned at once, in a future that is already done.
+        """
+        key = (tuple(current), tuple(country), None if updated is None else tuple(updated))
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+        if image is None:
+            return self.executor.submit(self._render, key)
+        future = Future()
+        future.set_result(image)
+        return future
+
+    def _render(self, key) -> Image.Image:
+        """ Draws the chart of key and caches it. Only called on the worker thread. """
+        image = self._get_chart().render(*key)
+        with self.lock:
+            self.images[key] = image
+            while len(self.images) > cached_charts:
+                self.images.popitem(last=False)
+        return image
+
+
+_shared_renderer = None
+
+
+def chart_renderer() -> ChartRenderer:
+    """ Returns the ChartRenderer shared by the whole process, creating it on first use. """
+    global _shared_renderer
+    if _shared_renderer is None:
+        _shared_renderer = ChartRenderer()
+    return _shared_renderer
@@ -0,0 +1,244 @@
+"""
+Holds many users as a few arrays instead of a User (and an Animal per meat) each.
+
+A Cohort keeps every user's servings and goals in (N, len(animal_types)) float64
+arrays, columns in animal_types order, their countries as rows of the country
+table, and their results as one array per figure, computed for everyone at once
+with meatmonitor.batch. Indexing it returns a UserView: a small object with
+the same public attributes as User (and, through animal_list, Animal), read out
+of the arrays when asked for, so code written against User works unchanged.
+
+The figures are those User and Animal would compute, exactly.
+
+Memory: about 230 bytes per user once find_stats and goal_stats have run, plus
+the user's name, against about 2.2 kilobytes for a User and its Animals, most of
+which are their float attributes (see benchmarks/bench_memory.py).
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from meatmonitor import model
+from meatmonitor.batch import BatchStats, CountryBaseline, country_rows_for, score_batch, \
+    sum_columns
+from meatmonitor.emissions import animal_types
+
+
+class Cohort:
+    """
+    Users stored column-wise.
+
+    Attributes:
+        - names: the name of each user
+        - country_names: the entity names the country rows index into
+        - country_rows: the row of each user's country in the country table
+        - baseline: the emissions of the average person in every country
+        - servings: the weekly servings of each meat, one row per user
+        - goals: the goal servings of each meat, NaN until create_goals
+        - stats: the results of find_stats, or None until it is run
+        - new_emissions: the goal emissions per meat, or None until goal_stats is run
+        - new_total_emissions, emission_reduction, emission_reduction_percentage: the
+        goal_stats results of each user, or None until it is run
+
+    Representation Invariants:
+        - len(self.names) == len(self.country_rows) == len(self.servings) == len(self.goals)
+        - self.servings.shape[1] == len(animal_types)
+    """
+    names: List[str]
+    country_names: List[str]
+    country_rows: np.ndarray
+    baseline: CountryBaseline
+    servings: np.ndarray
+    goals: np.ndarray
+    stats: Optional[BatchStats]
+    new_emissions: Optional[np.ndarray]
+    new_total_emissions: Optional[np.ndarray]
+    emission_reduction: Optional[np.ndarray]
+    emission_reduction_percentage: Optional[np.ndarray]
+
+    def __init__(self, names: List[str], locations: List[str], servings,
+                 baseline: Optional[CountryBaseline] = None) -> None:
+        """
+        Initialize a cohort of users with the given names, countries and weekly servings.
+
+        Preconditions:
+            - model.load_countries() has been called
+            - every location is in model.countries
+        """
+        table = model.country_table
+        self.names = list(names)
+        self.country_names = table.entities
+        self.country_rows = country_rows_for(locations, table.index)
+        self.baseline = baseline if baseline is not None else model.country_baseline
+        self.servings = np.asarray(servings, dtype=np.float64)
+        self.goals = np.full(self.servings.shape, np.nan)
+        self.stats = None
+        self.new_emissions = None
+        self.new_total_emissions = None
+        self.emission_reduction = None
+        self.emission_reduction_percentage = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> 'UserView':
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return UserView(self, index % len(self))
+
+    def find_stats(self) -> None:
+        """ Computes User.find_stats for every user. """
+        self.stats = score_batch(self.servings, self.country_rows, self.baseline)
+
+    def create_goals(self, goals) -> None:
+        """ Sets every user's goal servings, one row per user. """
+        self.goals = np.asarray(goals, dtype=np.float64).reshape(self.servings.shape)
+
+    def goal_stats(self) -> None:
+        """ Computes User.goal_stats for every user.
+
+        Preconditions:
+            - self.find_stats() has been called
+        """
+        total = self.stats.total_emissions
+        self.new_emissions = self.goals * self.baseline.per_serving(self.country_rows)
+        self.new_total_emissions = sum_columns(self.new_emissions)
+        self.emission_reduction = total - self.new_total_emissions
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.emission_reduction_percentage = np.where(
+                total != 0, 100 * self.emission_reduction / total, 0.0)
+
+    @property
+    def nbytes(self) -> int:
+        """ The bytes held by this cohort's arrays (not counting names or the baseline). """
+        arrays = [self.country_rows, self.servings, self.goals, self.new_emissions,
+                  self.new_total_emissions, self.emission_reduction,
+                  self.emission_reduction_percentage]
+        if self.stats is not None:
+            arrays += [self.stats.weekly_emissions, self.stats.total_emissions,
+                       self.stats.total_country_emissions,
+                       self.stats.total_emissions_comparison,
+                       self.stats.total_emissions_percentage]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+
+class UserView:
+    """
+    One user of a Cohort, with the public attributes of User.
+
+    Sample Usage:
+    >>> _ = model.load_countries()
+    >>> cohort = Cohort(['Jeremy', 'Ann'], ['Canada', 'France'],
+    ...                 [[2, 3, 5, 7, 0], [0, 1, 0, 0, 0]])
+    >>> cohort.find_stats()
+    >>> cohort.create_goals([[0, 3, 5, 7, 0], [0, 1, 0, 0, 0]])
+    >>> cohort.goal_stats()
+    >>> Jeremy = cohort[0]
+    >>> Jeremy.total_emissions, Jeremy.emission_reduction_percentage
+    (50955.75, 33.288883001427706)
+    >>> Jeremy.animal_list['Beef'].new_emissions
+    0.0
+    """
+    __slots__ = ('cohort', 'index')
+
+    def __init__(self, cohort: Cohort, index: int) -> None:
+        self.cohort = cohort
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.cohort.names[self.index]
+
+    @property
+    def location(self) -> 'model.Country':
+        return model.countries[self.cohort.country_names[self.cohort.country_rows[self.index]]]
+
+    @property
+    def animal_list(self) -> Dict[str, 'AnimalView']:
+        return {animal: AnimalView(self.cohort, self.index, x)
+                for x, animal in enumerate(animal_types)}
+
+    @property
+    def total_emissions(self) -> float:
+        return float(self.cohort.stats.total_emissions[self.index])
+
+    @property
+    def total_country_emissions(self) -> float:
+        return float(self.cohort.stats.total_country_emissions[self.index])
+
+    @property
+    def total_emissions_comparison(self) -> float:
+        return float(self.cohort.stats.total_emissions_comparison[self.index])
+
+    @property
+    def total_emissions_percentage(self) -> float:
+        return float(self.cohort.stats.total_emissions_percentage[self.index])
+
+    @property
+    def new_total_emissions(self) -> float:
+        return float(self.cohort.new_total_emissions[self.index])
+
+    @property
+    def emission_reduction(self) -> float:
+        return float(self.cohort.emission_reduction[self.index])
+
+    @property
+    def emission_reduction_percentage(self) -> float:
+        return float(self.cohort.emission_reduction_percentage[self.index])
+
+
+class AnimalView:
+    """ One meat of one user of a Cohort, with the public attributes of Animal. """
+    __slots__ = ('cohort', 'index', 'column')
+
+    def __init__(self, cohort: Cohort, index: int, column: int) -> None:
+        self.cohort = cohort
+        self.index = index
+        self.column = column
+
+    @property
+    def name(self) -> str:
+        return animal_types[self.column]
+
+    @property
+    def location(self) -> 'model.Country':
+        return UserView(self.cohort, self.index).location
+
+    @property
+    def weekly_consumption(self) -> float:
+        return float(self.cohort.servings[self.index, self.column])
+
+    @property
+    def country_emissions(self) -> float:
+        row = self.cohort.country_rows[self.index]
+        return float(self.cohort.baseline.country_emissions[row, self.column])
+
+    @property
+    def consumption_difference(self) -> float:
+        row = self.cohort.country_rows[self.index]
+        return self.weekly_consumption - float(self.cohort.baseline.consumption[row, self.column])
+
+    @property
+    def consumption_comparison(self) -> float:
+        row = self.cohort.country_rows[self.index]
+        average = float(self.cohort.baseline.consumption[row, self.column])
+        return 100 * self.consumption_difference / average if average != 0 else 0
+
+    @property
+    def weekly_emissions(self) -> float:
+        return float(self.cohort.stats.weekly_emissions[self.index, self.column])
+
+    @property
+    def new_consumption(self) -> float:
+        return float(self.cohort.goals[self.index, self.column])
+
+    @property
+    def new_emissions(self) -> float:
+        return float(self.cohort.new_emissions[self.index, self.column])
+
+    @property
+    def emission_reduction(self) -> float:
+        return self.weekly_emissions - self.new_emissions
+
+    @property
+    def emission_reduction_percentage(self) -> float:
+        weekly = self.weekly_emissions
+        return 100 * self.emission_reduction / weekly if weekly != 0 else 0
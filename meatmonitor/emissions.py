@@ -0,0 +1,118 @@
+"""
+Emission factors and serving sizes for each type of meat Meat Monitor tracks.
+
+They are read at import from a versioned JSON file: assets/meats.json, or the
+file named by the MEATMONITOR_FACTORS environment variable. The file lists any
+number of meats, each with the FAO column holding its consumption, its emission
+factor, its protein content and its serving size, and may override the factor of
+any meat for particular countries:
+
+    {"version": 2,
+     "meats": [{"name": "Beef", "label": "Beef", "column": "Bovine meat ...",
+                "emissions_per_gram": 498.9, "protein_per_gram": 0.2,
+                "serving_size": 85}, ...],
+     "overrides": {"Brazil": {"Beef": 600.0}}}
+
+Factors are published per gram of protein, as they are given in the file, but
+servings and FAO's supply figures are grams of meat; every factor is converted to
+grams of CO2 per gram of meat with the meat's protein content when it is read.
+
+A meat may also give the range its factor and serving size are thought to lie in,
+as "uncertainty": {"emissions_per_gram": ["triangular", 250, 498.9, 1000]}, for
+meatmonitor.uncertainty to sample from.
+
+Every other module works over animal_types, in the order the file lists them,
+so adding a meat to the file adds it everywhere.
+
+This module has no third party imports, so it is cheap to import from the GUI
+before the splash page is shown.
+"""
+from typing import Dict
+import json
+import os
+
+default_factors_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'assets', 'meats.json')
+
+factors_version = 2
+# the version of the factor file this code reads
+
+
+def read_factors(path) -> dict:
+    """ Returns the contents of the factor file at path, after checking them.
+
+    Raises ValueError if the file is of another version, or is missing or misnames a meat.
+    """
+    with open(path) as file:
+        factors = json.load(file)
+    if factors.get('version') != factors_version:
+        raise ValueError(f'{path}: version {factors.get("version")!r} is not '
+                         f'{factors_version}')
+    names = [meat['name'] for meat in factors['meats']]
+    for meat in factors['meats']:
+        missing = {'name', 'label', 'column', 'emissions_per_gram', 'protein_per_gram',
+                   'serving_size'} - set(meat)
+        if missing:
+            raise ValueError(f'{path}: {meat.get("name")!r} has no {sorted(missing)}')
+    for country, overrides in factors.get('overrides', {}).items():
+        unknown = set(overrides) - set(names)
+        if unknown:
+            raise ValueError(f'{path}: overrides for {country!r} name unknown meats '
+                             f'{sorted(unknown)}')
+    return factors
+
+
+factors = read_factors(os.environ.get('MEATMONITOR_FACTORS', default_factors_path))
+
+animal_types = [meat['name'] for meat in factors['meats']]
+
+meat_labels = {meat['name']: meat['label'] for meat in factors['meats']}
+# the name each meat is shown to the user by
+
+meat_columns = {meat['name']: meat['column'] for meat in factors['meats']}
+# the column of the FAO CSV holding each meat
+
+emissions_per_protein = {meat['name']: meat['emissions_per_gram'] for meat in factors['meats']}
+# grams of CO2 emissions per gram of protein, as given in the file
+
+protein_per_animal = {meat['name']: meat['protein_per_gram'] for meat in factors['meats']}
+# grams of protein per gram of meat
+
+emissions_per_animal = {x: emissions_per_protein[x] * protein_per_animal[x] for x in animal_types}
+# grams of CO2 emissions per gram of meat
+
+serving_size_per_animal = {meat['name']: meat['serving_size'] for meat in factors['meats']}
+# average meal is 3 to 3.5 ounces,
+# which equates to these values in grams per meat
+
+emissions_per_serving_of_animal = {x: emissions_per_animal[x] * serving_size_per_animal[x]
+                                   for x in emissions_per_animal}
+
+uncertainty_of_animal = {meat['name']: meat.get('uncertainty', {}) for meat in factors['meats']}
+# the distributions given in the file for the factor and serving size of each meat, if any
+
+country_overrides = factors.get('overrides', {})
+# the emission factors per gram of protein that differ in particular countries, keyed by
+# country and meat
+
+
+def emissions_for(country: str) -> Dict[str, float]:
+    """ Returns the emission factor of every meat in country, per gram of meat:
+    emissions_per_animal, with the country's overrides applied.
+
+    >>> emissions_for('Canada') == emissions_per_animal or 'Canada' in country_overrides
+    True
+    """
+    overrides = country_overrides.get(country)
+    if not overrides:
+        return emissions_per_animal
+    return {x: overrides[x] * protein_per_animal[x] if x in overrides else emissions_per_animal[x]
+            for x in animal_types}
+
+
+def emissions_per_serving_for(country: str) -> Dict[str, float]:
+    """ Returns the emissions of one serving of every meat in country. """
+    factors_of_country = emissions_for(country)
+    if factors_of_country is emissions_per_animal:
+        return emissions_per_serving_of_animal
+    return {x: factors_of_country[x] * serving_size_per_animal[x] for x in animal_types}
@@ -0,0 +1,215 @@
+"""
+Finds the smallest change to a diet that reaches an emission reduction target,
+instead of leaving the user to find one by moving sliders and pressing Adjust.
+
+A goal is a whole number of servings of each meat between 0 and 15 (the range of
+the sliders) whose emission_reduction_percentage, computed exactly as
+User.goal_stats does, is at least the target. Among those, the solver returns
+the one closest to the current diet, where moving one serving of a meat costs
+that meat's weight (1 by default).
+
+Rather than scoring all 16^5 slider positions, the solver walks through the
+possible changes in order of distance (and, at equal distance, of emissions)
+and stops at the first one that reaches the target, which is therefore the
+answer. Most diets are settled within the first few hundred changes, and diets
+that cannot reach the target are found up front, so they never walk at all. In
+batch mode identical diets are solved once, and all diets still walking are
+checked together, a block of changes at a time.
+
+Emissions are those of the user's country, given as its emissions per serving
+of each meat (batch.CountryBaseline.per_serving); by default the shared factors.
+
+Listing the changes takes most of a second for five meats, the first time for
+each set of factors, so the app solves goals on the goal_solver thread and lists
+them for the shared factors there as soon as the data has loaded (prepare_goals).
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import functools
+import numpy as np
+from meatmonitor.batch import emissions_per_serving_vector, sum_columns
+from meatmonitor.emissions import animal_types
+
+max_servings = 15
+# the sliders go from 0 to 15 servings a week
+
+target_reduction = 25.0
+# the reduction the app asks users to reach
+
+
+def _per_meat(values: Optional[Dict[str, float]], default: float) -> np.ndarray:
+    """ Returns values as an array in animal_types order, using default for missing meats. """
+    values = values or {}
+    return np.array([values.get(animal, default) for animal in animal_types], dtype=np.float64)
+
+
+def reduction_percentage(current: np.ndarray, new: np.ndarray,
+                         per_serving: np.ndarray = emissions_per_serving_vector) -> np.ndarray:
+    """ Returns User.goal_stats' emission_reduction_percentage for each pair of rows,
+    with the same float operations, so the target check agrees with the app exactly.
+    """
+    total = sum_columns(current * per_serving)
+    new_total = sum_columns(new * per_serving)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total != 0, 100 * (total - new_total) / total, 0.0)
+
+
+def _grid(ranges: List[np.ndarray]) -> np.ndarray:
+    """ Returns every combination of one value from each of ranges, one per row, as int8. """
+    grid = np.meshgrid(*[values.astype(np.int8) for values in ranges], indexing='ij')
+    return np.stack(grid, axis=-1).reshape(-1, len(ranges))
+
+
+@functools.lru_cache(maxsize=16)
+def _ordered_changes(lo: Tuple[int, ...], hi: Tuple[int, ...], weight: Tuple[float, ...],
+                     keep_servings: bool, per_serving: Tuple[float, ...]) -> np.ndarray:
+    """ Returns every change to a diet worth trying, sorted by distance and then by the
+    change in emissions, as int8.
+
+    Without keep_servings, adding servings can only be needed to reach a lower limit, so
+    a meat's servings only go up to that limit. With it, the total number of servings
+    may not drop, and a change that raises it is only worth trying if no meat goes up
+    by more than its lower limit: otherwise one serving less of that meat would be
+    closer, lower in emissions and still within every limit. So only changes that
+    keep the total are enumerated in full (the last meat's change follows from the
+    others'), which keeps the list to a fraction of the 31^n candidate changes.
+    """
+    count = len(animal_types)
+    if not keep_servings:
+        changes = _grid([np.arange(lo[x] - max_servings, max(lo[x], 0) + 1)
+                         for x in range(count)])
+    else:
+        ranges = [np.arange(lo[x] - max_servings, hi[x] + 1) for x in range(count)]
+        same = _grid(ranges[:-1]).astype(np.int64)
+        last = -same.sum(axis=1)
+        same = np.column_stack([same, last])[(last >= ranges[-1][0]) & (last <= ranges[-1][-1])]
+        changes = same.astype(np.int8)
+        if sum(lo) > 0:
+            more = _grid([np.arange(lo[x] - max_servings, min(lo[x], hi[x]) + 1)
+                          for x in range(count)])
+            changes = np.concatenate([changes, more[more.sum(axis=1) > 0]])
+    distance = np.abs(changes) @ np.array(weight)
+    order = np.lexsort((changes @ np.array(per_serving), distance))
+    return changes[order]
+
+
+def _lowest_reachable(current: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                      keep_servings: bool,
+                      per_serving: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Returns the lowest emission diet within the limits for every current diet, and
+    whether one exists at all (with keep_servings, the limits may not leave room for
+    enough servings).
+    """
+    lowest = np.broadcast_to(lo, current.shape).copy()
+    possible = np.full(len(current), bool((lo <= hi).all()))
+    if keep_servings:
+        missing = current.sum(axis=1) - lo.sum()
+        for x in np.argsort(per_serving):
+            added = np.clip(missing, 0, hi[x] - lo[x])
+            lowest[:, x] += added
+            missing = missing - added
+        possible &= missing <= 0
+    return lowest, possible
+
+
+def solve_goals(servings, target: float = target_reduction,
+                lower: Optional[Dict[str, int]] = None,
+                upper: Optional[Dict[str, int]] = None,
+                weights: Optional[Dict[str, float]] = None,
+                keep_servings: bool = False,
+                per_serving: np.ndarray = emissions_per_serving_vector,
+                chunk_size: int = 4096, block_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """ Returns the closest goal for every diet in servings, and whether one exists.
+
+    lower and upper limit the servings of individual meats (e.g. {'Lamb': 0} in upper
+    rules lamb out). weights makes changing some meats more costly than others. With
+    keep_servings the goal must have at least as many servings in total as the current
+    diet, so meats are swapped for lower emission ones rather than cut. per_serving is
+    the emissions of a serving of each meat in the users' country.
+
+    The result is an (N, len(animal_types)) int array of goals and an (N,) bool array
+    that is False where no goal within the limits reaches the target (those rows are
+    left as the current diet). Among goals at the same distance, the one with the
+    lowest emissions is returned.
+
+    Preconditions:
+        - servings has shape (N, len(animal_types)) with whole numbers from 0 to 15
+        - chunk_size > 0 and block_size > 0
+
+    >>> goals, feasible = solve_goals([[2, 3, 5, 7, 0], [0, 0, 0, 0, 0]])
+    >>> goals.tolist(), feasible.tolist()
+    ([[0, 3, 5, 7, 0], [0, 0, 0, 0, 0]], [True, False])
+    >>> goals, _ = solve_goals([[2, 3, 5, 7, 0]], upper={'Lamb': 5}, keep_servings=True)
+    >>> goals.tolist()
+    [[0, 7, 5, 5, 0]]
+    """
+    servings = np.asarray(servings, dtype=np.int64)
+    lo = np.maximum(_per_meat(lower, 0), 0).astype(np.int64)
+    hi = np.minimum(_per_meat(upper, max_servings), max_servings).astype(np.int64)
+    weight = _per_meat(weights, 1.0)
+    per_serving = np.asarray(per_serving, dtype=np.float64)
+    changes = _ordered_changes(tuple(lo.tolist()), tuple(hi.tolist()),
+                               tuple(weight.tolist()), keep_servings,
+                               tuple(per_serving.tolist()))
+
+    # Every distinct diet is solved once
+    unique, inverse = np.unique(servings, axis=0, return_inverse=True)
+    goals = unique.copy()
+
+    # Diets whose lowest reachable emissions miss the target can never get there
+    lowest, feasible = _lowest_reachable(unique, lo, hi, keep_servings, per_serving)
+    feasible &= reduction_percentage(unique, lowest, per_serving) >= target
+
+    for start in range(0, len(unique), chunk_size):
+        walking = start + np.flatnonzero(feasible[start:start + chunk_size])
+        for first in range(0, len(changes), block_size):
+            if len(walking) == 0:
+                break
+            current = unique[walking]
+            block = changes[first:first + block_size]
+            candidates = current[:, None, :] + block
+            met = ((candidates >= lo) & (candidates <= hi)).all(axis=2)
+            met &= reduction_percentage(current[:, None, :], candidates, per_serving) >= target
+
+            done = met.any(axis=1)
+            chosen = met[done].argmax(axis=1)
+            goals[walking[done]] = candidates[done][np.arange(len(chosen)), chosen]
+            walking = walking[~done]
+
+    return goals[inverse], feasible[inverse]
+
+
+def solve_goal(servings: List[float], target: float = target_reduction,
+               lower: Optional[Dict[str, int]] = None,
+               upper: Optional[Dict[str, int]] = None,
+               weights: Optional[Dict[str, float]] = None,
+               keep_servings: bool = False,
+               per_serving: np.ndarray = emissions_per_serving_vector) -> Optional[List[int]]:
+    """ Returns the closest goal for one diet (see solve_goals), or None if there is none.
+
+    >>> solve_goal([2, 3, 5, 7, 0], 25.0, weights={'Beef': 5})
+    [2, 3, 5, 3, 0]
+    """
+    goals, feasible = solve_goals([servings], target, lower, upper, weights, keep_servings,
+                                  per_serving)
+    return goals[0].tolist() if feasible[0] else None
+
+
+_shared_solver = None
+
+
+def goal_solver() -> ThreadPoolExecutor:
+    """ Returns the single thread the app solves goals on, so the Tk thread never waits
+    for one, creating it on first use.
+    """
+    global _shared_solver
+    if _shared_solver is None:
+        _shared_solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='goals')
+    return _shared_solver
+
+
+def prepare_goals(per_serving: np.ndarray = emissions_per_serving_vector) -> 'Future[None]':
+    """ Lists the changes solve_goal tries for per_serving on the goal_solver thread,
+    ahead of the first goal, which would otherwise wait for them.
+    """
+    return goal_solver().submit(solve_goal, [0] * len(animal_types), per_serving=per_serving)
@@ -0,0 +1,445 @@
+"""
+Keeps every user's weekly diets, goals and totals across restarts, in an SQLite
+database: one file, read and written with the standard library's sqlite3.
+
+A user is known by their name. Each week they record (weeks are counted from the
+Monday of 1 January 0001, see week_of) holds their servings and goals, and their
+weekly emissions and those of the average person in their country, worked out
+with meatmonitor.batch so they are exactly those User gives. Recording the same
+week again replaces it.
+
+Every user also has a summary, updated as each week is written rather than by
+reading their history back: the weeks recorded, their average weekly emissions
+over the last 4 and 52 weeks, and their streak, the weeks in a row up to the
+latest in which they emitted less than the average person in their country. The
+summary keeps the totals of the last 52 weeks in a ring, indexed by the week
+modulo 52, along with their running sum, so writing a week costs the same
+however long the history is. Each user's weeks must be recorded in order; only
+their latest week may be recorded again.
+
+Weeks are buffered and written batch_size at a time (or on flush), each batch in
+one transaction with one executemany per table. Reads flush the buffer first. The
+summaries of the users a store has read or written are also kept in memory, so a
+batch only reads those of users it has not seen before.
+
+The database is ~/.meatmonitor/history.sqlite3, or the file named by the
+MEATMONITOR_HISTORY environment variable.
+"""
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import math
+import os
+import sqlite3
+import numpy as np
+from meatmonitor import model
+from meatmonitor.batch import country_rows_for, score_batch, sum_columns
+from meatmonitor.emissions import animal_types
+
+default_history_path = Path(os.environ.get('MEATMONITOR_HISTORY',
+                                           Path.home() / '.meatmonitor' / 'history.sqlite3'))
+
+default_batch_size = 10 ** 4
+# weeks buffered before they are written
+
+long_window = 52
+short_window = 4
+# the weeks the two averages cover; the ring of every summary holds long_window totals
+
+query_chunk = 500
+# names or ids looked up per query, well under SQLite's limit on parameters
+
+schema = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, country TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS weeks (
+    week INTEGER NOT NULL, user INTEGER NOT NULL, servings BLOB NOT NULL, goals BLOB,
+    total REAL NOT NULL, country_total REAL NOT NULL, new_total REAL,
+    PRIMARY KEY (week, user)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    user INTEGER PRIMARY KEY, weeks INTEGER NOT NULL, latest INTEGER NOT NULL,
+    streak INTEGER NOT NULL, best_streak INTEGER NOT NULL, prior_streak INTEGER NOT NULL,
+    prior_best INTEGER NOT NULL, long_sum REAL NOT NULL, long_count INTEGER NOT NULL,
+    ring BLOB NOT NULL);
+'''
+# servings and goals are float64 arrays in the order of the meats stored in meta. Weeks
+# are kept in order of week, then user: every user records the same weeks, so a batch is
+# written at the end of the table rather than into pages spread all over it
+
+
+def week_of(day: date) -> int:
+    """ Returns the number of the week day falls in.
+
+    >>> week_of(date(2024, 1, 1)), week_of(date(2024, 1, 7)), week_of(date(2024, 1, 8))
+    (105555, 105555, 105556)
+    """
+    return (day.toordinal() - 1) // 7
+
+
+def monday_of(week: int) -> date:
+    """ Returns the first day of the given week.
+
+    >>> monday_of(105556)
+    datetime.date(2024, 1, 8)
+    """
+    return date.fromordinal(week * 7 + 1)
+
+
+class Summary:
+    """
+    A user's history, as of the latest week they recorded.
+
+    Attributes:
+        - name: the user's name
+        - country: the country of their latest week
+        - weeks: the number of weeks they recorded
+        - latest: the latest week they recorded
+        - latest_total: their weekly CO2 emissions that week, in grams
+        - average_4: their average weekly emissions over the weeks they recorded among the
+        4 up to latest
+        - average_52: the same over the 52 up to latest
+        - streak: the weeks in a row up to latest that they emitted less than the average
+        person in their country
+        - best_streak: the longest streak they have had
+
+    Representation Invariants:
+        - 0 <= self.streak <= self.best_streak <= self.weeks
+    """
+    name: str
+    country: str
+    weeks: int
+    latest: int
+    latest_total: float
+    average_4: float
+    average_52: float
+    streak: int
+    best_streak: int
+
+    def __init__(self, name, country, weeks, latest, latest_total, average_4, average_52,
+                 streak, best_streak) -> None:
+        self.name = name
+        self.country = country
+        self.weeks = weeks
+        self.latest = latest
+        self.latest_total = latest_total
+        self.average_4 = average_4
+        self.average_52 = average_52
+        self.streak = streak
+        self.best_streak = best_streak
+
+    def __repr__(self) -> str:
+        return (f'Summary({self.name!r}, {self.weeks} weeks to {monday_of(self.latest)}, '
+                f'4-week average {self.average_4:.1f}, 52-week average {self.average_52:.1f}, '
+                f'streak {self.streak}, best {self.best_streak})')
+
+
+class _Running:
+    """
+    The running figures of one user's summary, as stored in the summaries table.
+
+    prior_streak and prior_best are the streak and best streak before the latest week,
+    so that the latest week can be recorded again.
+    """
+    __slots__ = ('weeks', 'latest', 'streak', 'best_streak', 'prior_streak', 'prior_best',
+                 'long_sum', 'long_count', 'ring')
+
+    def __init__(self, row: Optional[tuple] = None) -> None:
+        if row is None:
+            self.weeks, self.latest, self.streak, self.best_streak = 0, None, 0, 0
+            self.prior_streak, self.prior_best, self.long_sum, self.long_count = 0, 0, 0.0, 0
+            self.ring = array('d', [math.nan]) * long_window
+        else:
+            (self.weeks, self.latest, self.streak, self.best_streak, self.prior_streak,
+             self.prior_best, self.long_sum, self.long_count) = row[:8]
+            self.ring = array('d')
+            self.ring.frombytes(row[8])
+
+    def row(self) -> tuple:
+        return (self.weeks, self.latest, self.streak, self.best_streak, self.prior_streak,
+                self.prior_best, self.long_sum, self.long_count, self.ring.tobytes())
+
+    def _clear(self, slot: int) -> None:
+        old = self.ring[slot]
+        if old == old:
+            # Not NaN: a week leaving the window
+            self.long_sum -= old
+            self.long_count -= 1
+            self.ring[slot] = math.nan
+
+    def record(self, week: int, total: float, below: bool) -> None:
+        """ Adds week, with the given total, to the figures, or replaces it if it is the
+        latest. below is whether total is less than the average person's in the country.
+
+        Raises ValueError if week is before the latest week.
+        """
+        if self.latest is None or week > self.latest:
+            if self.latest is not None:
+                for passed in range(max(self.latest + 1, week - long_window + 1), week + 1):
+                    self._clear(passed % long_window)
+            self.prior_streak = self.streak if self.latest == week - 1 else 0
+            self.prior_best = self.best_streak
+            self.weeks += 1
+            self.latest = week
+        elif week < self.latest:
+            raise ValueError(f'week {week} is before the latest week recorded, {self.latest}')
+        else:
+            self._clear(week % long_window)
+
+        self.ring[week % long_window] = total
+        self.long_sum += total
+        self.long_count += 1
+        if self.long_count == 1:
+            self.long_sum = total
+            # Drops any rounding left over from the weeks that left the window
+        self.streak = self.prior_streak + 1 if below else 0
+        self.best_streak = max(self.prior_best, self.streak)
+
+    def short_average(self) -> float:
+        """ Returns the average of the totals recorded in the short_window weeks up to the
+        latest, or NaN if there are none.
+        """
+        recent = [self.ring[week % long_window]
+                  for week in range(self.latest - short_window + 1, self.latest + 1)]
+        recent = [total for total in recent if total == total]
+        return sum(recent) / len(recent) if recent else math.nan
+
+
+class HistoryStore:
+    """
+    The weekly history of every user, in an SQLite database.
+
+    Attributes:
+        - path: the database file
+        - batch_size: the weeks buffered before they are written
+        - connection: the open connection to the database
+        - pending: the weeks added but not yet written, as (name, country, week, servings,
+        goals)
+        - user_ids: the id and country of every user read or written so far, by name
+        - running: the running figures of the summary of every user read or written so far,
+        by id; the store assumes it is the only one writing to the database
+
+    Sample Usage:
+    >>> import tempfile
+    >>> _ = model.load_countries()
+    >>> directory = tempfile.TemporaryDirectory()
+    >>> store = HistoryStore(Path(directory.name) / 'history.sqlite3')
+    >>> for week, beef in enumerate([4, 7, 5, 3, 2]):
+    ...     store.add('Ann', 'Canada', 105555 + week, [beef, 3, 2, 0, 0], [2, 3, 2, 0, 0])
+    >>> summary = store.summary('Ann')
+    >>> summary.weeks, round(summary.average_4, 1), round(summary.average_52, 1)
+    (5, 41851.2, 41427.1)
+    >>> summary.streak, summary.best_streak
+    (3, 3)
+    >>> [(str(monday), round(total, 1)) for monday, total, _ in store.trend('Ann', 2)]
+    [('2024-01-22', 31249.5), ('2024-01-29', 22768.2)]
+    >>> store.add('Ann', 'Canada', 105560, [0, 0, 0, 0, 0])
+    >>> summary = store.summary('Ann')
+    >>> summary.latest_total, summary.streak, summary.best_streak
+    (0.0, 4, 4)
+    >>> store.add('Ann', 'Canada', 105560, [7, 3, 2, 0, 0])
+    >>> summary = store.summary('Ann')
+    >>> round(summary.latest_total, 1), summary.streak, summary.best_streak
+    (65174.7, 0, 3)
+    >>> store.close()
+    >>> directory.cleanup()
+    """
+    path: Path
+    batch_size: int
+    connection: sqlite3.Connection
+    pending: List[tuple]
+    user_ids: Dict[str, Tuple[int, str]]
+    running: Dict[int, '_Running']
+
+    def __init__(self, path=default_history_path, batch_size: int = default_batch_size) -> None:
+        """
+        Opens the database at path, creating it if there is none.
+
+        Raises ValueError if the database records other meats than animal_types.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        with self.connection:
+            self.connection.executescript(schema)
+            self.connection.execute('INSERT OR IGNORE INTO meta VALUES (?, ?)',
+                                    ('meats', json.dumps(animal_types)))
+        meats = json.loads(self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'meats'").fetchone()[0])
+        if meats != animal_types:
+            self.connection.close()
+            raise ValueError(f'{self.path}: records the meats {meats}, not {animal_types}')
+        self.pending = []
+        self.user_ids = {}
+        self.running = {}
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def add(self, name: str, country: str, week: int, servings: List[float],
+            goals: Optional[List[float]] = None) -> None:
+        """ Adds the servings (and goals) of each meat, in animal_types order, that name ate
+        in country in week, writing the buffer once it holds batch_size weeks.
+
+        Preconditions:
+            - model.load_countries() has been called
+            - country in model.countries
+        """
+        self.pending.append((name, country, week, servings, goals))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_user(self, user: 'model.User', week: Optional[int] = None) -> None:
+        """ Adds user's servings, and goals if they have set them, as those of week (this
+        week by default).
+
+        Preconditions:
+            - user.create_animal_classes() has been called
+        """
+        animals = [user.animal_list[animal] for animal in animal_types]
+        goals = None
+        if all(hasattr(animal, 'new_consumption') for animal in animals):
+            goals = [animal.new_consumption for animal in animals]
+        self.add(user.name, user.location.name, week_of(date.today()) if week is None else week,
+                 [animal.weekly_consumption for animal in animals], goals)
+
+    def _user_id(self, name: str) -> Optional[int]:
+        """ Returns the id of the user called name, or None if there is none. """
+        if name not in self.user_ids:
+            row = self.connection.execute('SELECT id, country FROM users WHERE name = ?',
+                                          (name,)).fetchone()
+            if row is None:
+                return None
+            self.user_ids[name] = tuple(row)
+        return self.user_ids[name][0]
+
+    def _load(self, table: str, column: str, keys: list) -> List[tuple]:
+        """ Returns the rows of table whose column is any of keys. """
+        rows = []
+        for start in range(0, len(keys), query_chunk):
+            chunk = keys[start:start + query_chunk]
+            rows.extend(self.connection.execute(
+                f'SELECT * FROM {table} WHERE {column} IN ({", ".join("?" * len(chunk))})',
+                chunk))
+        return rows
+
+    def _figures(self, users: list) -> None:
+        """ Reads the running figures of those of users not already in running. """
+        missing = [user for user in users if user not in self.running]
+        for row in self._load('summaries', 'user', missing):
+            self.running[row[0]] = _Running(row[1:])
+
+    def flush(self) -> None:
+        """ Writes every week added, in one transaction.
+
+        Raises ValueError, writing none of them, if a user's weeks are not in order.
+        """
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        baseline = model.country_baseline
+        servings = np.array([entry[3] for entry in pending], dtype=np.float64)
+        goals = np.array([[math.nan] * len(animal_types) if entry[4] is None else entry[4]
+                          for entry in pending], dtype=np.float64)
+        rows = country_rows_for([entry[1] for entry in pending], model.country_table.index)
+        stats = score_batch(servings, rows, baseline)
+        new_totals = sum_columns(goals * baseline.per_serving(rows)).tolist()
+        totals = stats.total_emissions.tolist()
+        country_totals = stats.total_country_emissions.tolist()
+
+        try:
+            with self.connection:
+                countries = {entry[0]: entry[1] for entry in pending}
+                for name in countries:
+                    self._user_id(name)
+                moved = [(name, country) for name, country in countries.items()
+                         if self.user_ids.get(name, (None, None))[1] != country]
+                self.connection.executemany(
+                    'INSERT INTO users (name, country) VALUES (?, ?) '
+                    'ON CONFLICT (name) DO UPDATE SET country = excluded.country', moved)
+                for name, country in moved:
+                    self.user_ids.pop(name, None)
+                    self._user_id(name)
+                ids = [self.user_ids[entry[0]][0] for entry in pending]
+                self._figures(list(set(ids)))
+
+                weeks = []
+                for x, (user, entry) in enumerate(zip(ids, pending)):
+                    if user not in self.running:
+                        self.running[user] = _Running()
+                    self.running[user].record(entry[2], totals[x], totals[x] < country_totals[x])
+                    weeks.append((entry[2], user, servings[x].tobytes(),
+                                  None if entry[4] is None else goals[x].tobytes(), totals[x],
+                                  country_totals[x], None if entry[4] is None else new_totals[x]))
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO weeks VALUES (?, ?, ?, ?, ?, ?, ?)', weeks)
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(user, *self.running[user].row()) for user in set(ids)])
+        except BaseException:
+            # The transaction was rolled back, so what was read or updated in memory may not
+            # match the database any more
+            self.user_ids.clear()
+            self.running.clear()
+            raise
+
+    def summary(self, name: str) -> Optional[Summary]:
+        """ Returns the summary of name's history, or None if they recorded no weeks. """
+        self.flush()
+        user = self._user_id(name)
+        if user is None:
+            return None
+        self._figures([user])
+        if user not in self.running:
+            return None
+        figures = self.running[user]
+        return Summary(name, self.user_ids[name][1], figures.weeks, figures.latest,
+                       figures.ring[figures.latest % long_window], figures.short_average(),
+                       figures.long_sum / figures.long_count, figures.streak,
+                       figures.best_streak)
+
+    def trend(self, name: str, weeks: int = long_window) -> List[Tuple[date, float,
+                                                                       Optional[float]]]:
+        """ Returns the Monday, total emissions and goal emissions (None if no goals were
+        set) of every week name recorded among the given number of weeks up to their
+        latest, oldest first.
+        """
+        self.flush()
+        user = self._user_id(name)
+        if user is None:
+            return []
+        self._figures([user])
+        if user not in self.running:
+            return []
+        latest = self.running[user].latest
+        found = []
+        for start in range(latest - weeks + 1, latest + 1, query_chunk):
+            chunk = list(range(start, min(start + query_chunk, latest + 1)))
+            found.extend(self.connection.execute(
+                f'SELECT week, total, new_total FROM weeks WHERE user = ? AND week IN '
+                f'({", ".join("?" * len(chunk))}) ORDER BY week', [user, *chunk]))
+        return [(monday_of(week), total, new_total) for week, total, new_total in found]
+
+    def close(self) -> None:
+        """ Writes every week added and closes the database. """
+        self.flush()
+        self.connection.close()
+
+
+_shared_store = None
+
+
+def history_store() -> HistoryStore:
+    """ Returns the HistoryStore of the default database, opening it on first use. """
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = HistoryStore()
+    return _shared_store
@@ -0,0 +1,301 @@
+"""
+Times the stages of Meat Monitor (loading the table, building countries, resizing
+images, scoring the user, drawing charts, setting up Tk pages) so a slow run on
+someone's machine can be taken apart.
+
+Stages are marked in the code with the timed decorator or the stage context
+manager. Timing is off by default and is turned on by the environment, before
+anything is imported:
+
+    MEATMONITOR_PROFILE=1         print a summary of every stage to stderr on exit
+    MEATMONITOR_TRACE=trace.json  write every timed call as a Chrome trace on exit
+    MEATMONITOR_CPROFILE=run.prof write a cProfile of the main thread on exit
+
+or by the same options of main.py (--profile, --trace FILE, --cprofile FILE), or
+by calling enable() directly.
+
+While timing is off, timed hands back the function it was given, so a marked
+function costs nothing extra to call; enable() swaps the timed version in on
+its class or module, and disable() swaps it back. (A function imported by name
+into another module before enable() keeps its untimed version there.) stage()
+costs one check of a flag while off.
+
+Reading the results:
+    - The summary lists every stage with its calls, total time, own time (less
+    the stages timed inside it, which nest) and mean and longest call.
+    - The trace opens in https://ui.perfetto.dev or chrome://tracing: each thread
+    is a row, and each timed call a bar nested under the call it was made in.
+    - The cProfile opens with python -m pstats run.prof (then sort cumtime and
+    stats 30), or any viewer of pstats files. It only sees the main thread; the
+    summary and trace see every thread.
+
+This module only uses the standard library, so model.py can mark its stages.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+
+max_events = 10 ** 6
+# timed calls kept for the trace; later calls still count in the summary
+
+enabled = False
+# whether stages are being timed
+
+
+class StageStats:
+    """
+    The timings of every call of one stage.
+
+    Attributes:
+        - calls: the number of calls
+        - total: the seconds spent in the stage, stages inside it included
+        - own: total less the seconds spent in stages timed inside it
+        - longest: the seconds of the longest call
+
+    Representation Invariants:
+        - 0 <= self.own <= self.total
+    """
+    calls: int
+    total: float
+    own: float
+    longest: float
+    __slots__ = ('calls', 'total', 'own', 'longest')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.longest = 0.0
+
+    def __repr__(self) -> str:
+        return f'StageStats(calls={self.calls}, total={self.total:.6f}, own={self.own:.6f})'
+
+
+_stats: Dict[str, StageStats] = {}
+_events: List[Tuple[str, int, int, int]] = []
+# (stage, start, duration, thread) of every timed call, in nanoseconds
+_thread_names: Dict[int, str] = {}
+_lock = threading.Lock()
+_local = threading.local()
+_origin = time.perf_counter_ns()
+
+_registered: List[list] = []
+# [function, stage, timed version] of every module level function or method marked timed
+
+_outputs = {'summary': False, 'trace': None, 'profile': None}
+_profiler = None
+_report_registered = False
+
+
+def _record(name: str, start: int, duration: int, own: int) -> None:
+    thread = threading.get_ident()
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = StageStats()
+        stats.calls += 1
+        stats.total += duration / 1e9
+        stats.own += own / 1e9
+        stats.longest = max(stats.longest, duration / 1e9)
+        if len(_events) < max_events:
+            _events.append((name, start, duration, thread))
+        if thread not in _thread_names:
+            _thread_names[thread] = threading.current_thread().name
+
+
+class _Stage:
+    """ Times the block it is entered for as one call of the stage name. """
+    __slots__ = ('name', 'start', 'inner')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> '_Stage':
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.inner = 0
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *error) -> bool:
+        duration = time.perf_counter_ns() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].inner += duration
+        _record(self.name, self.start, duration, duration - self.inner)
+        return False
+
+
+class _Off:
+    """ Stands in for _Stage while timing is off. """
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *error) -> bool:
+        return False
+
+
+_off = _Off()
+
+
+def stage(name: str):
+    """ Returns a context manager timing the block it is entered for as one call of the
+    stage name, while timing is on.
+
+    >>> enable(summary=False)
+    >>> with stage('outer'):
+    ...     with stage('inner'):
+    ...         pass
+    >>> stats = summary()
+    >>> stats['outer'].calls, stats['outer'].own <= stats['outer'].total
+    (1, True)
+    >>> disable()
+    """
+    return _Stage(name) if enabled else _off
+
+
+def _timed_version(function: Callable, name: str) -> Callable:
+    @functools.wraps(function)
+    def timed_function(*args, **kwargs):
+        with _Stage(name):
+            return function(*args, **kwargs)
+
+    return timed_function
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """ Returns a decorator marking a function as a stage, called name (by default its
+    qualified name). While timing is off the function is returned as it is.
+
+    A function defined inside another is only timed if timing was on when it was
+    defined.
+    """
+    def decorate(function: Callable) -> Callable:
+        stage_name = name or function.__qualname__
+        timed_function = _timed_version(function, stage_name)
+        if '<locals>' not in function.__qualname__:
+            _registered.append([function, stage_name, timed_function])
+        return timed_function if enabled else function
+
+    return decorate
+
+
+def _swap(to_timed: bool) -> None:
+    """ Puts the timed version of every registered function on its class or module, or
+    the function itself back.
+    """
+    for function, _, timed_function in _registered:
+        owner = sys.modules.get(function.__module__)
+        *path, attribute = function.__qualname__.split('.')
+        for part in path:
+            owner = getattr(owner, part, None)
+        current = getattr(owner, attribute, None)
+        if current is function or current is timed_function:
+            setattr(owner, attribute, timed_function if to_timed else function)
+
+
+def enable(summary: bool = True, trace: Optional[str] = None,
+           profile: Optional[str] = None) -> None:
+    """ Starts timing stages. On exit (or report()), a summary of them is printed to stderr
+    if summary, and they are written as a Chrome trace to the path trace, if given. With
+    profile, the main thread is also run under cProfile, written to that path on exit.
+    """
+    global enabled, _profiler, _report_registered
+    _outputs.update(summary=summary, trace=trace, profile=profile)
+    if profile is not None and _profiler is None:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if not _report_registered:
+        atexit.register(report)
+        _report_registered = True
+    enabled = True
+    _swap(True)
+
+
+def disable() -> None:
+    """ Stops timing stages and forgets those timed so far, without reporting them. """
+    global enabled, _profiler
+    enabled = False
+    _swap(False)
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+    _outputs.update(summary=False, trace=None, profile=None)
+    reset()
+
+
+def reset() -> None:
+    """ Forgets every stage timed so far. """
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+def summary() -> Dict[str, StageStats]:
+    """ Returns the timings of every stage timed so far, keyed by stage. """
+    with _lock:
+        return dict(_stats)
+
+
+def format_summary(stats: Dict[str, StageStats]) -> str:
+    """ Returns stats as a table, the longest stage first. """
+    lines = [f'{"stage":<28} {"calls":>8} {"total ms":>10} {"own ms":>10} {"mean ms":>10} '
+             f'{"max ms":>10}']
+    for name, stage_stats in sorted(stats.items(), key=lambda item: -item[1].total):
+        lines.append(f'{name[:28]:<28} {stage_stats.calls:>8} {stage_stats.total * 1e3:>10.2f} '
+                     f'{stage_stats.own * 1e3:>10.2f} '
+                     f'{stage_stats.total / stage_stats.calls * 1e3:>10.3f} '
+                     f'{stage_stats.longest * 1e3:>10.2f}')
+    return '\n'.join(lines)
+
+
+def write_trace(path) -> None:
+    """ Writes every timed call kept so far to path in the Chrome trace event format. """
+    import json
+
+    pid = os.getpid()
+    with _lock:
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread,
+                   'args': {'name': thread_name}}
+                  for thread, thread_name in _thread_names.items()]
+        events.extend({'name': name, 'cat': 'meatmonitor', 'ph': 'X', 'pid': pid,
+                       'tid': thread, 'ts': (start - _origin) / 1e3, 'dur': duration / 1e3}
+                      for name, start, duration, thread in _events)
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+def report() -> None:
+    """ Writes what enable() was asked for: the summary, the trace and the cProfile. """
+    if _profiler is not None and _outputs['profile'] is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_outputs['profile'])
+    if _outputs['trace'] is not None:
+        write_trace(_outputs['trace'])
+    if _outputs['summary']:
+        print(format_summary(summary()), file=sys.stderr, flush=True)
+
+
+def enable_from_environment() -> None:
+    """ Calls enable() as the environment variables in the module docstring ask, if any
+    are set.
+    """
+    wants_summary = bool(os.environ.get('MEATMONITOR_PROFILE'))
+    trace = os.environ.get('MEATMONITOR_TRACE') or None
+    profile = os.environ.get('MEATMONITOR_CPROFILE') or None
+    if wants_summary or trace or profile:
+        enable(wants_summary, trace, profile)
+
+
+enable_from_environment()
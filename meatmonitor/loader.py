@@ -0,0 +1,296 @@
+"""
+Loads the FAO per capita meat consumption table (assets/percapita.csv) into
+a compact numeric form.
+
+Instead of walking the CSV row by row with .loc, every row is placed into a
+dense (entity, year, meat) float32 array in one vectorized pass, and the
+latest year of every entity is read straight out of it.
+
+The parsed array is also written to a binary cache next to the CSV (see
+load_fao_table), so later launches can memory map it without importing pandas
+or parsing the CSV at all.
+"""
+from typing import TYPE_CHECKING, Dict, List, Optional
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+from meatmonitor.emissions import meat_columns
+from meatmonitor.instrument import timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+weeks_in_a_year = 52
+grams_in_a_kilo = 1000
+kg_per_year_to_g_per_week = grams_in_a_kilo / weeks_in_a_year
+
+cache_version = 1
+# bump whenever the layout or meaning of the cached arrays changes
+
+
+class CountryTable:
+    """
+    The average meat consumption of every entity in the FAO table, one row per entity.
+
+    Attributes:
+        - entities: the entity names, in the order they first appear in the CSV
+        - codes: the ISO code of each entity ('' for aggregates such as 'Africa')
+        - years: the year each row was taken from
+        - meats: the meat type of each column of consumption
+        - consumption: float32 matrix of shape (len(entities), len(meats)) holding the
+        average grams of each meat eaten per person per week
+        - index: maps an entity name to its row in consumption
+
+    Representation Invariants:
+        - len(self.entities) == len(self.codes) == len(self.years) == self.consumption.shape[0]
+        - self.consumption.shape[1] == len(self.meats)
+    """
+    entities: List[str]
+    codes: List[str]
+    years: np.ndarray
+    meats: List[str]
+    consumption: np.ndarray
+    index: Dict[str, int]
+
+    def __init__(self, entities, codes, years, meats, consumption) -> None:
+        self.entities = entities
+        self.codes = codes
+        self.years = years
+        self.meats = meats
+        self.consumption = consumption
+        self.index = {name: row for row, name in enumerate(entities)}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def row(self, entity: str) -> Dict[str, float]:
+        """ Returns the weekly consumption of the given entity keyed by meat type.
+
+        Preconditions:
+            - entity in self.index
+        """
+        values = self.consumption[self.index[entity]]
+        return {meat: float(values[x]) for x, meat in enumerate(self.meats)}
+
+
+class FaoTable:
+    """
+    Every row of the FAO table, unit converted and laid out by entity and year.
+
+    Attributes:
+        - entities: the entity names, in the order they first appear in the CSV
+        - codes: the ISO code of each entity ('' for aggregates)
+        - first_year: the year stored at position 0 of the year axis
+        - meats: the meat type of each entry on the last axis of consumption
+        - consumption: float32 array of shape (len(entities), number of years, len(meats))
+        in grams per person per week, NaN where the CSV has no row for that entity and year
+        - latest: the position on the year axis of each entity's most recent row
+        - index: maps an entity name to its position on the first axis of consumption
+
+    Representation Invariants:
+        - self.consumption.shape == (len(self.entities), self.consumption.shape[1], len(self.meats))
+        - len(self.latest) == len(self.entities)
+    """
+    entities: List[str]
+    codes: List[str]
+    first_year: int
+    meats: List[str]
+    consumption: np.ndarray
+    latest: np.ndarray
+    index: Dict[str, int]
+
+    def __init__(self, entities, codes, first_year, meats, consumption) -> None:
+        self.entities = entities
+        self.codes = codes
+        self.first_year = first_year
+        self.meats = meats
+        self.consumption = consumption
+        present = ~np.isnan(consumption[:, ::-1, 0])
+        self.latest = consumption.shape[1] - 1 - present.argmax(axis=1)
+        self.index = {name: row for row, name in enumerate(entities)}
+
+    @property
+    def years(self) -> np.ndarray:
+        """ The year at each position of the year axis. """
+        return np.arange(self.first_year, self.first_year + self.consumption.shape[1])
+
+    def present(self) -> np.ndarray:
+        """ Returns a boolean (entities, years) array, True where the CSV has a row. """
+        return ~np.isnan(self.consumption[:, :, 0])
+
+    def consumption_in(self, entity: str, year: int) -> Dict[str, float]:
+        """ Returns the weekly consumption of entity in year, keyed by meat type.
+
+        Raises KeyError if the table has no row for that entity and year.
+        """
+        offset = year - self.first_year
+        if entity not in self.index or not 0 <= offset < self.consumption.shape[1]:
+            raise KeyError((entity, year))
+        values = self.consumption[self.index[entity], offset]
+        if np.isnan(values[0]):
+            raise KeyError((entity, year))
+        return {meat: float(values[x]) for x, meat in enumerate(self.meats)}
+
+    def latest_table(self) -> CountryTable:
+        """ Returns a CountryTable holding the most recent row of every entity. """
+        rows = np.arange(len(self.entities))
+        return CountryTable(self.entities, self.codes,
+                            (self.latest + self.first_year).astype(np.int16), self.meats,
+                            np.ascontiguousarray(self.consumption[rows, self.latest]))
+
+
+def fao_table_from_frame(frame: 'pd.DataFrame') -> FaoTable:
+    """ Builds a FaoTable from an already parsed FAO CSV.
+
+    Missing values within a row (e.g. pigmeat in Afghanistan) are treated as no consumption.
+    """
+    import pandas as pd
+
+    entity_of_row, entities = pd.factorize(frame['Entity'], sort=False)
+    years = frame['Year'].to_numpy()
+    first_year = int(years.min())
+
+    values = frame[list(meat_columns.values())].to_numpy(dtype=np.float64)
+    values = np.nan_to_num(values) * kg_per_year_to_g_per_week
+
+    consumption = np.full((len(entities), int(years.max()) - first_year + 1, len(meat_columns)),
+                          np.nan, dtype=np.float32)
+    consumption[entity_of_row, years - first_year] = values
+
+    codes = frame.groupby(entity_of_row, sort=True)['Code'].first().fillna('').tolist()
+    return FaoTable(list(entities), codes, first_year, list(meat_columns), consumption)
+
+
+def latest_by_entity(frame: 'pd.DataFrame') -> CountryTable:
+    """ Keeps the most recent year of every entity in an already parsed FAO table.
+
+    >>> import pandas as pd
+    >>> frame = pd.DataFrame({'Entity': ['A', 'A', 'B'], 'Code': ['AAA', 'AAA', None],
+    ...                       'Year': [2016, 2017, 2017],
+    ...                       **{meat_columns[m]: [52.0, 104.0, 0.0] for m in meat_columns}})
+    >>> table = latest_by_entity(frame)
+    >>> table.entities, table.codes
+    (['A', 'B'], ['AAA', ''])
+    >>> table.row('A')['Beef']
+    2000.0
+    """
+    return fao_table_from_frame(frame).latest_table()
+
+
+@timed('parse csv')
+def read_fao_csv(path) -> FaoTable:
+    """ Parses the FAO CSV at path, without touching the cache. """
+    import pandas as pd
+
+    frame = pd.read_csv(path, usecols=['Entity', 'Code', 'Year', *meat_columns.values()])
+    return fao_table_from_frame(frame)
+
+
+def cache_dir_for(path) -> Path:
+    """ Returns the directory holding the binary cache of the CSV at path. """
+    path = Path(path)
+    return path.with_name(path.stem + '.cache')
+
+
+def _file_hash(path: Path) -> str:
+    """ Returns the sha256 of the file at path. """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_cache(path: Path, cache: Path) -> Optional[FaoTable]:
+    """ Returns the cached table for the CSV at path, or None if the cache is missing or stale.
+
+    A cache whose size and mtime match is used as is. If only the mtime differs (the file
+    was touched or copied), the content hash decides, and the stored mtime is refreshed.
+    A cache of other meat columns than meat_columns (the factor file changed) is stale too.
+    """
+    try:
+        with open(cache / 'meta.json') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    stat = path.stat()
+    if meta.get('version') != cache_version or meta.get('size') != stat.st_size or \
+            meta.get('columns') != list(meat_columns.values()):
+        return None
+    if meta.get('mtime_ns') != stat.st_mtime_ns:
+        if meta.get('sha256') != _file_hash(path):
+            return None
+        meta['mtime_ns'] = stat.st_mtime_ns
+        _write_json(cache / 'meta.json', meta)
+
+    try:
+        consumption = np.load(cache / 'consumption.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if consumption.shape[0] != len(meta['entities']) or consumption.shape[2] != len(meta['meats']):
+        return None
+    return FaoTable(meta['entities'], meta['codes'], meta['first_year'], meta['meats'],
+                    consumption)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """ Atomically replaces the JSON file at path with data, ignoring read only locations. """
+    try:
+        with open(path.with_suffix('.tmp'), 'w') as file:
+            json.dump(data, file)
+        os.replace(path.with_suffix('.tmp'), path)
+    except OSError:
+        pass
+
+
+def _write_cache(path: Path, cache: Path, table: FaoTable) -> None:
+    """ Stores table as the cache of the CSV at path.
+
+    meta.json is written last, so a cache interrupted halfway is never read.
+    """
+    stat = path.stat()
+    try:
+        cache.mkdir(exist_ok=True)
+        (cache / 'meta.json').unlink(missing_ok=True)
+        with open(cache / 'consumption.tmp', 'wb') as file:
+            np.save(file, table.consumption)
+        os.replace(cache / 'consumption.tmp', cache / 'consumption.npy')
+    except OSError:
+        return
+    _write_json(cache / 'meta.json', {'version': cache_version,
+                                      'size': stat.st_size,
+                                      'mtime_ns': stat.st_mtime_ns,
+                                      'sha256': _file_hash(path),
+                                      'entities': table.entities,
+                                      'codes': table.codes,
+                                      'first_year': table.first_year,
+                                      'meats': table.meats,
+                                      'columns': list(meat_columns.values())})
+
+
+@timed('load table')
+def load_fao_table(path, use_cache: bool = True) -> FaoTable:
+    """ Returns every row of the FAO CSV at path.
+
+    With use_cache, a binary copy of the parsed table is kept in cache_dir_for(path),
+    keyed on the CSV's size, mtime and sha256. When it is current it is memory mapped
+    and the CSV is not read (and pandas is not imported); otherwise the CSV is parsed
+    and the cache rewritten.
+    """
+    path = Path(path)
+    if not use_cache:
+        return read_fao_csv(path)
+
+    cache = cache_dir_for(path)
+    table = _read_cache(path, cache)
+    if table is None:
+        table = read_fao_csv(path)
+        _write_cache(path, cache, table)
+    return table
+
+
+def load_country_table(path, use_cache: bool = True) -> CountryTable:
+    """ Returns the latest consumption of every entity in the FAO CSV at path. """
+    return load_fao_table(path, use_cache).latest_table()
@@ -0,0 +1,498 @@
+"""
+The data model and emissions math behind Meat Monitor: the user's country, each
+type of meat they eat, and the user themselves.
+
+This module imports nothing outside the standard library, meatmonitor.emissions and
+meatmonitor.instrument, so batch jobs and servers can use it without a display, and it
+stays quick to import. The country table is only read (and numpy/pandas imported) when
+load_countries() is called.
+"""
+from typing import TYPE_CHECKING, Dict, List, Optional
+import math
+import os
+from meatmonitor.emissions import animal_types, emissions_for, emissions_per_serving_for
+from meatmonitor.instrument import timed
+
+if TYPE_CHECKING:
+    from meatmonitor.batch import CountryBaseline
+    from meatmonitor.loader import CountryTable, FaoTable
+    from meatmonitor.regions import RegionTable, Standing
+    from meatmonitor.uncertainty import FactorSamples, UncertaintyStats
+
+default_csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'assets', 'percapita.csv')
+
+
+class Country:
+    """
+    The country the user is located in.
+
+    Attributes:
+        - name: name of the country
+        - average_consumption: the average meat consumption per year per person
+        by meat type in this country
+        - history: the average consumption in every year of the FAO table, as a
+        (years, animal_types) array view into FaoTable.consumption, NaN in years with no data
+        - first_year: the year of the first row of history
+        - trend_slope: the yearly change in the average person's weekly CO2 emissions,
+        fitted over every year of history
+        - trend_intercept: the fitted average weekly CO2 emissions in first_year
+        - emission_factors: the grams of CO2 per gram of each meat in this country
+        - emissions_per_serving: the grams of CO2 per serving of each meat in this country
+        - average_emissions: the weekly CO2 emissions of the average consumption of each meat
+        - total_average_emissions: the sum of average_emissions over animal_types, in order
+        - history_emissions: the average person's weekly CO2 emissions in every year of
+        history, NaN in years with no data, or None to work them out from history
+
+    Representation Invariants:
+        - name in country_table.index
+        - self.average_emissions[x] == self.emission_factors[x] * self.average_consumption[x]
+
+    Sample Usage:
+    >>> Canada = Country('Canada', {'Beef' :18, 'Pork':24, 'Lamb': 1, 'Poultry': 39,
+    ...                             'Other': 0})
+    >>> Canada.history = [[10.0, 30.0, 20.0, 2.0, 0.5], [11.0, 35.0, 22.0, 1.0, 0.5]]
+    >>> Canada.first_year = 2016
+    >>> Canada.consumption_in(2017)['Poultry']
+    35.0
+    >>> Canada.emissions_in(2017) == sum(Canada.emission_factors[x] * Canada.consumption_in(2017)[x]
+    ...                                  for x in animal_types)
+    True
+    """
+    name: str
+    average_consumption: Dict[str, int]
+    history: Optional[object]
+    first_year: Optional[int]
+    trend_slope: Optional[float]
+    trend_intercept: Optional[float]
+    emission_factors: Dict[str, float]
+    emissions_per_serving: Dict[str, float]
+    average_emissions: Dict[str, float]
+    total_average_emissions: float
+    history_emissions: Optional[object]
+    __slots__ = ('name', 'average_consumption', 'history', 'first_year', 'trend_slope',
+                 'trend_intercept', 'emission_factors', 'emissions_per_serving',
+                 'average_emissions', 'total_average_emissions', 'history_emissions')
+
+    def __init__(self, name, average_consumption, average_emissions=None,
+                 total_average_emissions=None) -> None:
+        """
+        Initialize a country whose average person eats average_consumption. The emissions
+        of that consumption are worked out here unless given, as load_countries gives them
+        from country_baseline.
+        """
+        self.name = name
+        self.average_consumption = average_consumption
+        self.history = None
+        self.first_year = None
+        self.trend_slope = None
+        self.trend_intercept = None
+        self.emission_factors = emissions_for(name)
+        self.emissions_per_serving = emissions_per_serving_for(name)
+        if average_emissions is None:
+            average_emissions = {x: self.emission_factors[x] * average_consumption[x]
+                                 for x in animal_types}
+            total_average_emissions = sum([average_emissions[x] for x in animal_types])
+        self.average_emissions = average_emissions
+        self.total_average_emissions = total_average_emissions
+        self.history_emissions = None
+    # The following is generic class init, as seen in lecture
+
+    def consumption_in(self, year: int) -> Dict[str, float]:
+        """ Returns the average consumption in this country in year, keyed by meat type.
+
+        Raises KeyError if there is no data for that year.
+        """
+        if self.history is None or not 0 <= year - self.first_year < len(self.history):
+            raise KeyError(year)
+        values = self.history[year - self.first_year]
+        if math.isnan(values[0]):
+            raise KeyError(year)
+        return {animal_types[x]: float(values[x]) for x in range(len(animal_types))}
+
+    def emissions_in(self, year: int) -> float:
+        """ Returns the average person's weekly CO2 emissions in this country in year.
+
+        Raises KeyError if there is no data for that year.
+        """
+        if self.history_emissions is None:
+            consumption = self.consumption_in(year)
+            return sum([self.emission_factors[x] * consumption[x] for x in animal_types])
+        if not 0 <= year - self.first_year < len(self.history_emissions):
+            raise KeyError(year)
+        emissions = float(self.history_emissions[year - self.first_year])
+        if math.isnan(emissions):
+            raise KeyError(year)
+        return emissions
+
+    def trend_emissions(self, year: int) -> float:
+        """ Returns the average person's weekly CO2 emissions in year, read off the trend line.
+
+        Preconditions:
+            - self.trend_slope is not None
+        """
+        return self.trend_intercept + self.trend_slope * (year - self.first_year)
+
+
+countries = {}
+country_table: Optional['CountryTable'] = None
+fao_table: Optional['FaoTable'] = None
+region_table: Optional['RegionTable'] = None
+# countries is in grams of animal eaten per week, once adjusted
+
+country_baseline: Optional['CountryBaseline'] = None
+# the emissions of the average person of every entity of country_table, per meat and in total
+
+history_baseline: Optional['CountryBaseline'] = None
+# the same for every entity and year of fao_table
+
+
+@timed('build countries')
+def load_countries(path=default_csv_path) -> Dict[str, Country]:
+    """ Fills countries with the latest consumption of every entity in the FAO CSV at path,
+    along with its full history and emissions trend, and returns it. Also sets up
+    region_table, the region averages and percentiles of every year, and the emissions of
+    every entity's average person, which every Country, Animal and User reads rather than
+    working out again.
+    """
+    global country_table, fao_table, region_table, country_baseline, history_baseline
+    from meatmonitor.batch import CountryBaseline
+    from meatmonitor.loader import load_fao_table
+    from meatmonitor.regions import build_region_table
+    from meatmonitor.timeseries import fit_trends, year_baseline
+
+    fao_table = load_fao_table(path)
+    country_table = fao_table.latest_table()
+    country_baseline = CountryBaseline(country_table.consumption, country_table.entities)
+    history_baseline = year_baseline(fao_table)
+    trend = fit_trends(fao_table, history_baseline)
+    region_table = build_region_table(fao_table, history_baseline)
+    emissions = country_baseline.country_emissions.tolist()
+    totals = country_baseline.total_country_emissions.tolist()
+    for row, name in enumerate(country_table.entities):
+        country = Country(name, country_table.row(name), dict(zip(animal_types, emissions[row])),
+                          totals[row])
+        country.history = fao_table.consumption[row]
+        country.history_emissions = history_baseline.total_country_emissions[row]
+        country.first_year = fao_table.first_year
+        country.trend_slope = float(trend.slope[row])
+        country.trend_intercept = float(trend.intercept[row])
+        countries[name] = country
+    return countries
+
+
+class Animal:
+    """
+    A type of meat the user eats weekly.
+
+    Attributes:
+        - name: the name of the type of meat
+        - location: the country the user resides in
+        - weekly_consumption: servings of this meat user consumes per week
+        - country_emissions: Average C02 emissions produced from consumption of
+        this animal in this country in grams per week, read from the country's
+        average_emissions
+        - consumption_difference: the difference between the user's meat consumption and the
+        average person's meat consumption in the user's country in this particular meat type
+        - consumption_comparison: the percentage difference between the user's meat
+        consumption and the average person's meat consumption in the user's country in
+        this particular meat type
+        - weekly_emissions: the user's weekly emissions from consuming this particular meat type
+        - new_consumption: the consumer's new weekly consumption of this meat type
+        - new_emissions: the CO2 emissions of the consumer's new weekly consumption of this
+        meat type
+        - emission_reduction: the amount of CO2 emissions reduced between the original and new
+        consumer's weekly consumption of this meat type
+        - emission_reduction_percentage: the percentage of CO2 emissions reduced between the
+        orginal and new consumer's weekly consumption of this meat type
+
+    Sample Usage:
+    >>> Canada = Country('Canada', {'Beef' :12.0, 'Pork':24, 'Lamb': 1, 'Poultry': 39,
+    ...                             'Other': 0})
+    >>> Beef = Animal('Beef', Canada, 15.0)
+    >>> Beef.find_stats()
+    >>> round(Beef.weekly_emissions, 1)
+    127219.5
+    >>> Beef.consumption_difference
+    3.0
+    """
+    name: str
+    location: Country
+    weekly_consumption: float
+    country_emissions: float
+
+    consumption_difference: float
+    consumption_comparison: float
+    weekly_emissions: float
+
+    new_consumption: float
+    new_emissions: float
+    emission_reduction: float
+    emission_reduction_percentage: float
+    __slots__ = ('name', 'location', 'weekly_consumption', 'country_emissions',
+                 'consumption_difference', 'consumption_comparison', 'weekly_emissions',
+                 'new_consumption', 'new_emissions', 'emission_reduction',
+                 'emission_reduction_percentage')
+    # Attributes live in fixed slots rather than a per-instance __dict__, which
+    # matters when many users (an Animal per meat each) are held at once
+
+    def __init__(self, name, location, weekly_consumption) -> None:
+        """
+        Initialize a new meat type that the user consumes with a given name, the user's country,
+        and its yearly consumption of that meat.
+
+        Preconditions:
+            - name in animal_types
+        """
+        self.name = name
+        self.location = location
+        self.weekly_consumption = weekly_consumption
+        self.country_emissions = self.location.average_emissions[self.name]
+
+    def find_stats(self) -> None:
+        """
+        Computes the weekly_emissions, consumption_difference, and consumption_comparison
+        of the given Animal Object.
+        """
+        self.weekly_emissions = self.weekly_consumption * \
+                                self.location.emissions_per_serving[self.name]
+        self.consumption_difference = self.weekly_consumption - \
+                                      self.location.average_consumption[self.name]
+        if self.location.average_consumption[self.name] != 0:
+            self.consumption_comparison = 100 * self.consumption_difference / \
+                                          self.location.average_consumption[self.name]
+        else:
+            self.consumption_comparison = 0
+
+    def consumption_goals(self, new_consumption) -> None:
+        """
+        Computes the new_emissions, emission_reduction, and emission_reduction_percentage
+        of the given Animal Object.
+        """
+        self.new_consumption = new_consumption
+        self.new_emissions = new_consumption * self.location.emissions_per_serving[self.name]
+        self.emission_reduction = self.weekly_emissions - self.new_emissions
+        if self.weekly_emissions != 0:
+            self.emission_reduction_percentage = 100 * self.emission_reduction / \
+                                                 self.weekly_emissions
+        else:
+            self.emission_reduction_percentage = 0
+
+
+class User:
+    """
+    A consumer of Meat Monitor.
+
+    Attributes:
+        - name: name of the user
+        - location: the country the user is located in
+        - animal_list: the type of meats that the user eats on a weekly basis
+        - total_emissions: the total CO2 emissions emitted to produce the user's meat consumption
+        - total_country_emissions: the total CO2 emissions emitted to produce the average
+        person's meat consumption in the user's country
+        - total_emissions_comparison: the difference between the user's CO2 emissions from
+        meat consumption and the average person's CO2 emissions from meat consumption in the
+        user's country
+        - total_emissions_percentage: the percentage difference between the user's CO2 emissions
+        from meat consumption and the average person's CO2 emissions from meat consumption in
+        the user's country
+        - new_total_emissions: the total CO2 emissions in the user's goal meat consumption
+        - emission_reduction: the CO2 emissions reduced in the user's goal meat consumption
+        compared to his or her original meat consumption.
+        - emission_reduction_percentage: the percentage of total CO2 emissions reduced in the
+        user's goal meat consumption compared to his or her original meat consumption.
+
+    Sample Usage:
+    >>> _ = load_countries()
+    >>> Jeremy = User('Jeremy', 'Canada')
+    >>> Jeremy.create_animal_classes([2, 3, 5, 7, 0])
+    >>> Jeremy.find_stats()
+    >>> Jeremy.total_emissions
+    50955.75
+    >>> User('Ann', 'Untied States').location.name
+    'United States'
+
+    """
+    name: str
+    location: Country
+    animal_list: Dict[str, Animal]
+    total_emissions: float
+    total_country_emissions: float
+    total_emissions_comparison: float
+    total_emissions_percentage: float
+    total_emissions_list: List[float]
+    total_country_emissions_list: List[float]
+
+    new_total_emissions: float
+    new_total_emissions_list: List[float]
+    emission_reduction: float
+    emission_reduction_percentage: float
+    __slots__ = ('name', 'location', 'animal_list', 'total_emissions',
+                 'total_country_emissions', 'total_emissions_comparison',
+                 'total_emissions_percentage', 'total_emissions_list',
+                 'total_country_emissions_list', 'new_total_emissions',
+                 'new_total_emissions_list', 'emission_reduction',
+                 'emission_reduction_percentage')
+
+    def __init__(self, name, location) -> None:
+        """
+        Initialize a new user with a given name and country. The country may also be
+        given by its ISO code, or misspelled (see meatmonitor.search.CountryIndex.resolve).
+
+        Raises KeyError if location names no country clearly.
+
+        Preconditions:
+            - load_countries() has been called
+        """
+        self.name = name
+        if location not in countries:
+            from meatmonitor.search import country_index
+
+            resolved = country_index().resolve(location)
+            if resolved is None:
+                raise KeyError(f'unknown country: {location!r}')
+            location = country_table.entities[resolved]
+        self.location = countries[location]
+        self.animal_list = {}
+
+    def create_animal_classes(self, servings: [float]) -> None:
+        """
+        Fills animal_list with meat consumption values for each animal key.
+        """
+        for x in range(0, len(animal_types)):
+            self.animal_list[animal_types[x]] = Animal(animal_types[x], self.location, servings[x])
+
+    @timed('create_goals')
+    def create_goals(self, servings: [float]) -> None:
+        """
+        Creates second list with new meat consumption goals for each animal.
+        """
+        for x in range(0, len(self.animal_list)):
+            self.animal_list[animal_types[x]].consumption_goals(servings[x])
+
+    @timed('find_stats')
+    def find_stats(self) -> None:
+        """
+        Computes total_emissions, total_country_emissions, total_emissions_comparison,
+        and total_emissions_percentage.
+        """
+        for animal in self.animal_list:
+            self.animal_list[animal].find_stats()
+
+        self.total_emissions = sum([self.animal_list[animal].weekly_emissions \
+                                    for animal in self.animal_list])
+        self.total_country_emissions = self.location.total_average_emissions
+
+        self.total_emissions_comparison = self.total_emissions - \
+                                          self.total_country_emissions
+        self.total_emissions_percentage = 100 * self.total_emissions_comparison / \
+                                          self.total_country_emissions
+
+    def compare_with_year(self, year: int) -> float:
+        """
+        Returns total_emissions_percentage as it would be against the average person in the
+        user's country in the given year, rather than the latest year.
+
+        Preconditions:
+            - self.find_stats() has been called
+            - year in the user's country's history
+        """
+        country_emissions = self.location.emissions_in(year)
+        return 100 * (self.total_emissions - country_emissions) / country_emissions
+
+    def compare_with_trend(self, year: int) -> float:
+        """
+        Returns total_emissions_percentage as it would be against the trend line of the
+        average person's emissions in the user's country, evaluated at the given year.
+
+        Preconditions:
+            - self.find_stats() has been called
+        """
+        country_emissions = self.location.trend_emissions(year)
+        return 100 * (self.total_emissions - country_emissions) / country_emissions
+
+    def standings(self, year: Optional[int] = None) -> List['Standing']:
+        """
+        Returns where the user's weekly emissions stand against the average person in their
+        country, then in each region it lies in and the world (see meatmonitor.regions), in
+        year, by default the latest year of their country's data.
+
+        Preconditions:
+            - self.find_stats() has been called
+        """
+        return region_table.standings(self.total_emissions, self.location.name, year)
+
+    def uncertainty(self, samples: Optional['FactorSamples'] = None) -> 'UncertaintyStats':
+        """
+        Returns the mean and confidence interval of total_emissions, total_emissions_percentage
+        and, once goals have been set, emission_reduction_percentage, with the emission factors
+        and serving sizes drawn from their ranges (see meatmonitor.uncertainty).
+
+        Preconditions:
+            - self.create_animal_classes() has been called
+        """
+        from meatmonitor.uncertainty import simulate
+
+        animals = [self.animal_list[animal] for animal in animal_types]
+        goals = None
+        if all(hasattr(animal, 'new_consumption') for animal in animals):
+            goals = [[animal.new_consumption for animal in animals]]
+        return simulate([[animal.weekly_consumption for animal in animals]],
+                        [country_table.index[self.location.name]], country_baseline, goals,
+                        samples)
+
+    @timed('goal_stats')
+    def goal_stats(self) -> None:
+        """
+        Computes new_total_emissions, emission_reduction, and emission_reduction_percentage.
+        """
+        self.new_total_emissions = sum([self.animal_list[animal].new_emissions \
+                                        for animal in self.animal_list])
+        self._reduction_stats()
+
+    def change_goal(self, animal: str, servings: float) -> None:
+        """
+        Sets the goal servings of one meat, as moving its slider does. Only that meat's
+        Animal is worked out again; new_total_emissions is then summed again from every
+        Animal's new_emissions, as goal_stats does, rather than moved by the change in
+        one of them, so the figures are exactly those of create_goals and goal_stats
+        however many changes are made.
+
+        Preconditions:
+            - self.find_stats() and self.goal_stats() have been called
+            - animal in self.animal_list
+
+        >>> _ = load_countries()
+        >>> Jeremy = User('Jeremy', 'Canada')
+        >>> Jeremy.create_animal_classes([2, 3, 5, 7, 0])
+        >>> Jeremy.find_stats()
+        >>> Jeremy.create_goals([2, 3, 5, 7, 0])
+        >>> Jeremy.goal_stats()
+        >>> for animal, servings in [('Beef', 0), ('Lamb', 4), ('Beef', 1), ('Pork', 2)]:
+        ...     Jeremy.change_goal(animal, servings)
+        >>> changed = [Jeremy.new_total_emissions, Jeremy.emission_reduction_percentage]
+        >>> Jeremy.create_goals([1, 3, 2, 4, 0])
+        >>> Jeremy.goal_stats()
+        >>> recomputed = [Jeremy.new_total_emissions, Jeremy.emission_reduction_percentage]
+        >>> changed == recomputed
+        True
+        """
+        self.animal_list[animal].consumption_goals(servings)
+        self.goal_stats()
+
+    def _reduction_stats(self) -> None:
+        """ Computes emission_reduction and emission_reduction_percentage from
+        new_total_emissions.
+        """
+        self.emission_reduction = self.total_emissions - self.new_total_emissions
+        if self.total_emissions != 0:
+            self.emission_reduction_percentage = 100 * self.emission_reduction / \
+                                                 self.total_emissions
+        else:
+            self.emission_reduction_percentage = 0
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,293 @@
+"""
+Compares a person's emissions with the world regions their country belongs to,
+using the FAO table's own aggregate rows ('World', 'Africa', 'Eastern Africa',
+...).
+
+region_parts places every country of the table in one subregion, every
+subregion in one continent and every continent in the World. From it and the
+FAO table, build_region_table computes, in one vectorized pass at load, for every
+region and every year:
+
+    - the weekly CO2 emissions of the region's average person, from its FAO
+    aggregate row (which FAO weights by population)
+    - the percentiles of the emissions of the average person of each of its countries
+    - those emissions sorted, so ranking a person among the region's countries is a
+    binary search
+
+The table holds one average per country, not individual diets, so within their
+own country a person is compared with its average person, and within a region
+they are ranked among its countries' average persons. FAO's aggregate rows stop
+a few years before its country rows (2013 against 2017), so each region is
+compared in the latest year up to the one asked for in which it has an average.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from meatmonitor.batch import CountryBaseline
+from meatmonitor.loader import FaoTable
+
+region_parts = {
+    'World': ['Africa', 'Americas', 'Asia', 'Europe', 'Oceania'],
+    'Africa': ['Eastern Africa', 'Middle Africa', 'Northern Africa', 'Southern Africa',
+               'Western Africa'],
+    'Americas': ['Caribbean', 'Central America', 'Northern America', 'South America'],
+    'Asia': ['Asia, Central', 'Eastern Asia', 'South Eastern Asia', 'Southern Asia',
+             'Western Asia'],
+    'Europe': ['Eastern Europe', 'Northern Europe', 'Southern Europe', 'Europe, Western'],
+    'Oceania': ['Australia & New Zealand', 'Melanesia', 'Micronesia (region)', 'Polynesia'],
+    'Eastern Africa': ['Djibouti', 'Ethiopia', 'Ethiopia PDR', 'Kenya', 'Madagascar', 'Malawi',
+                       'Mauritius', 'Mozambique', 'Rwanda', 'Tanzania', 'Uganda', 'Zambia',
+                       'Zimbabwe'],
+    'Middle Africa': ['Angola', 'Cameroon', 'Central African Republic', 'Chad', 'Congo',
+                      'Gabon', 'Sao Tome and Principe'],
+    'Northern Africa': ['Algeria', 'Egypt', 'Morocco', 'Sudan', 'Sudan (former)', 'Tunisia'],
+    'Southern Africa': ['Botswana', 'Eswatini', 'Lesotho', 'Namibia', 'South Africa'],
+    'Western Africa': ['Benin', 'Burkina Faso', 'Cape Verde', "Cote d'Ivoire", 'Gambia',
+                       'Ghana', 'Guinea', 'Guinea-Bissau', 'Liberia', 'Mali', 'Mauritania',
+                       'Niger', 'Nigeria', 'Senegal', 'Sierra Leone', 'Togo'],
+    'Caribbean': ['Antigua and Barbuda', 'Bahamas', 'Barbados', 'Cuba', 'Dominica',
+                  'Dominican Republic', 'Grenada', 'Haiti', 'Jamaica', 'Netherlands Antilles',
+                  'Saint Kitts and Nevis', 'Saint Lucia', 'Saint Vincent and the Grenadines',
+                  'Trinidad and Tobago'],
+    'Central America': ['Belize', 'Costa Rica', 'El Salvador', 'Guatemala', 'Honduras',
+                        'Mexico', 'Nicaragua', 'Panama'],
+    'Northern America': ['Bermuda', 'Canada', 'United States'],
+    'South America': ['Argentina', 'Bolivia', 'Brazil', 'Chile', 'Colombia', 'Ecuador',
+                      'Guyana', 'Paraguay', 'Peru', 'Suriname', 'Uruguay', 'Venezuela'],
+    'Asia, Central': ['Kazakhstan', 'Kyrgyzstan', 'Tajikistan', 'Turkmenistan', 'Uzbekistan'],
+    'Eastern Asia': ['China', 'Hong Kong', 'Japan', 'Macao', 'Mongolia', 'North Korea',
+                     'South Korea', 'Taiwan'],
+    'South Eastern Asia': ['Brunei', 'Cambodia', 'Indonesia', 'Laos', 'Malaysia', 'Myanmar',
+                           'Philippines', 'Thailand', 'Timor', 'Vietnam'],
+    'Southern Asia': ['Afghanistan', 'Bangladesh', 'India', 'Iran', 'Maldives', 'Nepal',
+                      'Pakistan', 'Sri Lanka'],
+    'Western Asia': ['Armenia', 'Azerbaijan', 'Cyprus', 'Georgia', 'Iraq', 'Israel', 'Jordan',
+                     'Kuwait', 'Lebanon', 'Oman', 'Saudi Arabia', 'Turkey',
+                     'United Arab Emirates', 'Yemen'],
+    'Eastern Europe': ['Belarus', 'Bulgaria', 'Czechia', 'Czechoslovakia', 'Hungary',
+                       'Moldova', 'Poland', 'Romania', 'Russia', 'Slovakia', 'Ukraine', 'USSR'],
+    'Northern Europe': ['Denmark', 'Estonia', 'Finland', 'Iceland', 'Ireland', 'Latvia',
+                        'Lithuania', 'Norway', 'Sweden', 'United Kingdom'],
+    'Southern Europe': ['Albania', 'Bosnia and Herzegovina', 'Croatia', 'Greece', 'Italy',
+                        'Malta', 'Montenegro', 'North Macedonia', 'Portugal', 'Serbia',
+                        'Serbia and Montenegro', 'Slovenia', 'Spain', 'Yugoslavia'],
+    'Europe, Western': ['Austria', 'Belgium', 'Belgium-Luxembourg', 'France', 'Germany',
+                        'Luxembourg', 'Netherlands', 'Switzerland'],
+    'Australia & New Zealand': ['Australia', 'New Zealand'],
+    'Melanesia': ['Fiji', 'New Caledonia', 'Solomon Islands', 'Vanuatu'],
+    'Micronesia (region)': ['Kiribati'],
+    'Polynesia': ['French Polynesia', 'Samoa'],
+}
+# the parts of every region, following the UN M49 regions FAO reports by; former
+# countries are placed where they were, and only have data in the years they existed
+
+percentile_levels = [10, 25, 50, 75, 90]
+# the percentiles kept for every region and year
+
+
+class Standing:
+    """
+    Where a person's weekly CO2 emissions stand in one area: their country, one of its
+    regions or the world.
+
+    Attributes:
+        - area: the name of the country or region
+        - year: the year of the averages compared with
+        - average: the weekly CO2 emissions of the area's average person
+        - percentage: how much more the person emits than that average, as a percentage of
+        it (negative if they emit less)
+        - percentile: the percentage of the area's countries whose average person emits less
+        than the person, or None if the area is their country
+    """
+    area: str
+    year: int
+    average: float
+    percentage: float
+    percentile: Optional[float]
+
+    def __init__(self, area, year, average, percentage, percentile=None) -> None:
+        self.area = area
+        self.year = year
+        self.average = average
+        self.percentage = percentage
+        self.percentile = percentile
+
+    def __repr__(self) -> str:
+        percentile = '' if self.percentile is None else f', percentile={self.percentile:.1f}'
+        return f'Standing({self.area!r}, {self.year}, percentage={self.percentage:.1f}' \
+               f'{percentile})'
+
+
+class RegionTable:
+    """
+    The averages and spread of per capita emissions in every region, in every year.
+
+    Attributes:
+        - regions: the name of every region, the World first
+        - region_rows: the row of each region in the FAO table
+        - parent: the position in regions of each region's parent, -1 for the World
+        - region_of: the position in regions of the subregion of each entity of the FAO
+        table, -1 for entities that are not countries
+        - index: maps an entity name to its row in the FAO table
+        - first_year: the year at position 0 of every year axis
+        - latest: the position on the year axis of each entity's most recent data
+        - emissions: the weekly CO2 emissions of the average person of every entity in every
+        year, shape (entities, years), NaN in years with no data
+        - average: the emissions of the average person of every region, shape (regions, years)
+        - last_average: the position on the year axis of the latest year, up to each year,
+        in which every region has an average, -1 if there is none, shape (regions, years)
+        - percentiles: the percentile_levels of the emissions of every region's countries,
+        shape (len(percentile_levels), regions, years)
+        - sorted_emissions: the emissions of every region's countries in ascending order,
+        shape (regions, entities, years), NaN after the last country with data
+        - counts: how many of every region's countries have data, shape (regions, years)
+
+    Representation Invariants:
+        - len(self.regions) == len(self.region_rows) == len(self.parent)
+        - self.average.shape == self.counts.shape == (len(self.regions), self.emissions.shape[1])
+    """
+    regions: List[str]
+    region_rows: np.ndarray
+    parent: np.ndarray
+    region_of: np.ndarray
+    index: Dict[str, int]
+    first_year: int
+    latest: np.ndarray
+    emissions: np.ndarray
+    average: np.ndarray
+    last_average: np.ndarray
+    percentiles: np.ndarray
+    sorted_emissions: np.ndarray
+    counts: np.ndarray
+
+    def __init__(self, regions, region_rows, parent, region_of, index, first_year, latest,
+                 emissions, average, last_average, percentiles, sorted_emissions,
+                 counts) -> None:
+        self.regions = regions
+        self.region_rows = region_rows
+        self.parent = parent
+        self.region_of = region_of
+        self.index = index
+        self.first_year = first_year
+        self.latest = latest
+        self.emissions = emissions
+        self.average = average
+        self.last_average = last_average
+        self.percentiles = percentiles
+        self.sorted_emissions = sorted_emissions
+        self.counts = counts
+
+    def regions_of(self, entity: str) -> List[int]:
+        """ Returns the positions in regions of every region entity lies in, smallest first. """
+        regions = []
+        region = self.region_of[self.index[entity]]
+        while region >= 0:
+            regions.append(int(region))
+            region = self.parent[region]
+        return regions
+
+    def percentile_rank(self, emissions, region: int, year: int):
+        """ Returns the percentage of region's countries whose average person emitted less
+        than emissions (a number or an array of them) in year, or NaN if none have data.
+        """
+        offset = year - self.first_year
+        count = self.counts[region, offset]
+        if count == 0:
+            return np.full(np.shape(emissions), np.nan)[()]
+        below = np.searchsorted(self.sorted_emissions[region, :count, offset], emissions)
+        return 100 * below / count
+
+    def standings(self, emissions: float, entity: str,
+                  year: Optional[int] = None) -> List[Standing]:
+        """ Returns where a person in entity with the given weekly emissions stands in
+        entity itself in year, then in each of its regions up to the World, each in the
+        latest year up to year it has an average for (leaving out any with none). The year
+        defaults to the latest year entity has data for.
+
+        >>> from meatmonitor import model
+        >>> _ = model.load_countries()
+        >>> model.region_table.standings(50955.75, 'Canada') # doctest: +NORMALIZE_WHITESPACE
+        [Standing('Canada', 2017, percentage=0.5),
+         Standing('Northern America', 2013, percentage=-41.7, percentile=0.0),
+         Standing('Americas', 2013, percentage=-27.3, percentile=75.0),
+         Standing('World', 2013, percentage=84.1, percentile=79.3)]
+        """
+        row = self.index[entity]
+        if year is None:
+            year = int(self.latest[row]) + self.first_year
+        offset = year - self.first_year
+        if not 0 <= offset < self.emissions.shape[1]:
+            return []
+
+        standings = []
+        if not np.isnan(self.emissions[row, offset]):
+            average = float(self.emissions[row, offset])
+            standings.append(Standing(entity, year, average,
+                                      100 * (emissions - average) / average))
+        for region in self.regions_of(entity):
+            last = self.last_average[region, offset]
+            if last < 0:
+                continue
+            average = float(self.average[region, last])
+            standings.append(Standing(self.regions[region], int(last) + self.first_year,
+                                      average, 100 * (emissions - average) / average,
+                                      float(self.percentile_rank(emissions, region,
+                                                                 int(last) + self.first_year))))
+        return standings
+
+
+def build_region_table(fao: FaoTable, baseline: Optional[CountryBaseline] = None) -> RegionTable:
+    """ Returns the RegionTable of fao. Pass baseline (from timeseries.year_baseline) to
+    reuse it.
+
+    Parts of region_parts missing from fao are left out.
+    """
+    if baseline is None:
+        baseline = CountryBaseline(fao.consumption, fao.entities)
+    emissions = baseline.total_country_emissions
+
+    regions = [name for name in region_parts if name in fao.index]
+    position = {name: x for x, name in enumerate(regions)}
+    parent = np.full(len(regions), -1, dtype=np.intp)
+    region_of = np.full(len(fao.entities), -1, dtype=np.intp)
+    members = np.zeros((len(regions), len(fao.entities)), dtype=bool)
+    for region in reversed(regions):
+        for part in region_parts[region]:
+            if part in position:
+                parent[position[part]] = position[region]
+                members[position[region]] |= members[position[part]]
+            elif part in fao.index:
+                region_of[fao.index[part]] = position[region]
+                members[position[region], fao.index[part]] = True
+    # Subregions come after their continent in region_parts, so walking it backwards fills
+    # every part's members before its region takes them in
+
+    region_rows = np.array([fao.index[name] for name in regions], dtype=np.intp)
+    average = emissions[region_rows]
+    years = np.arange(emissions.shape[1])
+    last_average = np.maximum.accumulate(np.where(np.isnan(average), -1, years), axis=1)
+    member_emissions = np.where(members[:, :, np.newaxis], emissions[np.newaxis], np.nan)
+    sorted_emissions = np.sort(member_emissions, axis=1)
+    counts = (~np.isnan(member_emissions)).sum(axis=1)
+    return RegionTable(regions, region_rows, parent, region_of, fao.index, fao.first_year,
+                       fao.latest, emissions, average, last_average,
+                       sorted_percentiles(sorted_emissions, counts), sorted_emissions, counts)
+
+
+def sorted_percentiles(sorted_emissions: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """ Returns the percentile_levels of every region and year, interpolated between the
+    countries' sorted emissions as np.nanpercentile does, NaN where no country has data.
+    Reading them off the sorted array is much quicker than np.nanpercentile.
+
+    >>> values = np.array([[[1.0], [2.0], [4.0], [np.nan]]])
+    >>> sorted_percentiles(values, np.array([[3]]))[:, 0, 0].tolist()
+    [1.2, 1.5, 2.0, 3.0, 3.6]
+    """
+    position = (counts - 1)[np.newaxis] * np.array(percentile_levels)[:, None, None] / 100
+    below = np.floor(position).astype(np.intp)
+    fraction = position - below
+    below = np.clip(below, 0, None)
+    above = np.minimum(below + 1, np.maximum(counts - 1, 0)[np.newaxis])
+    low = np.take_along_axis(sorted_emissions[np.newaxis], below[:, :, np.newaxis], axis=2)
+    high = np.take_along_axis(sorted_emissions[np.newaxis], above[:, :, np.newaxis], axis=2)
+    percentiles = low[:, :, 0] + fraction * (high[:, :, 0] - low[:, :, 0])
+    return np.where(counts[np.newaxis] > 0, percentiles, np.nan)
@@ -0,0 +1,186 @@
+"""
+Works out what a diet shift would do to emissions if a whole population made it,
+in every country and region of the FAO table and every year of it at once.
+
+A DietShift is a rule applied to the average person's weekly consumption: cut
+some meats by a fraction, move a fraction of one meat to another (e.g. half of
+beef to poultry, gram for gram), and cap the servings of some meats. Cuts and
+moves are linear, so they are one meats x meats matrix; caps are applied after.
+
+simulate_shifts applies a list of shifts to FaoTable.consumption, the dense
+(entity, year, meat) array, and returns the change in the weekly emissions of
+the average person of every entity in every year under each shift. It works a
+meat at a time: the grams of one meat after a chunk of shifts, for every entity
+and year, are one (shifts x meats) @ (meats x entity-years) matrix product, which
+is capped, weighted by the meat's factor and added to the totals in place. Added
+meat by meat, the totals are summed in the same order as batch.sum_columns, so a
+shift that changes nothing gives a delta of exactly 0. Regions come
+for free: FAO's aggregate rows ('World', 'Africa', ...) hold their population
+weighted average consumption, so a region's figures are those of its own row.
+(FAO's aggregate rows stop in 2013, its country rows in 2017.)
+
+The table holds per capita figures only. Totals need the number of people in
+every entity and year, which can be passed in as population; without it only
+per capita changes are given.
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from meatmonitor.batch import CountryBaseline
+from meatmonitor.emissions import animal_types, serving_size_per_animal
+from meatmonitor.loader import FaoTable
+
+default_chunk_size = 64
+# shifts applied at a time; each takes roughly 100 KB of working memory on the FAO table
+
+
+class DietShift:
+    """
+    A change made by the average person of every entity to their weekly consumption.
+
+    Attributes:
+        - transfer: (len(animal_types), len(animal_types)) array; the grams of each meat
+        after the shift are consumption @ transfer
+        - cap: the most grams of each meat eaten a week after the shift, inf where uncapped
+
+    Sample Usage:
+    >>> shift = DietShift(swap={('Beef', 'Poultry'): 0.5}, cap_servings={'Lamb': 1})
+    >>> shift.apply(np.array([100.0, 50.0, 0.0, 300.0, 0.0])).tolist()
+    [50.0, 100.0, 0.0, 100.0, 0.0]
+    """
+    transfer: np.ndarray
+    cap: np.ndarray
+
+    def __init__(self, cut: Optional[Dict[str, float]] = None,
+                 swap: Optional[Dict[Tuple[str, str], float]] = None,
+                 cap_servings: Optional[Dict[str, float]] = None) -> None:
+        """
+        Initialize a shift that cuts each meat in cut by the given fraction, then moves the
+        given fraction of what is left of the first meat of each pair in swap to the second,
+        then caps each meat in cap_servings at that many servings a week.
+
+        Preconditions:
+            - all(fraction <= 1 for fraction in cut.values()) (a negative fraction grows
+            the meat instead)
+            - the fractions in swap moved out of any one meat add up to at most 1
+        """
+        position = {animal: x for x, animal in enumerate(animal_types)}
+        kept = np.ones(len(animal_types))
+        for animal, fraction in (cut or {}).items():
+            kept[position[animal]] = 1 - fraction
+        self.transfer = np.diag(kept)
+        for (source, target), fraction in (swap or {}).items():
+            moved = fraction * kept[position[source]]
+            self.transfer[position[source], position[source]] -= moved
+            self.transfer[position[source], position[target]] += moved
+        self.cap = np.full(len(animal_types), np.inf)
+        for animal, servings in (cap_servings or {}).items():
+            self.cap[position[animal]] = servings * serving_size_per_animal[animal]
+
+    def apply(self, consumption: np.ndarray) -> np.ndarray:
+        """ Returns consumption (grams of each meat on its last axis) after the shift. """
+        return np.minimum(consumption @ self.transfer, self.cap)
+
+
+class ShiftResult:
+    """
+    The effect of every shift on the average person of every entity, in every year.
+
+    Attributes:
+        - entities: the entity names, as in the FAO table
+        - index: maps an entity name to its row
+        - first_year: the year at position 0 of every year axis
+        - emissions: the weekly CO2 emissions of the average person before the shifts,
+        shape (entities, years), NaN in years with no data
+        - delta: the change in them under each shift, shape (shifts, entities, years)
+        - total_delta: delta times the population of the entity and year, or None if no
+        population was given
+
+    Representation Invariants:
+        - self.delta.shape[1:] == self.emissions.shape
+    """
+    entities: List[str]
+    index: Dict[str, int]
+    first_year: int
+    emissions: np.ndarray
+    delta: np.ndarray
+    total_delta: Optional[np.ndarray]
+
+    def __init__(self, entities, index, first_year, emissions, delta, population=None) -> None:
+        self.entities = entities
+        self.index = index
+        self.first_year = first_year
+        self.emissions = emissions
+        self.delta = delta
+        self.total_delta = None if population is None else delta * population
+
+    def percentage(self, shift: int) -> np.ndarray:
+        """ Returns the delta of the given shift as a percentage of emissions, shape
+        (entities, years), 0 where emissions are 0.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.emissions != 0, 100 * self.delta[shift] / self.emissions, 0.0)
+
+    def latest(self, entity: str, shift: int = 0) -> Tuple[int, float, float]:
+        """ Returns the latest year entity has data for, and the change in its average
+        person's weekly emissions in that year under the given shift, in grams and as a
+        percentage.
+
+        Raises KeyError if entity has no data.
+        """
+        row = self.index[entity]
+        present = np.flatnonzero(~np.isnan(self.emissions[row]))
+        if len(present) == 0:
+            raise KeyError(entity)
+        offset = present[-1]
+        return (self.first_year + int(offset), float(self.delta[shift, row, offset]),
+                float(self.percentage(shift)[row, offset]))
+
+
+def simulate_shifts(fao: FaoTable, shifts: List[DietShift],
+                    baseline: Optional[CountryBaseline] = None,
+                    population: Optional[np.ndarray] = None,
+                    chunk_size: int = default_chunk_size) -> ShiftResult:
+    """ Applies every shift to the consumption of every entity of fao in every year.
+
+    Pass baseline (from timeseries.year_baseline) to reuse it. population, if given, is
+    the number of people in every entity and year, shape (entities, years).
+
+    >>> from meatmonitor import model
+    >>> _ = model.load_countries()
+    >>> result = simulate_shifts(model.fao_table, [DietShift(),
+    ...                                            DietShift(swap={('Beef', 'Poultry'): 1})])
+    >>> result.latest('Canada', 0)
+    (2017, 0.0, 0.0)
+    >>> year, grams, percentage = result.latest('World', 1)
+    >>> year, round(percentage, 1)
+    (2013, -57.6)
+    """
+    if baseline is None:
+        baseline = CountryBaseline(fao.consumption, fao.entities)
+    entities, years, meats = fao.consumption.shape
+    consumption = fao.consumption.reshape(-1, meats).T.astype(np.float64)
+    # (meats, entity-years)
+    factors = baseline.emissions_per_gram
+    if factors.ndim == 2:
+        factors = np.repeat(factors, years, axis=0).T
+    else:
+        factors = factors[:, np.newaxis]
+    emissions = baseline.total_country_emissions
+
+    delta = np.empty((len(shifts), entities * years))
+    for start in range(0, len(shifts), chunk_size):
+        chunk = shifts[start:start + chunk_size]
+        transfer = np.stack([shift.transfer for shift in chunk])
+        cap = np.stack([shift.cap for shift in chunk])
+        total = delta[start:start + len(chunk)]
+        for meat in range(meats):
+            grams = transfer[:, :, meat] @ consumption
+            np.minimum(grams, cap[:, meat, np.newaxis], out=grams)
+            grams *= factors[meat]
+            if meat == 0:
+                total[:] = grams
+            else:
+                total += grams
+        total -= emissions.reshape(-1)
+    return ShiftResult(fao.entities, fao.index, fao.first_year, emissions,
+                       delta.reshape(len(shifts), entities, years), population)
@@ -0,0 +1,156 @@
+"""
+Turns diet descriptions (plain dicts, e.g. parsed from JSON) into the figures the
+app shows on its results pages, scoring a whole list of diets in one vectorized
+call.
+
+A diet is a dict with a 'country' (a name, ISO code or close misspelling, see
+meatmonitor.search), the weekly 'servings' of each meat (a list in
+animal_types order, or a dict keyed by meat), and optionally a 'name' and the
+'goals' the user would change to (in the same form as servings).
+
+The result for each diet holds the numbers write() shows (weekly emissions and
+how they compare with the country average, and the colour they are shown in),
+the numbers on the info page, and, if goals were given, the numbers final()
+shows. They are computed with meatmonitor.batch, so they equal what User would
+compute.
+"""
+from typing import Dict, List
+import math
+import numpy as np
+from meatmonitor.batch import CountryBaseline, score_batch, sum_columns
+from meatmonitor.emissions import animal_types, serving_size_per_animal
+from meatmonitor.loader import CountryTable
+from meatmonitor.search import CountryIndex
+
+serving_size_vector = np.array([serving_size_per_animal[x] for x in animal_types])
+
+
+class DietError(ValueError):
+    """ Raised when a diet is missing a field, names an unknown country or has bad servings. """
+
+
+def parse_servings(value, field: str = 'servings') -> List[float]:
+    """ Returns the servings in value as a list in animal_types order.
+
+    >>> parse_servings({'Beef': 2, 'Lamb': 1})
+    [2.0, 0.0, 0.0, 1.0, 0.0]
+    >>> parse_servings([1, 2])  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    meatmonitor.scoring.DietError: servings must list 5 values, one per meat in [...]
+    >>> parse_servings([1, 2, 3, 4, 1e999])
+    Traceback (most recent call last):
+    meatmonitor.scoring.DietError: servings must be finite
+    """
+    if isinstance(value, dict):
+        unknown = set(value) - set(animal_types)
+        if unknown:
+            raise DietError(f'{field} has unknown meats: {sorted(unknown)}')
+        value = [value.get(animal, 0) for animal in animal_types]
+    if not isinstance(value, list) or len(value) != len(animal_types):
+        raise DietError(f'{field} must list {len(animal_types)} values, '
+                        f'one per meat in {animal_types}')
+    try:
+        servings = [float(x) for x in value]
+    except (TypeError, ValueError):
+        raise DietError(f'{field} must be numbers') from None
+    if not all(math.isfinite(x) for x in servings):
+        raise DietError(f'{field} must be finite')
+    if any(not x >= 0 for x in servings):
+        raise DietError(f'{field} cannot be negative')
+    return servings
+
+
+def colour_of_total(percentage: float) -> str:
+    """ Returns the colour write() shows the user's total in, given total_emissions_percentage. """
+    if percentage <= -25:
+        return 'green'
+    elif percentage <= 25:
+        return 'yellow'
+    else:
+        return 'red'
+
+
+def colour_of_goal(percentage: float) -> str:
+    """ Returns the colour change() shows the new total in, given emission_reduction_percentage. """
+    if percentage > 25:
+        return 'green'
+    elif percentage > 12.5:
+        return 'yellow'
+    else:
+        return 'red'
+
+
+class Scorer:
+    """
+    Scores diets against one loaded country table.
+
+    Attributes:
+        - table: the latest consumption of every country
+        - baseline: the emissions of the average person in every country of table
+        - index: resolves the country of each diet to its row of table
+    """
+    table: CountryTable
+    baseline: CountryBaseline
+    index: CountryIndex
+
+    def __init__(self, table: CountryTable) -> None:
+        self.table = table
+        self.baseline = CountryBaseline(table.consumption, table.entities)
+        self.index = CountryIndex(table.entities, table.codes)
+
+    def score(self, diets: List[dict]) -> List[Dict]:
+        """ Returns the results of every diet, in order.
+
+        Raises DietError, naming the diet, if any of them is invalid.
+        """
+        servings = np.empty((len(diets), len(animal_types)))
+        goals = np.full((len(diets), len(animal_types)), np.nan)
+        rows = np.empty(len(diets), dtype=np.intp)
+        for x, diet in enumerate(diets):
+            try:
+                if not isinstance(diet, dict):
+                    raise DietError('each diet must be an object')
+                row = self.index.resolve(diet.get('country'))
+                if row is None:
+                    raise DietError(f'unknown country: {diet.get("country")!r}')
+                rows[x] = row
+                servings[x] = parse_servings(diet.get('servings'))
+                if diet.get('goals') is not None:
+                    goals[x] = parse_servings(diet['goals'], 'goals')
+            except DietError as error:
+                raise DietError(f'diet {x}: {error}') from None
+
+        stats = score_batch(servings, rows, self.baseline)
+        new_total = sum_columns(goals * self.baseline.per_serving(rows))
+        reduction = stats.total_emissions - new_total
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reduction_percentage = np.where(stats.total_emissions != 0,
+                                            100 * reduction / stats.total_emissions, 0.0)
+        meat_kg = servings * serving_size_vector / 1000
+
+        results = []
+        for x, diet in enumerate(diets):
+            percentage = float(stats.total_emissions_percentage[x])
+            result = {'name': diet.get('name', ''),
+                      'country': self.table.entities[rows[x]],
+                      'servings': dict(zip(animal_types, servings[x].tolist())),
+                      'weekly_emissions': dict(zip(animal_types,
+                                                   stats.weekly_emissions[x].tolist())),
+                      'total_emissions': float(stats.total_emissions[x]),
+                      'total_country_emissions': float(stats.total_country_emissions[x]),
+                      'total_emissions_comparison': float(stats.total_emissions_comparison[x]),
+                      'total_emissions_percentage': percentage,
+                      'kg_per_week': int(stats.total_emissions[x] / 1000),
+                      'colour': colour_of_total(percentage),
+                      'percent_of_country_average': int(100 + percentage),
+                      'meat_kg_per_week': dict(zip(animal_types, meat_kg[x].tolist()))}
+            if diet.get('goals') is not None:
+                result.update({'goals': dict(zip(animal_types, goals[x].tolist())),
+                               'new_total_emissions': float(new_total[x]),
+                               'emission_reduction': float(reduction[x]),
+                               'emission_reduction_percentage': float(reduction_percentage[x]),
+                               'new_kg_per_week': int(new_total[x] / 1000),
+                               'saved_kg_per_week': int(reduction[x] / 1000),
+                               'goal_colour': colour_of_goal(float(reduction_percentage[x]))})
+            results.append(result)
+        return results
@@ -0,0 +1,291 @@
+"""
+Finds countries by name or ISO code, for the type-ahead country box and for
+resolving the free-text country fields of surveys and scoring requests.
+
+A CountryIndex is built once from the entities and codes of the country table.
+Names, codes and a few common aliases are normalized (case, accents and
+punctuation ignored) into:
+
+    - a dict, for exact matches ('canada', 'can', 'usa', 'ivory coast')
+    - a sorted list of every word-start of every name, searched with bisect, so
+    'kor' finds 'North Korea' and 'South Korea'
+    - a trigram index, for names that are misspelled ('Swizterland')
+
+Every entity is also marked as a country or an aggregate ('Africa',
+'Asia, Central', 'World', ...), so pickers can list countries first. The
+module only uses the standard library. A type-ahead search takes under 50 us,
+and resolving a misspelled name, which checks the closest few names letter by
+letter, a few hundred (see benchmarks/bench_search.py).
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import unicodedata
+from meatmonitor import model
+
+aggregate_codes = {'OWID_WRL', 'OWID_MNS', 'OWID_PYA'}
+# the OWID codes of regions; the other OWID codes are former countries such as the USSR
+
+former_countries = {'Belgium-Luxembourg', 'Ethiopia PDR', 'Sudan (former)'}
+# former countries the FAO table lists without a code, unlike its regions
+
+aliases = {'uk': 'United Kingdom', 'great britain': 'United Kingdom', 'britain': 'United Kingdom',
+           'us': 'United States', 'america': 'United States',
+           'united states of america': 'United States', 'ivory coast': "Cote d'Ivoire",
+           'czech republic': 'Czechia', 'swaziland': 'Eswatini', 'macedonia': 'North Macedonia',
+           'burma': 'Myanmar', 'holland': 'Netherlands', 'east timor': 'Timor',
+           'turkiye': 'Turkey', 'cabo verde': 'Cape Verde', 'russian federation': 'Russia',
+           'viet nam': 'Vietnam', 'korea': 'South Korea', 'republic of korea': 'South Korea'}
+# other names people commonly type, keyed by their normalized form
+
+suggest_cutoff = 0.4
+# the trigram similarity (0 to 1) a misspelled name needs to be suggested
+
+candidates = 5
+# the most similar names a misspelled name is checked against letter by letter
+
+candidate_cutoff = 0.2
+# the trigram similarity a name needs to be one of those
+
+letters_per_typo = 5
+# a misspelled name of four letters or more is resolved if it has at most one typo per
+# this many letters (and at least one is allowed), and fewer than against any other name
+
+
+def normalize(text: str) -> str:
+    """ Returns text in the form names are indexed in: lower case, without accents, '&' read
+    as 'and', and anything but letters and digits turned into single spaces.
+
+    >>> normalize("  Côte d'Ivoire ")
+    'cote d ivoire'
+    >>> normalize('Australia & New Zealand')
+    'australia and new zealand'
+    """
+    text = unicodedata.normalize('NFKD', text.replace('&', ' and '))
+    text = ''.join(char if char.isalnum() else ' ' for char in text
+                   if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def edit_distance(a: str, b: str) -> int:
+    """ Returns the number of letters that must be added, dropped, changed or swapped with
+    the next to turn a into b.
+
+    >>> edit_distance('Untied States', 'United States'), edit_distance('Brasil', 'Brazil')
+    (1, 1)
+    """
+    before, last = None, list(range(len(b) + 1))
+    for x in range(1, len(a) + 1):
+        current = [x] + [0] * len(b)
+        for y in range(1, len(b) + 1):
+            current[y] = min(last[y] + 1, current[y - 1] + 1,
+                             last[y - 1] + (a[x - 1] != b[y - 1]))
+            if x > 1 and y > 1 and a[x - 1] == b[y - 2] and a[x - 2] == b[y - 1]:
+                current[y] = min(current[y], before[y - 2] + 1)
+        before, last = last, current
+    return last[-1]
+
+
+def trigrams(key: str) -> set:
+    """ Returns the trigrams of a normalized key, padded so that short keys have some too. """
+    padded = f'  {key} '
+    return {padded[x:x + 3] for x in range(len(padded) - 2)}
+
+
+class CountryIndex:
+    """
+    Every entity of the country table, searchable by name, code and alias.
+
+    Attributes:
+        - entities: the entity names, in the order of the country table's rows
+        - codes: the code of each entity ('' if it has none)
+        - is_country: whether each entity is a country (current or former) rather
+        than an aggregate of several
+        - names: the normalized name of each entity
+        - exact: maps the normalized name, code and aliases of every entity to its row
+        - words: every normalized word-start of every name and alias, sorted
+        - word_rows: the row of each entry of words
+        - grams: maps a trigram to the fuzzy keys that contain it
+        - fuzzy_keys: the normalized name or alias, trigram count and row of each fuzzy key
+
+    Representation Invariants:
+        - len(self.entities) == len(self.codes) == len(self.is_country) == len(self.names)
+        - len(self.words) == len(self.word_rows)
+
+    Sample Usage:
+    >>> index = CountryIndex(['Canada', 'Chad', 'Africa', 'South Korea'],
+    ...                      ['CAN', 'TCD', '', 'KOR'])
+    >>> index.entity(index.resolve('can')), index.entity(index.resolve('Cnada'))
+    ('Canada', 'Canada')
+    >>> index.search('korea'), index.search('c')
+    (['South Korea'], ['Canada', 'Chad'])
+    >>> index.is_country[index.resolve('Africa')]
+    False
+    >>> index.resolve('Atlantis') is None
+    True
+    """
+    entities: List[str]
+    codes: List[str]
+    is_country: List[bool]
+    names: List[str]
+    exact: Dict[str, int]
+    words: List[str]
+    word_rows: List[int]
+    grams: Dict[str, List[int]]
+    fuzzy_keys: List[Tuple[str, int, int]]
+
+    def __init__(self, entities: List[str], codes: List[str]) -> None:
+        self.entities = entities
+        self.codes = codes
+        self.is_country = [name in former_countries or (code != '' and code not in
+                                                         aggregate_codes)
+                           for name, code in zip(entities, codes)]
+        self.names = [normalize(name) for name in entities]
+        rows = {name: row for row, name in enumerate(entities)}
+
+        keys = [(name, row) for row, name in enumerate(self.names)]
+        keys += [(alias, rows[name]) for alias, name in aliases.items() if name in rows]
+        self.exact = {normalize(code): row for row, code in enumerate(codes) if code}
+        self.exact.update(keys)
+
+        words = []
+        for key, row in keys:
+            parts = key.split(' ')
+            words += [(' '.join(parts[x:]), row) for x in range(len(parts))]
+        words.sort()
+        self.words = [word for word, _ in words]
+        self.word_rows = [row for _, row in words]
+
+        self.grams = {}
+        self.fuzzy_keys = []
+        for key, row in keys:
+            key_grams = trigrams(key)
+            for gram in key_grams:
+                self.grams.setdefault(gram, []).append(len(self.fuzzy_keys))
+            self.fuzzy_keys.append((key, len(key_grams), row))
+
+    def entity(self, row: Optional[int]) -> Optional[str]:
+        """ Returns the name of the entity at row, or None if row is None. """
+        return None if row is None else self.entities[row]
+
+    def _order(self, row: int) -> tuple:
+        """ Sorts countries before aggregates, and each alphabetically. """
+        return not self.is_country[row], self.entities[row]
+
+    def complete(self, text: str, limit: int = 10, countries_only: bool = False) -> List[int]:
+        """ Returns the rows of up to limit entities with a word starting with text, those whose
+        name starts with it first, then countries before aggregates.
+        """
+        key = normalize(text)
+        if not key:
+            return []
+        found = {}
+        for x in range(bisect_left(self.words, key), len(self.words)):
+            if not self.words[x].startswith(key):
+                break
+            row = self.word_rows[x]
+            if countries_only and not self.is_country[row]:
+                continue
+            starts_name = self.names[row].startswith(key)
+            found[row] = min(found.get(row, 1), 0 if starts_name else 1)
+        return sorted(found, key=lambda row: (found[row], *self._order(row)))[:limit]
+
+    def similar(self, text: str, limit: int = 10, cutoff: float = suggest_cutoff,
+                countries_only: bool = False) -> List[Tuple[float, int]]:
+        """ Returns up to limit (similarity, row) pairs of the entities whose name or alias
+        shares the most trigrams with text, most similar first, leaving out any less similar
+        than cutoff. Similarity is the Dice coefficient of the two sets of trigrams.
+        """
+        key = normalize(text)
+        if not key:
+            return []
+        key_grams = trigrams(key)
+        shared = {}
+        for gram in key_grams:
+            for fuzzy_key in self.grams.get(gram, ()):
+                shared[fuzzy_key] = shared.get(fuzzy_key, 0) + 1
+
+        best = {}
+        for fuzzy_key, count in shared.items():
+            _, size, row = self.fuzzy_keys[fuzzy_key]
+            score = 2 * count / (len(key_grams) + size)
+            if score >= cutoff and score > best.get(row, 0) and \
+                    not (countries_only and not self.is_country[row]):
+                best[row] = score
+        ranked = sorted(best, key=lambda row: (-best[row], *self._order(row)))
+        return [(best[row], row) for row in ranked[:limit]]
+
+    def search(self, text: str, limit: int = 10, countries_only: bool = False) -> List[str]:
+        """ Returns the names of up to limit entities matching text as it is typed: its
+        exact match, then names with a word starting with text, then names like it.
+        """
+        rows = []
+        row = self.exact.get(normalize(text))
+        if row is not None and not (countries_only and not self.is_country[row]):
+            rows.append(row)
+        for found in self.complete(text, limit, countries_only):
+            if found not in rows:
+                rows.append(found)
+        if len(rows) < limit:
+            for _, found in self.similar(text, limit, countries_only=countries_only):
+                if found not in rows:
+                    rows.append(found)
+        return [self.entities[row] for row in rows[:limit]]
+
+    def resolve(self, text: Optional[str]) -> Optional[int]:
+        """ Returns the row of the entity text names, or None if it names none clearly.
+
+        text may be a name, ISO code or alias in any case, the unique beginning of a name
+        ('Switz'), or a name with a few typos that is closer to one entity than any other.
+        """
+        if not isinstance(text, str):
+            return None
+        key = normalize(text)
+        row = self.exact.get(key)
+        if row is not None or not key:
+            return row
+        if len(key) >= 3:
+            starts = [row for row in self.complete(key, 2)
+                      if self.names[row].startswith(key)]
+            if len(starts) == 1:
+                return starts[0]
+        if len(key) < 4:
+            return None
+        typos = max(1, len(key) // letters_per_typo)
+        distances = sorted((edit_distance(key, self.names[row]), row)
+                           for _, row in self.similar(key, candidates, candidate_cutoff)
+                           if abs(len(self.names[row]) - len(key)) <= typos)
+        if distances and distances[0][0] <= typos and \
+                (len(distances) == 1 or distances[0][0] < distances[1][0]):
+            return distances[0][1]
+        return None
+
+    def resolve_many(self, values: Iterable) -> List[int]:
+        """ Returns the row each value resolves to (see resolve), or -1 where it resolves to
+        none. Each distinct value is only resolved once.
+        """
+        resolved = {}
+        rows = []
+        for value in values:
+            row = resolved.get(value)
+            if row is None:
+                row = self.resolve(value)
+                row = resolved[value] = -1 if row is None else row
+            rows.append(row)
+        return rows
+
+
+_shared_index = None
+
+
+def country_index() -> CountryIndex:
+    """ Returns the CountryIndex of the countries model.load_countries loaded, building it on
+    first use and again whenever they are reloaded.
+
+    Preconditions:
+        - model.load_countries() has been called
+    """
+    global _shared_index
+    table = model.country_table
+    if _shared_index is None or _shared_index.entities is not table.entities:
+        _shared_index = CountryIndex(table.entities, table.codes)
+    return _shared_index
@@ -0,0 +1,159 @@
+"""
+A local HTTP/JSON service that scores diets the way the app does, so other
+programs can get the app's numbers without its window.
+
+The country table is loaded once when the server starts (in every worker
+process), and requests are scored by a pool of worker processes so several can
+be answered at once.
+
+Endpoints:
+    - POST /score with one diet (see meatmonitor.scoring) returns its result; with
+    {"diets": [...]} returns {"results": [...]}, in the same order
+    - GET /countries returns the names that can be used as a diet's country
+    - GET /health returns {"status": "ok"}
+
+Invalid requests are answered with status 400 and {"error": "..."}.
+
+Run from the repository root:
+    python -m meatmonitor.server [--port 8000] [--workers N]
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+import argparse
+import json
+import os
+from meatmonitor.loader import load_country_table
+from meatmonitor.model import default_csv_path
+from meatmonitor.scoring import DietError, Scorer
+
+max_body_size = 16 * 2 ** 20
+# the largest request body accepted, in bytes
+
+_scorer: Optional[Scorer] = None
+# the scorer of this process, set up by load_scorer
+
+
+def load_scorer(path=default_csv_path) -> None:
+    """ Loads the country table at path into this process. Run once in every worker. """
+    global _scorer
+    _scorer = Scorer(load_country_table(path))
+
+
+def score_request(body: bytes) -> Tuple[int, bytes]:
+    """ Returns the status and JSON body answering a POST /score with the given body.
+
+    Runs in a worker process, so the request is decoded and the answer encoded there
+    rather than in the server process.
+    """
+    try:
+        payload = json.loads(body)
+        if isinstance(payload, dict) and 'diets' in payload:
+            if not isinstance(payload['diets'], list):
+                raise DietError('diets must be a list')
+            answer = {'results': _scorer.score(payload['diets'])}
+        else:
+            answer = _scorer.score([payload])[0]
+    except (ValueError, OverflowError) as error:
+        # DietError and json's decode errors are both ValueErrors; OverflowError is a
+        # backstop for figures too large to show
+        return 400, json.dumps({'error': str(error)}).encode()
+    return 200, json.dumps(answer).encode()
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """ Answers the requests of one connection. The server holds the pool and country names. """
+    server: 'ScoringServer'
+    protocol_version = 'HTTP/1.1'
+    # the headers and body are written separately, which Nagle's algorithm would delay
+    disable_nagle_algorithm = True
+
+    def send_json(self, status: int, body: bytes) -> None:
+        """ Sends body, which is already JSON encoded, with the given status. """
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self.send_json(200, b'{"status": "ok"}')
+        elif self.path == '/countries':
+            self.send_json(200, self.server.countries_body)
+        else:
+            self.send_json(404, b'{"error": "not found"}')
+
+    def do_POST(self) -> None:
+        if self.path != '/score':
+            self.send_json(404, b'{"error": "not found"}')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.send_json(411, b'{"error": "Content-Length required"}')
+            return
+        if not 0 <= length <= max_body_size:
+            self.send_json(413, b'{"error": "request too large"}')
+            return
+        body = self.rfile.read(length)
+        if self.server.pool is None:
+            status, answer = score_request(body)
+        else:
+            status, answer = self.server.pool.submit(score_request, body).result()
+        self.send_json(status, answer)
+
+    def log_message(self, format, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """
+    The scoring service: one thread per connection, scoring done in a pool of processes.
+
+    Attributes:
+        - pool: the worker processes, or None to score in the connection's thread
+        - countries_body: the JSON answer to GET /countries
+        - quiet: whether to leave requests out of the log
+    """
+    pool: Optional[Executor]
+    countries_body: bytes
+    quiet: bool
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], workers: int = 0,
+                 path=default_csv_path, quiet: bool = False) -> None:
+        load_scorer(path)
+        self.countries_body = json.dumps(_scorer.table.entities).encode()
+        self.quiet = quiet
+        super().__init__(address, ScoringHandler)
+        self.pool = ProcessPoolExecutor(workers, initializer=load_scorer, initargs=(path,)) \
+            if workers > 0 else None
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='scoring processes; 0 scores in the server process')
+    parser.add_argument('--quiet', action='store_true', help='do not log every request')
+    args = parser.parse_args()
+
+    with ScoringServer((args.host, args.port), args.workers, quiet=args.quiet) as server:
+        print(f'scoring on http://{args.host}:{server.server_port} '
+              f'with {args.workers} worker(s)', flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
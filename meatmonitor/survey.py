@@ -0,0 +1,199 @@
+"""
+Scores diet surveys too large to fit in memory, from the command line.
+
+The input is a CSV file, or a JSONL file with one object per line, holding a
+'name', a 'country' and the weekly servings of each meat in columns named after
+animal_types ('Beef', 'Poultry', 'Pork', ...); a meat with no column counts as
+no servings, so files written before a meat was added still score. If it also
+has 'goal_Beef', 'goal_Poultry', ... columns, the goal figures are added too, a
+meat with no goal column again counting as no servings.
+
+The file is read a chunk of rows at a time, each chunk is scored in one
+vectorized call (with the same math as User.find_stats and User.goal_stats)
+and its results are written out before the next chunk is read, so memory stays
+flat however long the file is. With --workers, chunks are scored in that many
+processes, a few chunks ahead of the writer, and still written in input order.
+
+Countries may be given by name, ISO code or a close misspelling; each distinct
+spelling in a chunk is resolved once with meatmonitor.search and the entity it
+resolved to is written in 'resolved_country'. Rows whose country resolves to
+none or whose servings are not numbers are written with empty figures and
+counted on stderr.
+
+Run from the repository root:
+    python -m meatmonitor.survey survey.csv [-o results.csv] [--chunk-size N] [--workers N]
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, Optional
+import argparse
+import json
+import sys
+import numpy as np
+import pandas as pd
+from meatmonitor.batch import CountryBaseline, score_batch, sum_columns
+from meatmonitor.emissions import animal_types
+from meatmonitor.loader import CountryTable, load_country_table
+from meatmonitor.model import default_csv_path
+from meatmonitor.search import CountryIndex
+
+goal_columns = ['goal_' + animal for animal in animal_types]
+# the optional columns holding the servings a user would change to
+
+default_chunk_size = 100000
+# rows scored at a time; a chunk of results takes roughly 100 bytes a row
+
+_table: Optional[CountryTable] = None
+_baseline: Optional[CountryBaseline] = None
+_index: Optional[CountryIndex] = None
+# the country table of this process, set up by load_table
+
+
+def load_table(path=default_csv_path) -> None:
+    """ Loads the country table at path into this process. Run once in every worker. """
+    global _table, _baseline, _index
+    _table = load_country_table(path)
+    _baseline = CountryBaseline(_table.consumption, _table.entities)
+    _index = CountryIndex(_table.entities, _table.codes)
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """ Yields the rows of the CSV or JSONL file at path, chunk_size at a time.
+    '-' reads CSV from stdin.
+    """
+    if path.endswith('.jsonl'):
+        with open(path) as file:
+            lines = (line for line in file if line.strip())
+            while True:
+                records = [json.loads(line) for line in islice(lines, chunk_size)]
+                if not records:
+                    return
+                yield pd.DataFrame.from_records(records)
+    else:
+        yield from pd.read_csv(sys.stdin if path == '-' else path, chunksize=chunk_size,
+                               dtype={'name': str, 'country': str}, keep_default_na=False)
+
+
+def _servings(chunk: pd.DataFrame, columns, absent: float = np.nan) -> np.ndarray:
+    """ Returns the given columns of chunk as float64, NaN where a value is missing or
+    not a number, and absent throughout a column chunk does not have.
+    """
+    values = np.full((len(chunk), len(columns)), absent)
+    for x, column in enumerate(columns):
+        if column in chunk:
+            values[:, x] = pd.to_numeric(chunk[column], errors='coerce')
+    return values
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """ Returns the results of every row of chunk, in order.
+
+    Preconditions:
+        - load_table has been run in this process
+
+    A survey written before 'Other' was added, with no Other or goal_Other column:
+    >>> load_table()
+    >>> old = pd.DataFrame({'name': ['Ann'], 'country': ['Canada'], 'Beef': [2], 'Poultry': [3],
+    ...                     'Pork': [5], 'Lamb': [7], 'goal_Beef': [0], 'goal_Poultry': [3],
+    ...                     'goal_Pork': [5], 'goal_Lamb': [7]})
+    >>> result = score_chunk(old).iloc[0]
+    >>> float(result['total_emissions']), round(float(result['emission_reduction_percentage']), 6)
+    (50955.75, 33.288883)
+    """
+    rows = np.full(len(chunk), -1, dtype=np.intp)
+    if 'country' in chunk:
+        spelling, spellings = pd.factorize(chunk['country'])
+        resolved = np.array(_index.resolve_many(spellings) + [-1], dtype=np.intp)
+        rows = resolved[spelling]
+        # factorize numbers missing values -1, which picks the -1 appended above
+    servings = _servings(chunk, animal_types, 0.0)
+    valid = (rows >= 0) & (servings >= 0).all(axis=1)
+
+    stats = score_batch(servings[valid], rows[valid], _baseline)
+    figures = {'total_emissions': stats.total_emissions,
+               'total_country_emissions': stats.total_country_emissions,
+               'total_emissions_comparison': stats.total_emissions_comparison,
+               'total_emissions_percentage': stats.total_emissions_percentage}
+    if any(column in chunk for column in goal_columns):
+        new_total = sum_columns(_servings(chunk, goal_columns, 0.0)[valid]
+                                * _baseline.per_serving(rows[valid]))
+        reduction = stats.total_emissions - new_total
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = np.where(stats.total_emissions != 0,
+                                  100 * reduction / stats.total_emissions, 0.0)
+        figures.update({'new_total_emissions': new_total,
+                        'emission_reduction': reduction,
+                        'emission_reduction_percentage': percentage})
+
+    results = pd.DataFrame({'name': chunk['name'] if 'name' in chunk else '',
+                            'country': chunk['country'] if 'country' in chunk else '',
+                            'resolved_country': np.array(_table.entities + [''],
+                                                         dtype=object)[rows]},
+                           index=chunk.index)
+    for column, values in figures.items():
+        column_values = np.full(len(chunk), np.nan)
+        column_values[valid] = values
+        results[column] = column_values
+    return results
+
+
+def score_file(path: str, output, chunk_size: int = default_chunk_size,
+               workers: int = 0, jsonl: bool = False) -> int:
+    """ Scores the survey at path into the open file output, and returns the number of
+    rows that could not be scored.
+
+    With workers > 0, at most 2 * workers chunks are read ahead of the writer.
+    """
+    skipped = 0
+    header = True
+
+    def write(results: pd.DataFrame) -> None:
+        nonlocal skipped, header
+        skipped += int(results['total_emissions'].isna().sum())
+        if jsonl:
+            output.write(results.to_json(orient='records', lines=True, double_precision=15))
+        else:
+            results.to_csv(output, header=header, index=False)
+        header = False
+
+    chunks = read_chunks(path, chunk_size)
+    if workers <= 0:
+        for chunk in chunks:
+            write(score_chunk(chunk))
+        return skipped
+
+    with ProcessPoolExecutor(workers, initializer=load_table) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('input', help="CSV or .jsonl survey file, or '-' for CSV on stdin")
+    parser.add_argument('-o', '--output', help='results file (.csv or .jsonl); default stdout')
+    parser.add_argument('--chunk-size', type=int, default=default_chunk_size)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='scoring processes; 0 scores in this process')
+    args = parser.parse_args()
+
+    load_table()
+    jsonl = args.output is not None and args.output.endswith('.jsonl')
+    if args.output is None:
+        skipped = score_file(args.input, sys.stdout, args.chunk_size, args.workers)
+    else:
+        with open(args.output, 'w', newline='') as output:
+            skipped = score_file(args.input, output, args.chunk_size, args.workers, jsonl)
+    if skipped:
+        print(f'{skipped} row(s) could not be scored (unknown country or bad servings)',
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
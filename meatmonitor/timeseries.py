@@ -0,0 +1,92 @@
+"""
+Year by year comparisons against the full FAO history, not just each entity's
+latest row.
+
+Everything here works on FaoTable.consumption, the dense (entity, year, meat)
+array, so comparing against one year is a single index and comparing a cohort
+against every year is one broadcast.
+"""
+from typing import Optional
+import numpy as np
+from meatmonitor.batch import BatchStats, CountryBaseline, score_batch
+from meatmonitor.loader import FaoTable
+
+
+class EmissionTrend:
+    """
+    A straight line fitted through each entity's average weekly CO2 emissions over the years.
+
+    Attributes:
+        - first_year: the year the intercepts are measured at
+        - slope: the change in average weekly emissions per year, one entry per entity
+        - intercept: the fitted average weekly emissions in first_year, one entry per entity
+
+    Representation Invariants:
+        - self.slope.shape == self.intercept.shape
+    """
+    first_year: int
+    slope: np.ndarray
+    intercept: np.ndarray
+
+    def __init__(self, first_year, slope, intercept) -> None:
+        self.first_year = first_year
+        self.slope = slope
+        self.intercept = intercept
+
+    def at(self, year: int) -> np.ndarray:
+        """ Returns the fitted average weekly emissions of every entity in year. """
+        return self.intercept + self.slope * (year - self.first_year)
+
+
+def year_baseline(fao: FaoTable) -> CountryBaseline:
+    """ Returns the country emissions of every entity in every year of fao. """
+    return CountryBaseline(fao.consumption, fao.entities)
+
+
+def fit_trends(fao: FaoTable, baseline: Optional[CountryBaseline] = None) -> EmissionTrend:
+    """ Fits a least squares line through every entity's total emissions at once.
+
+    Years with no data are left out of the fit. An entity with a single year of data
+    gets a flat line at that year's value.
+
+    >>> consumption = np.full((2, 3, 5), np.nan, dtype=np.float32)
+    >>> consumption[0] = [[1, 0, 0, 0, 0], [2, 0, 0, 0, 0], [3, 0, 0, 0, 0]]
+    >>> consumption[1, 1] = [2, 0, 0, 0, 0]
+    >>> trend = fit_trends(FaoTable(['A', 'B'], ['', ''], 2000, ['Beef', 'Poultry', 'Pork',
+    ...                             'Lamb', 'Other'], consumption))
+    >>> trend.slope.round(1).tolist(), trend.at(2001).round(1).tolist()
+    ([99.8, 0.0], [199.6, 199.6])
+    """
+    if baseline is None:
+        baseline = year_baseline(fao)
+    totals = baseline.total_country_emissions
+    present = ~np.isnan(totals)
+    x = np.arange(totals.shape[1], dtype=np.float64)
+
+    count = present.sum(axis=1)
+    sum_x = (present * x).sum(axis=1)
+    sum_y = np.where(present, totals, 0).sum(axis=1)
+    sum_xx = (present * x * x).sum(axis=1)
+    sum_xy = np.where(present, totals * x, 0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = count * sum_xx - sum_x * sum_x
+        slope = np.where(spread > 0, (count * sum_xy - sum_x * sum_y) / spread, 0.0)
+        intercept = (sum_y - slope * sum_x) / count
+    return EmissionTrend(fao.first_year, slope, intercept)
+
+
+def score_batch_by_year(servings, country_rows, fao: FaoTable,
+                        baseline: Optional[CountryBaseline] = None) -> BatchStats:
+    """ Scores every diet in servings against its country in every year of fao.
+
+    The country figures of the result have shape (N, years); years a country has no
+    data for are NaN. Pass baseline (from year_baseline) to reuse it between calls.
+
+    Preconditions:
+        - servings has shape (N, len(fao.meats)), columns in fao.meats order
+        - country_rows has shape (N,) and every entry indexes fao.entities
+    """
+    if baseline is None:
+        baseline = year_baseline(fao)
+    return score_batch(servings, country_rows, baseline)
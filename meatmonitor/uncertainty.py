@@ -0,0 +1,261 @@
+"""
+Puts ranges around the figures the app shows, which are point estimates: an
+emission factor or a serving size is really only known to within a range.
+
+The emission factor and serving size of every meat are drawn from a distribution
+(those given in the factor file, see meatmonitor.emissions, or a default spread
+around the point value), and every user is scored under every draw. The result
+is the mean and a confidence interval of total_emissions,
+total_emissions_percentage and, given goals, emission_reduction_percentage.
+
+A distribution is a list as it would appear in JSON:
+    ['fixed']                        the point value
+    ['uniform', low, high]
+    ['triangular', low, mode, high]
+    ['normal', mean, standard deviation]   (negative draws are clipped to 0)
+    ['lognormal', median, sigma]
+A factor's distribution is in the units of the file, grams of CO2 per gram of protein.
+
+Draws are kept as a scale of each meat's point value, so a country's overridden
+factor moves with the shared one. Every sample shares one draw across all users,
+as the factors are the same for everyone.
+
+The samples x users x meats products are contracted over the meat axis with one
+matrix product per block of users. Users are taken a block at a time, sized so a
+block's users x samples figures fit in memory_budget, and each block's means and
+percentiles are taken before the next block is scored. The default budget keeps a
+block in cache. The sampled figures are float32: they are estimates to begin
+with, and sorting them for the percentiles, which is most of the time taken, is
+twice as fast as in float64. Means are still accumulated in float64.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from meatmonitor.batch import CountryBaseline
+from meatmonitor.emissions import (animal_types, emissions_per_protein, serving_size_per_animal,
+                                   uncertainty_of_animal)
+
+default_factor_spread = 0.5
+# without a distribution in the factor file, a factor is taken as triangular from
+# (1 - spread) to (1 + spread) times its point value
+
+default_serving_spread = 0.15
+# and a serving size as uniform over the same spread of its point value
+
+default_samples = 1000
+# draws of the factors when none are given
+
+default_level = 90.0
+# the confidence interval reported, in percent
+
+default_memory_budget = 4 * 2 ** 20
+# bytes of users x samples figures held at once
+
+
+def default_distributions() -> Dict[str, Dict[str, list]]:
+    """ Returns the distribution of the factor and serving size of every meat: those in
+    the factor file, or the default spreads around the point values.
+    """
+    distributions = {}
+    for animal in animal_types:
+        factor = emissions_per_protein[animal]
+        serving = serving_size_per_animal[animal]
+        distributions[animal] = {
+            'emissions_per_gram': ['triangular', factor * (1 - default_factor_spread), factor,
+                                   factor * (1 + default_factor_spread)],
+            'serving_size': ['uniform', serving * (1 - default_serving_spread),
+                             serving * (1 + default_serving_spread)],
+            **uncertainty_of_animal[animal]}
+    return distributions
+
+
+def draw(distribution: list, point: float, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """ Returns samples draws from distribution (see the module docstring) as a scale of
+    point.
+
+    Raises ValueError if the distribution is not one of those listed.
+
+    >>> draw(['uniform', 50, 150], 100.0, 3, np.random.default_rng(0)).round(3).tolist()
+    [1.137, 0.77, 0.541]
+    """
+    kind, parameters = distribution[0], distribution[1:]
+    if kind == 'fixed':
+        values = np.full(samples, point)
+    elif kind == 'uniform':
+        values = rng.uniform(*parameters, samples)
+    elif kind == 'triangular':
+        values = rng.triangular(*parameters, samples)
+    elif kind == 'normal':
+        values = np.maximum(rng.normal(*parameters, samples), 0)
+    elif kind == 'lognormal':
+        median, sigma = parameters
+        values = median * rng.lognormal(0, sigma, samples)
+    else:
+        raise ValueError(f'unknown distribution: {distribution!r}')
+    return values / point
+
+
+class FactorSamples:
+    """
+    Draws of the emission factor and serving size of every meat, as scales of their point
+    values.
+
+    Attributes:
+        - factor_scale: (samples, len(animal_types)) array; the factor of a meat in a
+        sample is its point value (or the country's override) times its scale
+        - serving_scale: the same for serving sizes
+
+    Representation Invariants:
+        - self.factor_scale.shape == self.serving_scale.shape
+    """
+    factor_scale: np.ndarray
+    serving_scale: np.ndarray
+
+    def __init__(self, samples: int = default_samples,
+                 distributions: Optional[Dict[str, Dict[str, list]]] = None,
+                 seed: Optional[int] = 0) -> None:
+        """ Draws samples factors and serving sizes. distributions replaces the default
+        distributions of the meats and quantities it names.
+        """
+        rng = np.random.default_rng(seed)
+        given = default_distributions()
+        for animal, quantities in (distributions or {}).items():
+            given[animal] = {**given[animal], **quantities}
+        self.factor_scale = np.column_stack(
+            [draw(given[animal]['emissions_per_gram'], emissions_per_protein[animal], samples, rng)
+             for animal in animal_types])
+        self.serving_scale = np.column_stack(
+            [draw(given[animal]['serving_size'], serving_size_per_animal[animal], samples, rng)
+             for animal in animal_types])
+
+    def __len__(self) -> int:
+        return len(self.factor_scale)
+
+
+class Estimate:
+    """
+    The mean and confidence interval of a figure for every user.
+
+    Attributes:
+        - mean: the mean over the samples, one entry per user
+        - low: the lower bound of the interval, one entry per user
+        - high: the upper bound of the interval, one entry per user
+        - level: the confidence level of the interval, in percent
+    """
+    mean: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    level: float
+
+    def __init__(self, mean, low, high, level) -> None:
+        self.mean = mean
+        self.low = low
+        self.high = high
+        self.level = level
+
+    def __repr__(self) -> str:
+        if len(self.mean) == 1:
+            return (f'Estimate({self.mean[0]:.1f}, {self.level:g}% interval '
+                    f'{self.low[0]:.1f} to {self.high[0]:.1f})')
+        return f'Estimate({len(self.mean)} users, {self.level:g}% intervals)'
+
+
+class UncertaintyStats:
+    """
+    The estimates of the figures write() and final() show, for every user.
+
+    Attributes:
+        - total_emissions: the user's weekly CO2 emissions
+        - total_emissions_percentage: how far above the average person in their country
+        - emission_reduction_percentage: how much their goals cut their emissions, or None
+        if no goals were given
+    """
+    total_emissions: Estimate
+    total_emissions_percentage: Estimate
+    emission_reduction_percentage: Optional[Estimate]
+
+    def __init__(self, total_emissions, total_emissions_percentage,
+                 emission_reduction_percentage) -> None:
+        self.total_emissions = total_emissions
+        self.total_emissions_percentage = total_emissions_percentage
+        self.emission_reduction_percentage = emission_reduction_percentage
+
+
+def _summarize(values: np.ndarray, level: float) -> List[np.ndarray]:
+    """ Returns the mean of every row of values and the bounds of its central level%,
+    interpolated as np.percentile does. Sorts values in place.
+    """
+    mean = values.mean(axis=1, dtype=np.float64)
+    values.sort(axis=1)
+    bounds = []
+    for percentile in [(100 - level) / 2, (100 + level) / 2]:
+        position = percentile / 100 * (values.shape[1] - 1)
+        below = int(position)
+        above = min(below + 1, values.shape[1] - 1)
+        fraction = position - below
+        bounds.append(values[:, below] * (1 - fraction) + values[:, above] * fraction)
+    return [mean, *[bound.astype(np.float64) for bound in bounds]]
+
+
+def simulate(servings, country_rows, baseline: CountryBaseline, goals=None,
+             samples: Optional[FactorSamples] = None, level: float = default_level,
+             memory_budget: int = default_memory_budget) -> UncertaintyStats:
+    """ Returns the estimates of every user's figures under the sampled factors.
+
+    Preconditions:
+        - servings has shape (N, len(animal_types)), columns in animal_types order
+        - country_rows has shape (N,) and every entry is a row of baseline
+        - not baseline.has_years()
+        - goals is None or has the shape of servings
+
+    >>> baseline = CountryBaseline([[10.0, 20.0, 30.0, 0.0, 0.0]])
+    >>> stats = simulate([[2, 3, 5, 7, 0]], [0], baseline, goals=[[0, 3, 5, 7, 0]],
+    ...                  samples=FactorSamples(2000))
+    >>> stats.total_emissions
+    Estimate(50950.7, 90% interval 40180.3 to 62848.4)
+    >>> fixed = {animal: {'emissions_per_gram': ['fixed'], 'serving_size': ['fixed']}
+    ...          for animal in animal_types}
+    >>> simulate([[2, 3, 5, 7, 0]], [0], baseline, samples=FactorSamples(10, fixed)
+    ...          ).total_emissions
+    Estimate(50955.8, 90% interval 50955.8 to 50955.8)
+    """
+    samples = samples if samples is not None else FactorSamples()
+    servings = np.asarray(servings, dtype=np.float64)
+    country_rows = np.asarray(country_rows, dtype=np.intp)
+    if goals is not None:
+        goals = np.asarray(goals, dtype=np.float64)
+    user_scale = (samples.factor_scale * samples.serving_scale).T.astype(np.float32)
+    # (meats, samples): a user's emissions in every sample are one matrix product
+    country_totals = (baseline.country_emissions @ samples.factor_scale.T).astype(np.float32)
+    # (countries, samples): the average person's consumption is in grams, so only the
+    # factors move it
+
+    figures = 4 if goals is not None else 2
+    block = max(1, memory_budget // (len(samples) * 4 * figures))
+    results = {name: [] for name in ['total', 'percentage', 'reduction']}
+    for start in range(0, len(servings), block):
+        rows = country_rows[start:start + block]
+        per_serving = baseline.per_serving(rows)
+        weights = (servings[start:start + block] * per_serving).astype(np.float32)
+        total = weights @ user_scale
+        country = country_totals[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = total - country
+            percentage /= country
+            percentage *= 100
+            if goals is not None:
+                weights = (goals[start:start + block] * per_serving).astype(np.float32)
+                reduction = total - weights @ user_scale
+                reduction /= total
+                reduction *= 100
+                reduction[total == 0] = 0
+                results['reduction'].append(_summarize(reduction, level))
+        results['percentage'].append(_summarize(percentage, level))
+        results['total'].append(_summarize(total, level))
+
+    def estimate(name: str) -> Estimate:
+        parts = results[name]
+        return Estimate(*[np.concatenate([part[x] for part in parts]) if parts else np.empty(0)
+                          for x in range(3)], level)
+
+    return UncertaintyStats(estimate('total'), estimate('percentage'),
+                            estimate('reduction') if goals is not None else None)
@@ -0,0 +1,180 @@
+"""
+Compares a diet with the average person of every country at once: how it would
+compare if whoever eats it lived somewhere else.
+
+A User is bound to one country, so asking this of Users means building one per
+country. Here the diet is scored against every row of a CountryBaseline in one
+broadcast: its emissions under every country's emission factors (which differ
+only where the factor file overrides them) less each country's average, as a
+percentage of the average. The arithmetic is that of score_batch, so every figure
+is exactly the total_emissions_percentage a User in that country would get.
+
+compare_everywhere ranks one diet against every entity in its latest year, or
+against every entity in every year of the FAO table. sweep_diets scores many
+diets against every entity, a chunk of diets at a time, optionally on a pool of
+threads (NumPy releases the GIL for the arithmetic) or of processes.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+import numpy as np
+from meatmonitor import model
+from meatmonitor.batch import CountryBaseline, sum_columns
+
+default_chunk_size = 2048
+# diets scored at a time in sweep_diets; a chunk takes about 20 KB per diet on the
+# latest table and 50 times that with every year
+
+_worker_baseline: Optional[CountryBaseline] = None
+# the baseline of a process of sweep_diets' pool
+
+
+def percentages(servings, baseline: CountryBaseline) -> np.ndarray:
+    """ Returns total_emissions_percentage of every diet in servings against every country
+    of baseline, with shape (N, countries), or (N, countries, years) if baseline has years.
+    Countries without data give NaN, or inf if their average is 0.
+
+    >>> baseline = CountryBaseline([[10.0, 20.0, 30.0, 0.0, 0.0], [5.0, 5.0, 5.0, 5.0, 0.0]])
+    >>> percentages([[2, 3, 5, 7, 0]], baseline).round(1).tolist()
+    [[2949.4, 6286.4]]
+    """
+    servings = np.asarray(servings, dtype=np.float64)
+    totals = sum_columns(servings[:, np.newaxis] * baseline.emissions_per_serving)
+    # (N, countries), or (N, 1) when every country shares the factors
+    if baseline.has_years():
+        totals = totals[..., np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * (totals - baseline.total_country_emissions) / \
+            baseline.total_country_emissions
+
+
+class Comparison:
+    """
+    How one diet compares with the average person of every entity, lowest first.
+
+    Attributes:
+        - entities: the entity of each comparison, in order of total_emissions_percentage
+        - years: the year of the entity's data each comparison is against
+        - total_emissions: the diet's weekly CO2 emissions with the entity's factors
+        - total_country_emissions: the weekly CO2 emissions of the entity's average person
+        - total_emissions_percentage: how far above the average person the diet is, in
+        ascending order
+
+    Representation Invariants:
+        - len(self.entities) == len(self.years) == len(self.total_emissions_percentage)
+    """
+    entities: List[str]
+    years: np.ndarray
+    total_emissions: np.ndarray
+    total_country_emissions: np.ndarray
+    total_emissions_percentage: np.ndarray
+
+    def __init__(self, entities, years, total_emissions, total_country_emissions,
+                 total_emissions_percentage) -> None:
+        self.entities = entities
+        self.years = years
+        self.total_emissions = total_emissions
+        self.total_country_emissions = total_country_emissions
+        self.total_emissions_percentage = total_emissions_percentage
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+
+def compare_everywhere(servings: List[float], every_year: bool = False,
+                       countries_only: bool = False) -> Comparison:
+    """ Returns how the diet of the given weekly servings of each meat compares with the
+    average person of every entity in its latest year, or with every year of every entity
+    if every_year. Entities without data (in a year) are left out; with countries_only,
+    so are regions.
+
+    Preconditions:
+        - model.load_countries() has been called
+
+    >>> _ = model.load_countries()
+    >>> comparison = compare_everywhere([2, 3, 5, 7, 0], countries_only=True)
+    >>> comparison.entities[:2], comparison.total_emissions_percentage[:2].round(1).tolist()
+    (['Argentina', 'Australia'], [-56.6, -45.9])
+    >>> index = comparison.entities.index('Canada')
+    >>> user = model.User('Ann', 'Canada')
+    >>> user.create_animal_classes([2, 3, 5, 7, 0])
+    >>> user.find_stats()
+    >>> float(comparison.total_emissions_percentage[index]) == user.total_emissions_percentage
+    True
+    >>> every = compare_everywhere([2, 3, 5, 7, 0], every_year=True)
+    >>> every.entities[0], int(every.years[0]), len(every) > 10000
+    ('New Zealand', 1976, True)
+    """
+    servings = [servings]
+    if every_year:
+        fao = model.fao_table
+        baseline = model.history_baseline
+        figures = percentages(servings, baseline)[0]
+        rows, offsets = np.nonzero(np.isfinite(figures))
+        years = fao.first_year + offsets
+    else:
+        table = model.country_table
+        baseline = model.country_baseline
+        figures = percentages(servings, baseline)[0]
+        rows = np.flatnonzero(np.isfinite(figures))
+        offsets = None
+        years = table.years[rows].astype(np.int64)
+    if countries_only:
+        from meatmonitor.search import country_index
+
+        kept = np.array(country_index().is_country, dtype=bool)[rows]
+        rows, years = rows[kept], years[kept]
+        offsets = offsets[kept] if offsets is not None else None
+
+    at = (rows,) if offsets is None else (rows, offsets)
+    figures = figures[at]
+    order = np.argsort(figures, kind='stable')
+    rows = rows[order]
+    at = tuple(axis[order] for axis in at)
+    emissions = sum_columns(np.asarray(servings, dtype=np.float64)
+                            * baseline.per_serving(rows))
+    entities = model.country_table.entities
+    return Comparison([entities[row] for row in rows], years[order],
+                      np.broadcast_to(emissions, len(rows)).copy(),
+                      baseline.total_country_emissions[at], figures[order])
+
+
+def _set_worker_baseline(baseline: CountryBaseline) -> None:
+    global _worker_baseline
+    _worker_baseline = baseline
+
+
+def _worker_percentages(servings: np.ndarray) -> np.ndarray:
+    return percentages(servings, _worker_baseline)
+
+
+def sweep_diets(servings, baseline: CountryBaseline, workers: int = 0, processes: bool = False,
+                chunk_size: int = default_chunk_size) -> np.ndarray:
+    """ Returns percentages(servings, baseline), working out chunk_size diets at a time.
+
+    With workers > 0 the chunks are shared out to a pool of that many threads, or of
+    processes if processes is set. Processes are only worth it for very large sweeps:
+    every chunk's results are copied back from the process that worked them out.
+
+    The result takes N * countries * 8 bytes, times the years of the baseline if any.
+    """
+    servings = np.asarray(servings, dtype=np.float64)
+    result = np.empty((len(servings), *baseline.total_country_emissions.shape))
+    starts = range(0, len(servings), chunk_size)
+
+    def work(start: int) -> None:
+        result[start:start + chunk_size] = percentages(servings[start:start + chunk_size],
+                                                       baseline)
+
+    if workers <= 0:
+        for start in starts:
+            work(start)
+    elif not processes:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(work, starts))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_set_worker_baseline,
+                                 initargs=(baseline,)) as pool:
+            chunks = (servings[start:start + chunk_size] for start in starts)
+            for start, figures in zip(starts, pool.map(_worker_percentages, chunks)):
+                result[start:start + chunk_size] = figures
+    return result